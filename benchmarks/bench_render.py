@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+#
+#
+#  IRIS intelowl Source Code
+#  Copyright (C) 2022 - dfir-iris
+#  contact@dfir-iris.org
+#  Created by dfir-iris - 2022-10-29
+#
+#  License Apache Software License 3.0
+
+"""
+Times the rendering of the packaged report template with each JSON backend.
+
+    python benchmarks/bench_render.py [job.json ...]
+
+Without arguments a synthetic job shaped like a large FREE_TO_USE_ANALYZERS run is used. Pass jobs exported
+from IntelOwl (GET /api/jobs/<id>) to benchmark real-world payloads.
+"""
+
+import json
+import random
+import string
+import sys
+import tempfile
+import time
+
+from iris_intelowl_module_2.intelowl_handler.templates import get_template
+
+
+def synthetic_job(nb_analyzers=60, nb_entries=1500):
+    rand = random.Random(42)
+
+    def word():
+        return ''.join(rand.choice(string.ascii_lowercase) for _ in range(rand.randint(4, 12)))
+
+    def entry():
+        return {"name": word(), "score": rand.random(), "tags": [word() for _ in range(5)],
+                "seen": {"first": "2024-01-01T00:00:00Z", "last": "2024-06-01T00:00:00Z", "count": rand.randint(0, 999)}}
+
+    analyzer_reports = [{"name": f"Analyzer_{i}", "status": "SUCCESS", "process_time": rand.random(),
+                         "start_time": "2024-06-01T00:00:00Z",
+                         "report": {"data": [entry() for _ in range(nb_entries // nb_analyzers * (i % 5 + 1))]}}
+                        for i in range(nb_analyzers)]
+    return {"id": 1, "status": "reported_without_fails", "analyzer_reports": analyzer_reports,
+            "connector_reports": []}
+
+
+def bench(job, backend, rounds=5):
+    mod_config = {"intelowl_state_dir": tempfile.gettempdir(), "intelowl_json_backend": backend}
+    template = get_template(mod_config, "", "generic")
+    context = {"results": job, "nb_analyzer_reports": len(job.get("analyzer_reports") or []),
+               "external_link": "https://intelowl.local/jobs/1"}
+
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        template.render(context, _tojson_memo={})
+        timings.append(time.perf_counter() - start)
+
+    return min(timings)
+
+
+def main(paths):
+    jobs = [(path, json.load(open(path))) for path in paths] or [("synthetic", synthetic_job())]
+
+    for name, job in jobs:
+        size = len(json.dumps(job))
+        for backend in ("json", "orjson"):
+            print(f"{name} ({size / 1024 / 1024:.1f} MB) - {backend}: {bench(job, backend) * 1000:.0f} ms")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -51,6 +51,27 @@ module_configuration = [
         "mandatory": False,
         "type": "integer"
     },
+    {
+        "param_name": "intelowl_timeout_action",
+        "param_human_name": "Action on job timeout",
+        "param_description": "What to do with an IntelOwl job still running after the maximum job time. "
+                             "'none' leaves it running, 'kill_analyzers' kills only the analyzers that did not "
+                             "finish, 'kill_job' kills the whole job. Partial results are attached in all cases",
+        "default": "none",
+        "mandatory": False,
+        "type": "string"
+    },
+    {
+        "param_name": "intelowl_hook_time_budget",
+        "param_human_name": "Hook time budget (seconds)",
+        "param_description": "Maximum time a hook invocation spends on its whole batch of IOCs. When it is spent, "
+                             "running jobs are left running and the remaining IOCs are handed to the retry queue, "
+                             "which collects them later. A budget therefore turns retries on, whatever the "
+                             "retry setting. 0 disables the budget",
+        "default": 0,
+        "mandatory": False,
+        "type": "integer"
+    },
     {
         "param_name": "intelowl_playbook_name",
         "param_human_name": "IntelOwl Playbook name",
@@ -59,6 +80,38 @@ module_configuration = [
         "mandatory": True,
         "type": "string"
     },
+    {
+        "param_name": "intelowl_chunk_size",
+        "param_human_name": "IOCs per chunk",
+        "param_description": "Large hook payloads are processed by chunks of this many IOCs. The reports of each "
+                             "chunk are saved before the next chunk starts, which keeps the worker memory flat "
+                             "on big imports. 0 or less processes the whole payload at once",
+        "default": 0,
+        "mandatory": False,
+        "type": "integer"
+    },
+    {
+        "param_name": "intelowl_submit_batch_size",
+        "param_human_name": "Observables per submission",
+        "param_description": "IOCs of a hook are submitted to the playbook with one analyze request per "
+                             "classification, of at most this many observables, instead of one request per IOC. "
+                             "0 or 1 submits the IOCs one by one",
+        "default": 0,
+        "mandatory": False,
+        "type": "integer"
+    },
+    {
+        "param_name": "intelowl_job_tagging_enabled",
+        "param_human_name": "Tag jobs by case and batch",
+        "param_description": "Set to True to label the IntelOwl jobs with iris-case-<case id> and "
+                             "iris-batch-<batch id> on top of iris. The jobs of a chunk are then waited for "
+                             "together, with one list query of the unfinished jobs of the batch tag per round, "
+                             "and each job is fetched once it finished. Jobs left behind by a restarted worker "
+                             "are collected instead of submitted again",
+        "default": False,
+        "mandatory": False,
+        "type": "bool"
+    },
     {
         "param_name": "intelowl_manual_hook_enabled",
         "param_human_name": "Manual triggers on IOCs",
@@ -96,129 +149,460 @@ module_configuration = [
         "type": "bool",
         "section": "Insights"
     },
+    {
+        "param_name": "intelowl_summary_enabled",
+        "param_human_name": "Add IntelOwl verdict summary",
+        "param_description": "Adds an IntelOwl Summary tab to the IOC, with the verdict, detections, top tags and "
+                             "scores extracted from the analyzer reports",
+        "default": True,
+        "mandatory": False,
+        "type": "bool",
+        "section": "Insights"
+    },
+    {
+        "param_name": "intelowl_raw_report_enabled",
+        "param_human_name": "Add full HTML report",
+        "param_description": "Set to False to only keep the summary and skip the rendering of the full HTML "
+                             "report, which is heavy for large playbooks",
+        "default": True,
+        "mandatory": False,
+        "type": "bool",
+        "section": "Insights"
+    },
+    {
+        "param_name": "intelowl_render_processes",
+        "param_human_name": "Report rendering processes",
+        "param_description": "Number of processes rendering the HTML reports in parallel with the IntelOwl "
+                             "polling. Useful for large batches and playbooks with big reports. "
+                             "0 renders the reports inline",
+        "default": 0,
+        "mandatory": False,
+        "type": "integer",
+        "section": "Insights"
+    },
+    {
+        "param_name": "intelowl_json_backend",
+        "param_human_name": "JSON serializer of the reports",
+        "param_description": "Serializer used by the tojson filter of the report templates: 'orjson', 'json' "
+                             "(standard library) or 'auto' to use orjson when it is installed. orjson indents the "
+                             "raw reports by 2 spaces instead of 4",
+        "default": "auto",
+        "mandatory": False,
+        "type": "string",
+        "section": "Insights"
+    },
+    {
+        "param_name": "intelowl_reuse_max_age",
+        "param_human_name": "Reuse reports of other cases (hours)",
+        "param_description": "When the same observable, once normalized, was enriched by the same playbook in "
+                             "any case less than this many hours ago, its IntelOwl job is reused instead of "
+                             "running IntelOwl again, and the report is rendered again from it. Only the jobs "
+                             "run by this module once the reuse is enabled can be reused: IOCs enriched "
+                             "before are not looked up. 0 disables the reuse",
+        "default": 0,
+        "mandatory": False,
+        "type": "integer",
+        "section": "Insights"
+    },
+    {
+        "param_name": "intelowl_state_dir",
+        "param_human_name": "Local state directory",
+        "param_description": "Directory where the module keeps its local state (retry queue, caches). Defaults to a "
+                             "folder in the system temporary directory. Set a persistent path to keep the "
+                             "state across container restarts",
+        "default": "",
+        "mandatory": False,
+        "type": "string",
+        "section": "Retry"
+    },
+    {
+        "param_name": "intelowl_retry_enabled",
+        "param_human_name": "Retry failed enrichments",
+        "param_description": "Set to True to queue IOCs whose IntelOwl submission failed or whose job timed out, "
+                             "and retry them in the background with an exponential backoff. Retries are always "
+                             "on when a hook time budget is set",
+        "default": False,
+        "mandatory": False,
+        "type": "bool",
+        "section": "Retry"
+    },
+    {
+        "param_name": "intelowl_retry_max_attempts",
+        "param_human_name": "Maximum retry attempts",
+        "param_description": "Number of retries after which a failed enrichment is abandoned",
+        "default": 5,
+        "mandatory": False,
+        "type": "integer",
+        "section": "Retry"
+    },
+    {
+        "param_name": "intelowl_retry_base_delay",
+        "param_human_name": "Retry base delay (seconds)",
+        "param_description": "Delay before the first retry. It doubles after each failed attempt, up to one hour",
+        "default": 60,
+        "mandatory": False,
+        "type": "integer",
+        "section": "Retry"
+    },
+    {
+        "param_name": "intelowl_prefilter_enabled",
+        "param_human_name": "Pre-filter observables",
+        "param_description": "Set to True to skip the IntelOwl analysis of non-routable IPs and of observables "
+                             "matching the allow-lists below. Skipped IOCs get a short attribute instead of a report",
+        "default": False,
+        "mandatory": False,
+        "type": "bool",
+        "section": "Pre-filter"
+    },
+    {
+        "param_name": "intelowl_skip_non_routable",
+        "param_human_name": "Skip non-routable IPs",
+        "param_description": "Skip private, loopback, link-local, multicast and reserved IP addresses",
+        "default": True,
+        "mandatory": False,
+        "type": "bool",
+        "section": "Pre-filter"
+    },
+    {
+        "param_name": "intelowl_allowlist_cidr_file",
+        "param_human_name": "CIDR allow-list file",
+        "param_description": "Path of a file listing one IP network per line (e.g 10.0.0.0/8). Matching IPs, "
+                             "and URLs pointing to them, are skipped",
+        "default": "",
+        "mandatory": False,
+        "type": "string",
+        "section": "Pre-filter"
+    },
+    {
+        "param_name": "intelowl_allowlist_domain_file",
+        "param_human_name": "Domain allow-list file",
+        "param_description": "Path of a file listing one domain per line. Matching domains, their subdomains and "
+                             "URLs on them are skipped",
+        "default": "",
+        "mandatory": False,
+        "type": "string",
+        "section": "Pre-filter"
+    },
+    {
+        "param_name": "intelowl_allowlist_hash_file",
+        "param_human_name": "Hash allow-list file",
+        "param_description": "Path of a file listing one known-benign hash per line",
+        "default": "",
+        "mandatory": False,
+        "type": "string",
+        "section": "Pre-filter"
+    },
+    {
+        "param_name": "intelowl_replay_mode",
+        "param_human_name": "Record / replay mode",
+        "param_description": "'record' saves the IntelOwl submit and job responses to the recording file, "
+                             "'replay' serves the recording instead of contacting IntelOwl, for offline load "
+                             "testing and benchmarking. 'off' for normal operation",
+        "default": "off",
+        "mandatory": False,
+        "type": "string",
+        "section": "Diagnostics"
+    },
+    {
+        "param_name": "intelowl_replay_file",
+        "param_human_name": "Recording file",
+        "param_description": "Path of the recording. Defaults to intelowl_recording.jsonl.gz in the local state "
+                             "directory",
+        "default": "",
+        "mandatory": False,
+        "type": "string",
+        "section": "Diagnostics"
+    },
+    {
+        "param_name": "intelowl_replay_time_scale",
+        "param_human_name": "Replay time scale",
+        "param_description": "Multiplier applied to the recorded job durations when replaying, e.g 1 for the "
+                             "original timing, 0.1 for ten times faster, 0 for instant results",
+        "default": "1",
+        "mandatory": False,
+        "type": "string",
+        "section": "Diagnostics"
+    },
+    {
+        "param_name": "intelowl_profiling_mode",
+        "param_human_name": "Hook profiling",
+        "param_description": "Profiles every hook invocation: 'cprofile' writes a .pstats file, 'sampling' samples "
+                             "the stack every 5 ms and writes collapsed stacks for flame graphs, at a lower "
+                             "overhead. 'off' for normal operation",
+        "default": "off",
+        "mandatory": False,
+        "type": "string",
+        "section": "Diagnostics"
+    },
+    {
+        "param_name": "intelowl_profiling_tracemalloc",
+        "param_human_name": "Profile allocations",
+        "param_description": "Set to True to also write the top memory allocations of each profiled invocation, "
+                             "with tracemalloc",
+        "default": False,
+        "mandatory": False,
+        "type": "bool",
+        "section": "Diagnostics"
+    },
+    {
+        "param_name": "intelowl_profiling_dir",
+        "param_human_name": "Profiles directory",
+        "param_description": "Directory of the profiles. Defaults to profiles in the local state directory",
+        "default": "",
+        "mandatory": False,
+        "type": "string",
+        "section": "Diagnostics"
+    },
+    {
+        "param_name": "intelowl_profiling_max_files",
+        "param_human_name": "Maximum profile files",
+        "param_description": "Only the newest profile files are kept",
+        "default": 50,
+        "mandatory": False,
+        "type": "integer",
+        "section": "Diagnostics"
+    },
+    {
+        "param_name": "intelowl_profiling_max_file_size",
+        "param_human_name": "Maximum profile file size (MB)",
+        "param_description": "Text profiles are truncated, and cProfile dumps dropped, beyond this size",
+        "default": 10,
+        "mandatory": False,
+        "type": "integer",
+        "section": "Diagnostics"
+    },
+    {
+        "param_name": "intelowl_completion_listener_enabled",
+        "param_human_name": "Job completion listener",
+        "param_description": "Set to True to start an HTTP endpoint in the worker receiving IntelOwl job "
+                             "completions (POST /intelowl/completion with {\"job_id\": <id>}), e.g from an IntelOwl "
+                             "webhook connector. Waiting enrichments resume as soon as their job is reported, "
+                             "polling is kept as a slower fallback",
+        "default": False,
+        "mandatory": False,
+        "type": "bool",
+        "section": "Completion listener"
+    },
+    {
+        "param_name": "intelowl_completion_listener_host",
+        "param_human_name": "Listener address",
+        "param_description": "Address the completion listener binds to. Another address than the loopback "
+                             "requires a listener token",
+        "default": "127.0.0.1",
+        "mandatory": False,
+        "type": "string",
+        "section": "Completion listener"
+    },
+    {
+        "param_name": "intelowl_completion_listener_port",
+        "param_human_name": "Listener port",
+        "param_description": "Port the completion listener binds to",
+        "default": 8765,
+        "mandatory": False,
+        "type": "integer",
+        "section": "Completion listener"
+    },
+    {
+        "param_name": "intelowl_completion_listener_token",
+        "param_human_name": "Listener token",
+        "param_description": "Shared secret expected in the token query parameter or the X-IntelOwl-Token header",
+        "default": "",
+        "mandatory": False,
+        "type": "sensitive_string",
+        "section": "Completion listener"
+    },
+    {
+        "param_name": "intelowl_completion_fallback_interval",
+        "param_human_name": "Fallback polling interval (seconds)",
+        "param_description": "Polling interval used while waiting for a pushed completion",
+        "default": 30,
+        "mandatory": False,
+        "type": "integer",
+        "section": "Completion listener"
+    },
+    {
+        "param_name": "intelowl_negative_cache_ttl",
+        "param_human_name": "Negative cache duration (minutes)",
+        "param_description": "Observables rejected by IntelOwl, or for which no analyzer returned data while none "
+                             "failed, are not submitted again with the same playbook for this many minutes. 0 "
+                             "disables the negative cache",
+        "default": 0,
+        "mandatory": False,
+        "type": "integer",
+        "section": "Cache"
+    },
+    {
+        "param_name": "intelowl_analyzer_cache_ttl",
+        "param_human_name": "Analyzer cache duration (minutes)",
+        "param_description": "Successful analyzer reports are cached per observable and analyzer for this many "
+                             "minutes, whatever the playbook. When some analyzers of the playbook are cached, only "
+                             "the missing ones are requested, without the playbook connectors, and the cached reports "
+                             "are merged in. Failed analyzer reports are cached for 5 minutes at most. "
+                             "0 disables the analyzer cache",
+        "default": 0,
+        "mandatory": False,
+        "type": "integer",
+        "section": "Cache"
+    },
+    {
+        "param_name": "intelowl_file_lookup_enabled",
+        "param_human_name": "Hash-first file lookup",
+        "param_description": "Set to True to enrich file IOCs (filename, filename|md5, filename|sha1, filename|sha256, "
+                             "file, attachment, malware-sample) by their hash: previous analyses of the sample "
+                             "first, then the hash analyzers of the playbook. When False, or for other hash types "
+                             "such as imphash, file IOCs go through the generic playbook on their value",
+        "default": True,
+        "mandatory": False,
+        "type": "bool",
+        "section": "Files"
+    },
+    {
+        "param_name": "intelowl_file_playbook_name",
+        "param_human_name": "File playbook name",
+        "param_description": "Playbook whose previous sample analyses are looked up, and to which samples are "
+                             "uploaded. Defaults to the IntelOwl Playbook name",
+        "default": "",
+        "mandatory": False,
+        "type": "string",
+        "section": "Files"
+    },
+    {
+        "param_name": "intelowl_sample_dir",
+        "param_human_name": "Sample directory",
+        "param_description": "Local directory where samples are stored, named after their hash or filename. A "
+                             "sample found there gets hashed when the IOC has no hash",
+        "default": "",
+        "mandatory": False,
+        "type": "string",
+        "section": "Files"
+    },
+    {
+        "param_name": "intelowl_sample_upload_enabled",
+        "param_human_name": "Upload unknown samples",
+        "param_description": "Set to True to upload the sample, streamed from the sample directory, when the hash "
+                             "lookups find nothing. This runs the full file playbook, sandboxes included",
+        "default": False,
+        "mandatory": False,
+        "type": "bool",
+        "section": "Files"
+    },
+    {
+        "param_name": "intelowl_instances",
+        "param_human_name": "Additional IntelOwl instances",
+        "param_description": "Additional IntelOwl instances sharing the load, one per line: <URL> <API key> "
+                             "[weight]. The instance configured above is the first one, with a weight of 1. "
+                             "An instance of weight 0 gets no new job, e.g to drain it before maintenance",
+        "default": "",
+        "mandatory": False,
+        "type": "textfield_plain",
+        "section": "Instances"
+    },
+    {
+        "param_name": "intelowl_routing",
+        "param_human_name": "Job routing",
+        "param_description": "How new jobs are spread over the instances: least_outstanding sends each job to the "
+                             "instance with the fewest running jobs per unit of weight, weighted picks an "
+                             "instance at random in proportion to the weights",
+        "default": "least_outstanding",
+        "mandatory": False,
+        "type": "string",
+        "section": "Instances"
+    },
+    {
+        "param_name": "intelowl_health_check_interval",
+        "param_human_name": "Health check interval (seconds)",
+        "param_description": "Instances are checked this often. An instance failing the check, or a submission, "
+                             "is drained: it gets no new job until it passes a check again",
+        "default": 30,
+        "mandatory": False,
+        "type": "integer",
+        "section": "Instances"
+    },
+    {
+        "param_name": "intelowl_prefetch_enabled",
+        "param_human_name": "Prefetch derived observables",
+        "param_description": "Set to True to enrich, in the background, the observables derived from the enriched "
+                             "IOCs: the host of a URL and the IPs reported by DNS analyzers. Their jobs are cached, "
+                             "so when they are added as IOCs they get a report at once",
+        "default": False,
+        "mandatory": False,
+        "type": "bool",
+        "section": "Prefetch"
+    },
+    {
+        "param_name": "intelowl_prefetch_max_per_hook",
+        "param_human_name": "Prefetched observables per hook",
+        "param_description": "Maximum number of derived observables prefetched per hook invocation",
+        "default": 20,
+        "mandatory": False,
+        "type": "integer",
+        "section": "Prefetch"
+    },
+    {
+        "param_name": "intelowl_prefetch_ttl",
+        "param_human_name": "Prefetch cache duration (minutes)",
+        "param_description": "Prefetched jobs are used for this many minutes",
+        "default": 60,
+        "mandatory": False,
+        "type": "integer",
+        "section": "Prefetch"
+    },
+    {
+        "param_name": "intelowl_refresh_enabled",
+        "param_human_name": "Refresh hot observables ahead",
+        "param_description": "Set to True to keep a fresh job cached for the observables enriched often. Each "
+                             "enrichment counts as a hit, halved every day. Once an observable reaches the hits "
+                             "threshold, its job is cached and re-enriched in the background shortly before it "
+                             "expires, so hooks on it get a report at once",
+        "default": False,
+        "mandatory": False,
+        "type": "bool",
+        "section": "Refresh-ahead"
+    },
+    {
+        "param_name": "intelowl_refresh_min_hits",
+        "param_human_name": "Hits threshold",
+        "param_description": "Decayed number of enrichments from which an observable is kept fresh",
+        "default": 3,
+        "mandatory": False,
+        "type": "integer",
+        "section": "Refresh-ahead"
+    },
+    {
+        "param_name": "intelowl_refresh_ttl",
+        "param_human_name": "Hot job cache duration (minutes)",
+        "param_description": "Cached jobs of hot observables are used for this many minutes",
+        "default": 240,
+        "mandatory": False,
+        "type": "integer",
+        "section": "Refresh-ahead"
+    },
+    {
+        "param_name": "intelowl_refresh_lead",
+        "param_human_name": "Refresh lead time (minutes)",
+        "param_description": "Hot observables are re-enriched when their cached job expires within this many "
+                             "minutes. Keep it above the usual playbook duration",
+        "default": 10,
+        "mandatory": False,
+        "type": "integer",
+        "section": "Refresh-ahead"
+    },
+    {
+        "param_name": "intelowl_refresh_max_jobs_per_hour",
+        "param_human_name": "Refresh budget (jobs per hour)",
+        "param_description": "Maximum number of IntelOwl jobs the refresh-ahead submits per hour, across the "
+                             "worker processes. The hottest observables are refreshed first",
+        "default": 60,
+        "mandatory": False,
+        "type": "integer",
+        "section": "Refresh-ahead"
+    },
     {
         "param_name": "intelowl_domain_report_template",
         "param_human_name": "Domain report template",
-        "param_description": "Domain report template used to add a new custom attribute to the target IOC",
-        "default": "<div class=\"row\">\n    <div class=\"col-12\">\n        <div class=\"accordion\">\n            "
-                   "<h3>General information</h3>\n                <div class=\"row\">\n                    <div "
-                   "class=\"col-12\">\n                        <dl class=\"row\">\n                            {% if "
-                   "external_link %}\n                            <dt class=\"col-sm-3\">Report</dt>\n                "
-                   "            <dd class=\"col-sm-9\">\n                                {% autoescape false %}\n     "
-                   "                           <a href=\"{{ external_link }}\" target=\"_blank\">IntelOwl Report "
-                   "Link</a>\n                                {% endautoescape %}\n                            "
-                   "</dd>\n                            {% endif %}\n                            {% if "
-                   "nb_analyzer_reports %}\n                            <dt class=\"col-sm-3\">Total Analyzer "
-                   "Reports</dt>\n                            <dd class=\"col-sm-9\">{{ nb_analyzer_reports }}</dd>\n "
-                   "                           {% endif %}\n                            {% if nb_connector_reports "
-                   "%}\n                            <dt class=\"col-sm-3\">Total Connector Reports</dt>\n             "
-                   "               <dd class=\"col-sm-9\">{{ nb_connector_reports }}</dd>\n                           "
-                   " {% endif %}\n                        </dl>\n                    </div>\n                </div>\n "
-                   "       </div>\n    </div>\n</div>\n\n<div class=\"row\">\n    <div class=\"col-12\">\n        "
-                   "<div class=\"accordion\">\n            <h3>Additional information</h3>\n\n            {% if "
-                   "results.analyzer_reports %}\n            <div class=\"card\">\n                <div "
-                   "class=\"card-header collapsed\" id=\"drop_an\" data-toggle=\"collapse\" "
-                   "data-target=\"#drop_anrep\" aria-expanded=\"false\" aria-controls=\"drop_anrep\" "
-                   "role=\"button\">\n                    <div class=\"span-icon\">\n                        <div "
-                   "class=\"flaticon-file\"></div>\n                    </div>\n                    <div "
-                   "class=\"span-title\">\n                        Analyzer results\n                    </div>\n     "
-                   "               <div class=\"span-mode\"></div>\n                </div>\n                <div "
-                   "id=\"drop_anrep\" class=\"collapse\" aria-labelledby=\"drop_an\" style=\"\">\n                    "
-                   "<div class=\"card-body\">\n                        <table class=\"table display table-bordered "
-                   "table-striped table-hover\" width=\"100%\" cellspacing=\"0\" id=\"il_in_anrep\" >\n               "
-                   "                 <thead>\n                                  <tr>\n                                "
-                   "      <th>Name</th>\n                                      <th>Status</th>\n                      "
-                   "                <th>ProcessTime</th>\n                                      <th>StartTime</th>\n  "
-                   "                                    <th>Report</th>\n                                  </tr>\n    "
-                   "                            </thead>\n                                <tbody>\n                   "
-                   "             {% for analyzer_report in results.analyzer_reports %} \n                             "
-                   "       <tr role=\"row\">\n                                        <td>{{ analyzer_report.name "
-                   "}}</td>\n                                        <td>{{ analyzer_report.status }}</td>\n          "
-                   "                              <td>{{ analyzer_report.process_time }}</td>\n                       "
-                   "                 <td>{{ analyzer_report.start_time }}</td>\n                                      "
-                   "  <td>\n                                            <div class=\"card\">\n                        "
-                   "                        <div class=\"card-header collapsed\" id=\"drop_r_intelowl_{{ "
-                   "analyzer_report.name }}\" data-toggle=\"collapse\" data-target=\"#drop_raw_intelowl_{{ "
-                   "analyzer_report.name }}\" aria-expanded=\"false\" aria-controls=\"drop_raw_intelowl_{{ "
-                   "analyzer_report.name }}\" role=\"button\">\n                                                    "
-                   "<div class=\"span-title\">\n                                                        {{ "
-                   "analyzer_report.name }} raw report\n                                                    </div>\n  "
-                   "                                                  <div class=\"span-mode\"></div>\n               "
-                   "                                 </div>\n                                                <div "
-                   "id=\"drop_raw_intelowl_{{ analyzer_report.name }}\" class=\"collapse\" "
-                   "aria-labelledby=\"drop_r_intelowl_{{ analyzer_report.name }}\" style=\"\">\n                      "
-                   "                              <div class=\"card-body\">\n                                         "
-                   "               <div id='intelowl__{{ analyzer_report.name }}_raw_ace'>{{ "
-                   "analyzer_report.report|tojson(indent=4) }}</div>\n                                                "
-                   "    </div>\n                                                </div>\n                              "
-                   "              </div>\n                                        </td>\n                             "
-                   "       </tr>\n                                {% endfor %}\n                                "
-                   "</tbody>\n                        </table>\n                    </div>\n                </div>\n  "
-                   "          </div>\n            {% endif %}\n\n            {% if results.connector_reports %}\n     "
-                   "       <div class=\"card\">\n                <div class=\"card-header collapsed\" id=\"drop_co\" "
-                   "data-toggle=\"collapse\" data-target=\"#drop_corep\" aria-expanded=\"false\" "
-                   "aria-controls=\"drop_corep\" role=\"button\">\n                    <div class=\"span-icon\">\n    "
-                   "                    <div class=\"flaticon-file\"></div>\n                    </div>\n             "
-                   "       <div class=\"span-title\">\n                        Connector results\n                    "
-                   "</div>\n                    <div class=\"span-mode\"></div>\n                </div>\n             "
-                   "   <div id=\"drop_corep\" class=\"collapse\" aria-labelledby=\"drop_co\" style=\"\">\n            "
-                   "        <div class=\"card-body\">\n                        <table class=\"table display "
-                   "table-bordered table-striped table-hover\" width=\"100%\" cellspacing=\"0\" id=\"il_in_corep\" "
-                   ">\n                                <thead>\n                                  <tr>\n              "
-                   "                        <th>Name</th>\n                                      <th>Status</th>\n    "
-                   "                                  <th>ProcessTime</th>\n                                      "
-                   "<th>StartTime</th>\n                                      <th>Report</th>\n                       "
-                   "           </tr>\n                                </thead>\n                                "
-                   "<tbody>\n                                {% for connector_report in results.connector_reports %} "
-                   "\n                                    <tr role=\"row\">\n                                        "
-                   "<td>{{ connector_report.name }}</td>\n                                        <td>{{ "
-                   "connector_report.status }}</td>\n                                        <td>{{ "
-                   "connector_report.process_time }}</td>\n                                        <td>{{ "
-                   "connector_report.start_time }}</td>\n                                        <td>\n               "
-                   "                             <div class=\"card\">\n                                               "
-                   " <div class=\"card-header collapsed\" id=\"drop_r_intelowl_{{ connector_report.name }}\" "
-                   "data-toggle=\"collapse\" data-target=\"#drop_raw_intelowl_{{ connector_report.name }}\" "
-                   "aria-expanded=\"false\" aria-controls=\"drop_raw_intelowl_{{ connector_report.name }}\" "
-                   "role=\"button\">\n                                                    <div "
-                   "class=\"span-title\">\n                                                        {{ "
-                   "connector_report.name }} raw report\n                                                    </div>\n "
-                   "                                                   <div class=\"span-mode\"></div>\n              "
-                   "                                  </div>\n                                                <div "
-                   "id=\"drop_raw_intelowl_{{ connector_report.name }}\" class=\"collapse\" "
-                   "aria-labelledby=\"drop_r_intelowl_{{ connector_report.name }}\" style=\"\">\n                     "
-                   "                               <div class=\"card-body\">\n                                        "
-                   "                <div id='intelowl__{{ connector_report.name }}_raw_ace'>{{ "
-                   "connector_report.report|tojson(indent=4) }}</div>\n                                               "
-                   "     </div>\n                                                </div>\n                             "
-                   "               </div>\n                                        </td>\n                            "
-                   "        </tr>\n                                {% endfor %}\n                                "
-                   "</tbody>\n                        </table>\n                    </div>\n                </div>\n  "
-                   "          </div>\n            {% endif %}\n\n        </div>\n    </div>\n</div>\n\n<div "
-                   "class=\"row\">\n    <div class=\"col-12\">\n        <div class=\"accordion\">\n            "
-                   "<h3>IntelOwl raw results</h3>\n\n            <div class=\"card\">\n                <div "
-                   "class=\"card-header collapsed\" id=\"drop_r_intelowl\" data-toggle=\"collapse\" "
-                   "data-target=\"#drop_raw_intelowl\" aria-expanded=\"false\" aria-controls=\"drop_raw_intelowl\" "
-                   "role=\"button\">\n                    <div class=\"span-icon\">\n                        <div "
-                   "class=\"flaticon-file\"></div>\n                    </div>\n                    <div "
-                   "class=\"span-title\">\n                        IntelOwl raw results\n                    </div>\n "
-                   "                   <div class=\"span-mode\"></div>\n                </div>\n                <div "
-                   "id=\"drop_raw_intelowl\" class=\"collapse\" aria-labelledby=\"drop_r_intelowl\" style=\"\">\n     "
-                   "               <div class=\"card-body\">\n                        <div id='intelowl_raw_ace'>{{ "
-                   "results|default(\"\")|tojson(indent=4) }}</div>\n                    </div>\n                "
-                   "</div>\n            </div>\n        </div>\n    </div>\n</div> \n<script>\nvar intelowl_in_raw = "
-                   "ace.edit(\"intelowl_raw_ace\",\n{\n    autoScrollEditorIntoView: true,\n    minLines: 30,"
-                   "\n});\nintelowl_in_raw.setReadOnly(true);\nintelowl_in_raw.setTheme("
-                   "\"ace/theme/tomorrow\");\nintelowl_in_raw.session.setMode("
-                   "\"ace/mode/json\");\nintelowl_in_raw.renderer.setShowGutter(true);\nintelowl_in_raw.setOption("
-                   "\"showLineNumbers\", true);\nintelowl_in_raw.setOption(\"showPrintMargin\", "
-                   "false);\nintelowl_in_raw.setOption(\"displayIndentGuides\", true);\nintelowl_in_raw.setOption("
-                   "\"maxLines\", \"Infinity\");\nintelowl_in_raw.session.setUseWrapMode("
-                   "true);\nintelowl_in_raw.setOption(\"indentedSoftWrap\", "
-                   "true);\nintelowl_in_raw.renderer.setScrollMargin(8, 5);\n{% if results.analyzer_reports %}\n$("
-                   "\"#il_in_anrep\").DataTable({\n    filter: true,\n    info: true,\n    ordering: true,"
-                   "\n    processing: true,\n});\n{% endif %}\n{% if results.connector_reports %}\n$("
-                   "\"#il_in_corep\").DataTable({\n    filter: true,\n    info: true,\n    ordering: true,"
-                   "\n    processing: true,\n});\n{% endif %}\n</script> ",
+        "param_description": "Domain report template used to add a new custom attribute to the target IOC. "
+                             "Leave empty to use the default template packaged with the module",
+        "default": "",
         "mandatory": False,
         "type": "textfield_html",
         "section": "Templates"
@@ -226,126 +610,9 @@ module_configuration = [
     {
         "param_name": "intelowl_ip_report_template",
         "param_human_name": "IP report template",
-        "param_description": "IP report template used to add a new custom attribute to the target IOC",
-        "default": "<div class=\"row\">\n    <div class=\"col-12\">\n        <div class=\"accordion\">\n            "
-                   "<h3>General information</h3>\n                <div class=\"row\">\n                    <div "
-                   "class=\"col-12\">\n                        <dl class=\"row\">\n                            {% if "
-                   "external_link %}\n                            <dt class=\"col-sm-3\">Report</dt>\n                "
-                   "            <dd class=\"col-sm-9\">\n                                {% autoescape false %}\n     "
-                   "                           <a href=\"{{ external_link }}\" target=\"_blank\">IntelOwl Report "
-                   "Link</a>\n                                {% endautoescape %}\n                            "
-                   "</dd>\n                            {% endif %}\n                            {% if "
-                   "nb_analyzer_reports %}\n                            <dt class=\"col-sm-3\">Total Analyzer "
-                   "Reports</dt>\n                            <dd class=\"col-sm-9\">{{ nb_analyzer_reports }}</dd>\n "
-                   "                           {% endif %}\n                            {% if nb_connector_reports "
-                   "%}\n                            <dt class=\"col-sm-3\">Total Connector Reports</dt>\n             "
-                   "               <dd class=\"col-sm-9\">{{ nb_connector_reports }}</dd>\n                           "
-                   " {% endif %}\n                        </dl>\n                    </div>\n                </div>\n "
-                   "       </div>\n    </div>\n</div>\n\n<div class=\"row\">\n    <div class=\"col-12\">\n        "
-                   "<div class=\"accordion\">\n            <h3>Additional information</h3>\n\n            {% if "
-                   "results.analyzer_reports %}\n            <div class=\"card\">\n                <div "
-                   "class=\"card-header collapsed\" id=\"drop_an\" data-toggle=\"collapse\" "
-                   "data-target=\"#drop_anrep\" aria-expanded=\"false\" aria-controls=\"drop_anrep\" "
-                   "role=\"button\">\n                    <div class=\"span-icon\">\n                        <div "
-                   "class=\"flaticon-file\"></div>\n                    </div>\n                    <div "
-                   "class=\"span-title\">\n                        Analyzer results\n                    </div>\n     "
-                   "               <div class=\"span-mode\"></div>\n                </div>\n                <div "
-                   "id=\"drop_anrep\" class=\"collapse\" aria-labelledby=\"drop_an\" style=\"\">\n                    "
-                   "<div class=\"card-body\">\n                        <table class=\"table display table-bordered "
-                   "table-striped table-hover\" width=\"100%\" cellspacing=\"0\" id=\"il_in_anrep\" >\n               "
-                   "                 <thead>\n                                  <tr>\n                                "
-                   "      <th>Name</th>\n                                      <th>Status</th>\n                      "
-                   "                <th>ProcessTime</th>\n                                      <th>StartTime</th>\n  "
-                   "                                    <th>Report</th>\n                                  </tr>\n    "
-                   "                            </thead>\n                                <tbody>\n                   "
-                   "             {% for analyzer_report in results.analyzer_reports %} \n                             "
-                   "       <tr role=\"row\">\n                                        <td>{{ analyzer_report.name "
-                   "}}</td>\n                                        <td>{{ analyzer_report.status }}</td>\n          "
-                   "                              <td>{{ analyzer_report.process_time }}</td>\n                       "
-                   "                 <td>{{ analyzer_report.start_time }}</td>\n                                      "
-                   "  <td>\n                                            <div class=\"card\">\n                        "
-                   "                        <div class=\"card-header collapsed\" id=\"drop_r_intelowl_{{ "
-                   "analyzer_report.name }}\" data-toggle=\"collapse\" data-target=\"#drop_raw_intelowl_{{ "
-                   "analyzer_report.name }}\" aria-expanded=\"false\" aria-controls=\"drop_raw_intelowl_{{ "
-                   "analyzer_report.name }}\" role=\"button\">\n                                                    "
-                   "<div class=\"span-title\">\n                                                        {{ "
-                   "analyzer_report.name }} raw report\n                                                    </div>\n  "
-                   "                                                  <div class=\"span-mode\"></div>\n               "
-                   "                                 </div>\n                                                <div "
-                   "id=\"drop_raw_intelowl_{{ analyzer_report.name }}\" class=\"collapse\" "
-                   "aria-labelledby=\"drop_r_intelowl_{{ analyzer_report.name }}\" style=\"\">\n                      "
-                   "                              <div class=\"card-body\">\n                                         "
-                   "               <div id='intelowl__{{ analyzer_report.name }}_raw_ace'>{{ "
-                   "analyzer_report.report|tojson(indent=4) }}</div>\n                                                "
-                   "    </div>\n                                                </div>\n                              "
-                   "              </div>\n                                        </td>\n                             "
-                   "       </tr>\n                                {% endfor %}\n                                "
-                   "</tbody>\n                        </table>\n                    </div>\n                </div>\n  "
-                   "          </div>\n            {% endif %}\n\n            {% if results.connector_reports %}\n     "
-                   "       <div class=\"card\">\n                <div class=\"card-header collapsed\" id=\"drop_co\" "
-                   "data-toggle=\"collapse\" data-target=\"#drop_corep\" aria-expanded=\"false\" "
-                   "aria-controls=\"drop_corep\" role=\"button\">\n                    <div class=\"span-icon\">\n    "
-                   "                    <div class=\"flaticon-file\"></div>\n                    </div>\n             "
-                   "       <div class=\"span-title\">\n                        Connector results\n                    "
-                   "</div>\n                    <div class=\"span-mode\"></div>\n                </div>\n             "
-                   "   <div id=\"drop_corep\" class=\"collapse\" aria-labelledby=\"drop_co\" style=\"\">\n            "
-                   "        <div class=\"card-body\">\n                        <table class=\"table display "
-                   "table-bordered table-striped table-hover\" width=\"100%\" cellspacing=\"0\" id=\"il_in_corep\" "
-                   ">\n                                <thead>\n                                  <tr>\n              "
-                   "                        <th>Name</th>\n                                      <th>Status</th>\n    "
-                   "                                  <th>ProcessTime</th>\n                                      "
-                   "<th>StartTime</th>\n                                      <th>Report</th>\n                       "
-                   "           </tr>\n                                </thead>\n                                "
-                   "<tbody>\n                                {% for connector_report in results.connector_reports %} "
-                   "\n                                    <tr role=\"row\">\n                                        "
-                   "<td>{{ connector_report.name }}</td>\n                                        <td>{{ "
-                   "connector_report.status }}</td>\n                                        <td>{{ "
-                   "connector_report.process_time }}</td>\n                                        <td>{{ "
-                   "connector_report.start_time }}</td>\n                                        <td>\n               "
-                   "                             <div class=\"card\">\n                                               "
-                   " <div class=\"card-header collapsed\" id=\"drop_r_intelowl_{{ connector_report.name }}\" "
-                   "data-toggle=\"collapse\" data-target=\"#drop_raw_intelowl_{{ connector_report.name }}\" "
-                   "aria-expanded=\"false\" aria-controls=\"drop_raw_intelowl_{{ connector_report.name }}\" "
-                   "role=\"button\">\n                                                    <div "
-                   "class=\"span-title\">\n                                                        {{ "
-                   "connector_report.name }} raw report\n                                                    </div>\n "
-                   "                                                   <div class=\"span-mode\"></div>\n              "
-                   "                                  </div>\n                                                <div "
-                   "id=\"drop_raw_intelowl_{{ connector_report.name }}\" class=\"collapse\" "
-                   "aria-labelledby=\"drop_r_intelowl_{{ connector_report.name }}\" style=\"\">\n                     "
-                   "                               <div class=\"card-body\">\n                                        "
-                   "                <div id='intelowl__{{ connector_report.name }}_raw_ace'>{{ "
-                   "connector_report.report|tojson(indent=4) }}</div>\n                                               "
-                   "     </div>\n                                                </div>\n                             "
-                   "               </div>\n                                        </td>\n                            "
-                   "        </tr>\n                                {% endfor %}\n                                "
-                   "</tbody>\n                        </table>\n                    </div>\n                </div>\n  "
-                   "          </div>\n            {% endif %}\n\n        </div>\n    </div>\n</div>\n\n<div "
-                   "class=\"row\">\n    <div class=\"col-12\">\n        <div class=\"accordion\">\n            "
-                   "<h3>IntelOwl raw results</h3>\n\n            <div class=\"card\">\n                <div "
-                   "class=\"card-header collapsed\" id=\"drop_r_intelowl\" data-toggle=\"collapse\" "
-                   "data-target=\"#drop_raw_intelowl\" aria-expanded=\"false\" aria-controls=\"drop_raw_intelowl\" "
-                   "role=\"button\">\n                    <div class=\"span-icon\">\n                        <div "
-                   "class=\"flaticon-file\"></div>\n                    </div>\n                    <div "
-                   "class=\"span-title\">\n                        IntelOwl raw results\n                    </div>\n "
-                   "                   <div class=\"span-mode\"></div>\n                </div>\n                <div "
-                   "id=\"drop_raw_intelowl\" class=\"collapse\" aria-labelledby=\"drop_r_intelowl\" style=\"\">\n     "
-                   "               <div class=\"card-body\">\n                        <div id='intelowl_raw_ace'>{{ "
-                   "results|default(\"\")|tojson(indent=4) }}</div>\n                    </div>\n                "
-                   "</div>\n            </div>\n        </div>\n    </div>\n</div> \n<script>\nvar intelowl_in_raw = "
-                   "ace.edit(\"intelowl_raw_ace\",\n{\n    autoScrollEditorIntoView: true,\n    minLines: 30,"
-                   "\n});\nintelowl_in_raw.setReadOnly(true);\nintelowl_in_raw.setTheme("
-                   "\"ace/theme/tomorrow\");\nintelowl_in_raw.session.setMode("
-                   "\"ace/mode/json\");\nintelowl_in_raw.renderer.setShowGutter(true);\nintelowl_in_raw.setOption("
-                   "\"showLineNumbers\", true);\nintelowl_in_raw.setOption(\"showPrintMargin\", "
-                   "false);\nintelowl_in_raw.setOption(\"displayIndentGuides\", true);\nintelowl_in_raw.setOption("
-                   "\"maxLines\", \"Infinity\");\nintelowl_in_raw.session.setUseWrapMode("
-                   "true);\nintelowl_in_raw.setOption(\"indentedSoftWrap\", "
-                   "true);\nintelowl_in_raw.renderer.setScrollMargin(8, 5);\n{% if results.analyzer_reports %}\n$("
-                   "\"#il_in_anrep\").DataTable({\n    filter: true,\n    info: true,\n    ordering: true,"
-                   "\n    processing: true,\n});\n{% endif %}\n{% if results.connector_reports %}\n$("
-                   "\"#il_in_corep\").DataTable({\n    filter: true,\n    info: true,\n    ordering: true,"
-                   "\n    processing: true,\n});\n{% endif %}\n</script> ",
+        "param_description": "IP report template used to add a new custom attribute to the target IOC. "
+                             "Leave empty to use the default template packaged with the module",
+        "default": "",
         "mandatory": False,
         "type": "textfield_html",
         "section": "Templates"
@@ -353,126 +620,9 @@ module_configuration = [
     {
         "param_name": "intelowl_url_report_template",
         "param_human_name": "URL report template",
-        "param_description": "URL report template used to add a new custom attribute to the target IOC",
-        "default": "<div class=\"row\">\n    <div class=\"col-12\">\n        <div class=\"accordion\">\n            "
-                   "<h3>General information</h3>\n                <div class=\"row\">\n                    <div "
-                   "class=\"col-12\">\n                        <dl class=\"row\">\n                            {% if "
-                   "external_link %}\n                            <dt class=\"col-sm-3\">Report</dt>\n                "
-                   "            <dd class=\"col-sm-9\">\n                                {% autoescape false %}\n     "
-                   "                           <a href=\"{{ external_link }}\" target=\"_blank\">IntelOwl Report "
-                   "Link</a>\n                                {% endautoescape %}\n                            "
-                   "</dd>\n                            {% endif %}\n                            {% if "
-                   "nb_analyzer_reports %}\n                            <dt class=\"col-sm-3\">Total Analyzer "
-                   "Reports</dt>\n                            <dd class=\"col-sm-9\">{{ nb_analyzer_reports }}</dd>\n "
-                   "                           {% endif %}\n                            {% if nb_connector_reports "
-                   "%}\n                            <dt class=\"col-sm-3\">Total Connector Reports</dt>\n             "
-                   "               <dd class=\"col-sm-9\">{{ nb_connector_reports }}</dd>\n                           "
-                   " {% endif %}\n                        </dl>\n                    </div>\n                </div>\n "
-                   "       </div>\n    </div>\n</div>\n\n<div class=\"row\">\n    <div class=\"col-12\">\n        "
-                   "<div class=\"accordion\">\n            <h3>Additional information</h3>\n\n            {% if "
-                   "results.analyzer_reports %}\n            <div class=\"card\">\n                <div "
-                   "class=\"card-header collapsed\" id=\"drop_an\" data-toggle=\"collapse\" "
-                   "data-target=\"#drop_anrep\" aria-expanded=\"false\" aria-controls=\"drop_anrep\" "
-                   "role=\"button\">\n                    <div class=\"span-icon\">\n                        <div "
-                   "class=\"flaticon-file\"></div>\n                    </div>\n                    <div "
-                   "class=\"span-title\">\n                        Analyzer results\n                    </div>\n     "
-                   "               <div class=\"span-mode\"></div>\n                </div>\n                <div "
-                   "id=\"drop_anrep\" class=\"collapse\" aria-labelledby=\"drop_an\" style=\"\">\n                    "
-                   "<div class=\"card-body\">\n                        <table class=\"table display table-bordered "
-                   "table-striped table-hover\" width=\"100%\" cellspacing=\"0\" id=\"il_in_anrep\" >\n               "
-                   "                 <thead>\n                                  <tr>\n                                "
-                   "      <th>Name</th>\n                                      <th>Status</th>\n                      "
-                   "                <th>ProcessTime</th>\n                                      <th>StartTime</th>\n  "
-                   "                                    <th>Report</th>\n                                  </tr>\n    "
-                   "                            </thead>\n                                <tbody>\n                   "
-                   "             {% for analyzer_report in results.analyzer_reports %} \n                             "
-                   "       <tr role=\"row\">\n                                        <td>{{ analyzer_report.name "
-                   "}}</td>\n                                        <td>{{ analyzer_report.status }}</td>\n          "
-                   "                              <td>{{ analyzer_report.process_time }}</td>\n                       "
-                   "                 <td>{{ analyzer_report.start_time }}</td>\n                                      "
-                   "  <td>\n                                            <div class=\"card\">\n                        "
-                   "                        <div class=\"card-header collapsed\" id=\"drop_r_intelowl_{{ "
-                   "analyzer_report.name }}\" data-toggle=\"collapse\" data-target=\"#drop_raw_intelowl_{{ "
-                   "analyzer_report.name }}\" aria-expanded=\"false\" aria-controls=\"drop_raw_intelowl_{{ "
-                   "analyzer_report.name }}\" role=\"button\">\n                                                    "
-                   "<div class=\"span-title\">\n                                                        {{ "
-                   "analyzer_report.name }} raw report\n                                                    </div>\n  "
-                   "                                                  <div class=\"span-mode\"></div>\n               "
-                   "                                 </div>\n                                                <div "
-                   "id=\"drop_raw_intelowl_{{ analyzer_report.name }}\" class=\"collapse\" "
-                   "aria-labelledby=\"drop_r_intelowl_{{ analyzer_report.name }}\" style=\"\">\n                      "
-                   "                              <div class=\"card-body\">\n                                         "
-                   "               <div id='intelowl__{{ analyzer_report.name }}_raw_ace'>{{ "
-                   "analyzer_report.report|tojson(indent=4) }}</div>\n                                                "
-                   "    </div>\n                                                </div>\n                              "
-                   "              </div>\n                                        </td>\n                             "
-                   "       </tr>\n                                {% endfor %}\n                                "
-                   "</tbody>\n                        </table>\n                    </div>\n                </div>\n  "
-                   "          </div>\n            {% endif %}\n\n            {% if results.connector_reports %}\n     "
-                   "       <div class=\"card\">\n                <div class=\"card-header collapsed\" id=\"drop_co\" "
-                   "data-toggle=\"collapse\" data-target=\"#drop_corep\" aria-expanded=\"false\" "
-                   "aria-controls=\"drop_corep\" role=\"button\">\n                    <div class=\"span-icon\">\n    "
-                   "                    <div class=\"flaticon-file\"></div>\n                    </div>\n             "
-                   "       <div class=\"span-title\">\n                        Connector results\n                    "
-                   "</div>\n                    <div class=\"span-mode\"></div>\n                </div>\n             "
-                   "   <div id=\"drop_corep\" class=\"collapse\" aria-labelledby=\"drop_co\" style=\"\">\n            "
-                   "        <div class=\"card-body\">\n                        <table class=\"table display "
-                   "table-bordered table-striped table-hover\" width=\"100%\" cellspacing=\"0\" id=\"il_in_corep\" "
-                   ">\n                                <thead>\n                                  <tr>\n              "
-                   "                        <th>Name</th>\n                                      <th>Status</th>\n    "
-                   "                                  <th>ProcessTime</th>\n                                      "
-                   "<th>StartTime</th>\n                                      <th>Report</th>\n                       "
-                   "           </tr>\n                                </thead>\n                                "
-                   "<tbody>\n                                {% for connector_report in results.connector_reports %} "
-                   "\n                                    <tr role=\"row\">\n                                        "
-                   "<td>{{ connector_report.name }}</td>\n                                        <td>{{ "
-                   "connector_report.status }}</td>\n                                        <td>{{ "
-                   "connector_report.process_time }}</td>\n                                        <td>{{ "
-                   "connector_report.start_time }}</td>\n                                        <td>\n               "
-                   "                             <div class=\"card\">\n                                               "
-                   " <div class=\"card-header collapsed\" id=\"drop_r_intelowl_{{ connector_report.name }}\" "
-                   "data-toggle=\"collapse\" data-target=\"#drop_raw_intelowl_{{ connector_report.name }}\" "
-                   "aria-expanded=\"false\" aria-controls=\"drop_raw_intelowl_{{ connector_report.name }}\" "
-                   "role=\"button\">\n                                                    <div "
-                   "class=\"span-title\">\n                                                        {{ "
-                   "connector_report.name }} raw report\n                                                    </div>\n "
-                   "                                                   <div class=\"span-mode\"></div>\n              "
-                   "                                  </div>\n                                                <div "
-                   "id=\"drop_raw_intelowl_{{ connector_report.name }}\" class=\"collapse\" "
-                   "aria-labelledby=\"drop_r_intelowl_{{ connector_report.name }}\" style=\"\">\n                     "
-                   "                               <div class=\"card-body\">\n                                        "
-                   "                <div id='intelowl__{{ connector_report.name }}_raw_ace'>{{ "
-                   "connector_report.report|tojson(indent=4) }}</div>\n                                               "
-                   "     </div>\n                                                </div>\n                             "
-                   "               </div>\n                                        </td>\n                            "
-                   "        </tr>\n                                {% endfor %}\n                                "
-                   "</tbody>\n                        </table>\n                    </div>\n                </div>\n  "
-                   "          </div>\n            {% endif %}\n\n        </div>\n    </div>\n</div>\n\n<div "
-                   "class=\"row\">\n    <div class=\"col-12\">\n        <div class=\"accordion\">\n            "
-                   "<h3>IntelOwl raw results</h3>\n\n            <div class=\"card\">\n                <div "
-                   "class=\"card-header collapsed\" id=\"drop_r_intelowl\" data-toggle=\"collapse\" "
-                   "data-target=\"#drop_raw_intelowl\" aria-expanded=\"false\" aria-controls=\"drop_raw_intelowl\" "
-                   "role=\"button\">\n                    <div class=\"span-icon\">\n                        <div "
-                   "class=\"flaticon-file\"></div>\n                    </div>\n                    <div "
-                   "class=\"span-title\">\n                        IntelOwl raw results\n                    </div>\n "
-                   "                   <div class=\"span-mode\"></div>\n                </div>\n                <div "
-                   "id=\"drop_raw_intelowl\" class=\"collapse\" aria-labelledby=\"drop_r_intelowl\" style=\"\">\n     "
-                   "               <div class=\"card-body\">\n                        <div id='intelowl_raw_ace'>{{ "
-                   "results|default(\"\")|tojson(indent=4) }}</div>\n                    </div>\n                "
-                   "</div>\n            </div>\n        </div>\n    </div>\n</div> \n<script>\nvar intelowl_in_raw = "
-                   "ace.edit(\"intelowl_raw_ace\",\n{\n    autoScrollEditorIntoView: true,\n    minLines: 30,"
-                   "\n});\nintelowl_in_raw.setReadOnly(true);\nintelowl_in_raw.setTheme("
-                   "\"ace/theme/tomorrow\");\nintelowl_in_raw.session.setMode("
-                   "\"ace/mode/json\");\nintelowl_in_raw.renderer.setShowGutter(true);\nintelowl_in_raw.setOption("
-                   "\"showLineNumbers\", true);\nintelowl_in_raw.setOption(\"showPrintMargin\", "
-                   "false);\nintelowl_in_raw.setOption(\"displayIndentGuides\", true);\nintelowl_in_raw.setOption("
-                   "\"maxLines\", \"Infinity\");\nintelowl_in_raw.session.setUseWrapMode("
-                   "true);\nintelowl_in_raw.setOption(\"indentedSoftWrap\", "
-                   "true);\nintelowl_in_raw.renderer.setScrollMargin(8, 5);\n{% if results.analyzer_reports %}\n$("
-                   "\"#il_in_anrep\").DataTable({\n    filter: true,\n    info: true,\n    ordering: true,"
-                   "\n    processing: true,\n});\n{% endif %}\n{% if results.connector_reports %}\n$("
-                   "\"#il_in_corep\").DataTable({\n    filter: true,\n    info: true,\n    ordering: true,"
-                   "\n    processing: true,\n});\n{% endif %}\n</script> ",
+        "param_description": "URL report template used to add a new custom attribute to the target IOC. "
+                             "Leave empty to use the default template packaged with the module",
+        "default": "",
         "mandatory": False,
         "type": "textfield_html",
         "section": "Templates"
@@ -480,126 +630,9 @@ module_configuration = [
     {
         "param_name": "intelowl_hash_report_template",
         "param_human_name": "Hash report template",
-        "param_description": "Hash report template used to add a new custom attribute to the target IOC",
-        "default": "<div class=\"row\">\n    <div class=\"col-12\">\n        <div class=\"accordion\">\n            "
-                   "<h3>General information</h3>\n                <div class=\"row\">\n                    <div "
-                   "class=\"col-12\">\n                        <dl class=\"row\">\n                            {% if "
-                   "external_link %}\n                            <dt class=\"col-sm-3\">Report</dt>\n                "
-                   "            <dd class=\"col-sm-9\">\n                                {% autoescape false %}\n     "
-                   "                           <a href=\"{{ external_link }}\" target=\"_blank\">IntelOwl Report "
-                   "Link</a>\n                                {% endautoescape %}\n                            "
-                   "</dd>\n                            {% endif %}\n                            {% if "
-                   "nb_analyzer_reports %}\n                            <dt class=\"col-sm-3\">Total Analyzer "
-                   "Reports</dt>\n                            <dd class=\"col-sm-9\">{{ nb_analyzer_reports }}</dd>\n "
-                   "                           {% endif %}\n                            {% if nb_connector_reports "
-                   "%}\n                            <dt class=\"col-sm-3\">Total Connector Reports</dt>\n             "
-                   "               <dd class=\"col-sm-9\">{{ nb_connector_reports }}</dd>\n                           "
-                   " {% endif %}\n                        </dl>\n                    </div>\n                </div>\n "
-                   "       </div>\n    </div>\n</div>\n\n<div class=\"row\">\n    <div class=\"col-12\">\n        "
-                   "<div class=\"accordion\">\n            <h3>Additional information</h3>\n\n            {% if "
-                   "results.analyzer_reports %}\n            <div class=\"card\">\n                <div "
-                   "class=\"card-header collapsed\" id=\"drop_an\" data-toggle=\"collapse\" "
-                   "data-target=\"#drop_anrep\" aria-expanded=\"false\" aria-controls=\"drop_anrep\" "
-                   "role=\"button\">\n                    <div class=\"span-icon\">\n                        <div "
-                   "class=\"flaticon-file\"></div>\n                    </div>\n                    <div "
-                   "class=\"span-title\">\n                        Analyzer results\n                    </div>\n     "
-                   "               <div class=\"span-mode\"></div>\n                </div>\n                <div "
-                   "id=\"drop_anrep\" class=\"collapse\" aria-labelledby=\"drop_an\" style=\"\">\n                    "
-                   "<div class=\"card-body\">\n                        <table class=\"table display table-bordered "
-                   "table-striped table-hover\" width=\"100%\" cellspacing=\"0\" id=\"il_in_anrep\" >\n               "
-                   "                 <thead>\n                                  <tr>\n                                "
-                   "      <th>Name</th>\n                                      <th>Status</th>\n                      "
-                   "                <th>ProcessTime</th>\n                                      <th>StartTime</th>\n  "
-                   "                                    <th>Report</th>\n                                  </tr>\n    "
-                   "                            </thead>\n                                <tbody>\n                   "
-                   "             {% for analyzer_report in results.analyzer_reports %} \n                             "
-                   "       <tr role=\"row\">\n                                        <td>{{ analyzer_report.name "
-                   "}}</td>\n                                        <td>{{ analyzer_report.status }}</td>\n          "
-                   "                              <td>{{ analyzer_report.process_time }}</td>\n                       "
-                   "                 <td>{{ analyzer_report.start_time }}</td>\n                                      "
-                   "  <td>\n                                            <div class=\"card\">\n                        "
-                   "                        <div class=\"card-header collapsed\" id=\"drop_r_intelowl_{{ "
-                   "analyzer_report.name }}\" data-toggle=\"collapse\" data-target=\"#drop_raw_intelowl_{{ "
-                   "analyzer_report.name }}\" aria-expanded=\"false\" aria-controls=\"drop_raw_intelowl_{{ "
-                   "analyzer_report.name }}\" role=\"button\">\n                                                    "
-                   "<div class=\"span-title\">\n                                                        {{ "
-                   "analyzer_report.name }} raw report\n                                                    </div>\n  "
-                   "                                                  <div class=\"span-mode\"></div>\n               "
-                   "                                 </div>\n                                                <div "
-                   "id=\"drop_raw_intelowl_{{ analyzer_report.name }}\" class=\"collapse\" "
-                   "aria-labelledby=\"drop_r_intelowl_{{ analyzer_report.name }}\" style=\"\">\n                      "
-                   "                              <div class=\"card-body\">\n                                         "
-                   "               <div id='intelowl__{{ analyzer_report.name }}_raw_ace'>{{ "
-                   "analyzer_report.report|tojson(indent=4) }}</div>\n                                                "
-                   "    </div>\n                                                </div>\n                              "
-                   "              </div>\n                                        </td>\n                             "
-                   "       </tr>\n                                {% endfor %}\n                                "
-                   "</tbody>\n                        </table>\n                    </div>\n                </div>\n  "
-                   "          </div>\n            {% endif %}\n\n            {% if results.connector_reports %}\n     "
-                   "       <div class=\"card\">\n                <div class=\"card-header collapsed\" id=\"drop_co\" "
-                   "data-toggle=\"collapse\" data-target=\"#drop_corep\" aria-expanded=\"false\" "
-                   "aria-controls=\"drop_corep\" role=\"button\">\n                    <div class=\"span-icon\">\n    "
-                   "                    <div class=\"flaticon-file\"></div>\n                    </div>\n             "
-                   "       <div class=\"span-title\">\n                        Connector results\n                    "
-                   "</div>\n                    <div class=\"span-mode\"></div>\n                </div>\n             "
-                   "   <div id=\"drop_corep\" class=\"collapse\" aria-labelledby=\"drop_co\" style=\"\">\n            "
-                   "        <div class=\"card-body\">\n                        <table class=\"table display "
-                   "table-bordered table-striped table-hover\" width=\"100%\" cellspacing=\"0\" id=\"il_in_corep\" "
-                   ">\n                                <thead>\n                                  <tr>\n              "
-                   "                        <th>Name</th>\n                                      <th>Status</th>\n    "
-                   "                                  <th>ProcessTime</th>\n                                      "
-                   "<th>StartTime</th>\n                                      <th>Report</th>\n                       "
-                   "           </tr>\n                                </thead>\n                                "
-                   "<tbody>\n                                {% for connector_report in results.connector_reports %} "
-                   "\n                                    <tr role=\"row\">\n                                        "
-                   "<td>{{ connector_report.name }}</td>\n                                        <td>{{ "
-                   "connector_report.status }}</td>\n                                        <td>{{ "
-                   "connector_report.process_time }}</td>\n                                        <td>{{ "
-                   "connector_report.start_time }}</td>\n                                        <td>\n               "
-                   "                             <div class=\"card\">\n                                               "
-                   " <div class=\"card-header collapsed\" id=\"drop_r_intelowl_{{ connector_report.name }}\" "
-                   "data-toggle=\"collapse\" data-target=\"#drop_raw_intelowl_{{ connector_report.name }}\" "
-                   "aria-expanded=\"false\" aria-controls=\"drop_raw_intelowl_{{ connector_report.name }}\" "
-                   "role=\"button\">\n                                                    <div "
-                   "class=\"span-title\">\n                                                        {{ "
-                   "connector_report.name }} raw report\n                                                    </div>\n "
-                   "                                                   <div class=\"span-mode\"></div>\n              "
-                   "                                  </div>\n                                                <div "
-                   "id=\"drop_raw_intelowl_{{ connector_report.name }}\" class=\"collapse\" "
-                   "aria-labelledby=\"drop_r_intelowl_{{ connector_report.name }}\" style=\"\">\n                     "
-                   "                               <div class=\"card-body\">\n                                        "
-                   "                <div id='intelowl__{{ connector_report.name }}_raw_ace'>{{ "
-                   "connector_report.report|tojson(indent=4) }}</div>\n                                               "
-                   "     </div>\n                                                </div>\n                             "
-                   "               </div>\n                                        </td>\n                            "
-                   "        </tr>\n                                {% endfor %}\n                                "
-                   "</tbody>\n                        </table>\n                    </div>\n                </div>\n  "
-                   "          </div>\n            {% endif %}\n\n        </div>\n    </div>\n</div>\n\n<div "
-                   "class=\"row\">\n    <div class=\"col-12\">\n        <div class=\"accordion\">\n            "
-                   "<h3>IntelOwl raw results</h3>\n\n            <div class=\"card\">\n                <div "
-                   "class=\"card-header collapsed\" id=\"drop_r_intelowl\" data-toggle=\"collapse\" "
-                   "data-target=\"#drop_raw_intelowl\" aria-expanded=\"false\" aria-controls=\"drop_raw_intelowl\" "
-                   "role=\"button\">\n                    <div class=\"span-icon\">\n                        <div "
-                   "class=\"flaticon-file\"></div>\n                    </div>\n                    <div "
-                   "class=\"span-title\">\n                        IntelOwl raw results\n                    </div>\n "
-                   "                   <div class=\"span-mode\"></div>\n                </div>\n                <div "
-                   "id=\"drop_raw_intelowl\" class=\"collapse\" aria-labelledby=\"drop_r_intelowl\" style=\"\">\n     "
-                   "               <div class=\"card-body\">\n                        <div id='intelowl_raw_ace'>{{ "
-                   "results|default(\"\")|tojson(indent=4) }}</div>\n                    </div>\n                "
-                   "</div>\n            </div>\n        </div>\n    </div>\n</div> \n<script>\nvar intelowl_in_raw = "
-                   "ace.edit(\"intelowl_raw_ace\",\n{\n    autoScrollEditorIntoView: true,\n    minLines: 30,"
-                   "\n});\nintelowl_in_raw.setReadOnly(true);\nintelowl_in_raw.setTheme("
-                   "\"ace/theme/tomorrow\");\nintelowl_in_raw.session.setMode("
-                   "\"ace/mode/json\");\nintelowl_in_raw.renderer.setShowGutter(true);\nintelowl_in_raw.setOption("
-                   "\"showLineNumbers\", true);\nintelowl_in_raw.setOption(\"showPrintMargin\", "
-                   "false);\nintelowl_in_raw.setOption(\"displayIndentGuides\", true);\nintelowl_in_raw.setOption("
-                   "\"maxLines\", \"Infinity\");\nintelowl_in_raw.session.setUseWrapMode("
-                   "true);\nintelowl_in_raw.setOption(\"indentedSoftWrap\", "
-                   "true);\nintelowl_in_raw.renderer.setScrollMargin(8, 5);\n{% if results.analyzer_reports %}\n$("
-                   "\"#il_in_anrep\").DataTable({\n    filter: true,\n    info: true,\n    ordering: true,"
-                   "\n    processing: true,\n});\n{% endif %}\n{% if results.connector_reports %}\n$("
-                   "\"#il_in_corep\").DataTable({\n    filter: true,\n    info: true,\n    ordering: true,"
-                   "\n    processing: true,\n});\n{% endif %}\n</script> ",
+        "param_description": "Hash report template used to add a new custom attribute to the target IOC. "
+                             "Leave empty to use the default template packaged with the module",
+        "default": "",
         "mandatory": False,
         "type": "textfield_html",
         "section": "Templates"
@@ -607,126 +640,9 @@ module_configuration = [
     {
         "param_name": "intelowl_generic_report_template",
         "param_human_name": "Generic ioc report template",
-        "param_description": "Generic ioc report template used to add a new custom attribute to the target IOC",
-        "default": "<div class=\"row\">\n    <div class=\"col-12\">\n        <div class=\"accordion\">\n            "
-                   "<h3>General information</h3>\n                <div class=\"row\">\n                    <div "
-                   "class=\"col-12\">\n                        <dl class=\"row\">\n                            {% if "
-                   "external_link %}\n                            <dt class=\"col-sm-3\">Report</dt>\n                "
-                   "            <dd class=\"col-sm-9\">\n                                {% autoescape false %}\n     "
-                   "                           <a href=\"{{ external_link }}\" target=\"_blank\">IntelOwl Report "
-                   "Link</a>\n                                {% endautoescape %}\n                            "
-                   "</dd>\n                            {% endif %}\n                            {% if "
-                   "nb_analyzer_reports %}\n                            <dt class=\"col-sm-3\">Total Analyzer "
-                   "Reports</dt>\n                            <dd class=\"col-sm-9\">{{ nb_analyzer_reports }}</dd>\n "
-                   "                           {% endif %}\n                            {% if nb_connector_reports "
-                   "%}\n                            <dt class=\"col-sm-3\">Total Connector Reports</dt>\n             "
-                   "               <dd class=\"col-sm-9\">{{ nb_connector_reports }}</dd>\n                           "
-                   " {% endif %}\n                        </dl>\n                    </div>\n                </div>\n "
-                   "       </div>\n    </div>\n</div>\n\n<div class=\"row\">\n    <div class=\"col-12\">\n        "
-                   "<div class=\"accordion\">\n            <h3>Additional information</h3>\n\n            {% if "
-                   "results.analyzer_reports %}\n            <div class=\"card\">\n                <div "
-                   "class=\"card-header collapsed\" id=\"drop_an\" data-toggle=\"collapse\" "
-                   "data-target=\"#drop_anrep\" aria-expanded=\"false\" aria-controls=\"drop_anrep\" "
-                   "role=\"button\">\n                    <div class=\"span-icon\">\n                        <div "
-                   "class=\"flaticon-file\"></div>\n                    </div>\n                    <div "
-                   "class=\"span-title\">\n                        Analyzer results\n                    </div>\n     "
-                   "               <div class=\"span-mode\"></div>\n                </div>\n                <div "
-                   "id=\"drop_anrep\" class=\"collapse\" aria-labelledby=\"drop_an\" style=\"\">\n                    "
-                   "<div class=\"card-body\">\n                        <table class=\"table display table-bordered "
-                   "table-striped table-hover\" width=\"100%\" cellspacing=\"0\" id=\"il_in_anrep\" >\n               "
-                   "                 <thead>\n                                  <tr>\n                                "
-                   "      <th>Name</th>\n                                      <th>Status</th>\n                      "
-                   "                <th>ProcessTime</th>\n                                      <th>StartTime</th>\n  "
-                   "                                    <th>Report</th>\n                                  </tr>\n    "
-                   "                            </thead>\n                                <tbody>\n                   "
-                   "             {% for analyzer_report in results.analyzer_reports %} \n                             "
-                   "       <tr role=\"row\">\n                                        <td>{{ analyzer_report.name "
-                   "}}</td>\n                                        <td>{{ analyzer_report.status }}</td>\n          "
-                   "                              <td>{{ analyzer_report.process_time }}</td>\n                       "
-                   "                 <td>{{ analyzer_report.start_time }}</td>\n                                      "
-                   "  <td>\n                                            <div class=\"card\">\n                        "
-                   "                        <div class=\"card-header collapsed\" id=\"drop_r_intelowl_{{ "
-                   "analyzer_report.name }}\" data-toggle=\"collapse\" data-target=\"#drop_raw_intelowl_{{ "
-                   "analyzer_report.name }}\" aria-expanded=\"false\" aria-controls=\"drop_raw_intelowl_{{ "
-                   "analyzer_report.name }}\" role=\"button\">\n                                                    "
-                   "<div class=\"span-title\">\n                                                        {{ "
-                   "analyzer_report.name }} raw report\n                                                    </div>\n  "
-                   "                                                  <div class=\"span-mode\"></div>\n               "
-                   "                                 </div>\n                                                <div "
-                   "id=\"drop_raw_intelowl_{{ analyzer_report.name }}\" class=\"collapse\" "
-                   "aria-labelledby=\"drop_r_intelowl_{{ analyzer_report.name }}\" style=\"\">\n                      "
-                   "                              <div class=\"card-body\">\n                                         "
-                   "               <div id='intelowl__{{ analyzer_report.name }}_raw_ace'>{{ "
-                   "analyzer_report.report|tojson(indent=4) }}</div>\n                                                "
-                   "    </div>\n                                                </div>\n                              "
-                   "              </div>\n                                        </td>\n                             "
-                   "       </tr>\n                                {% endfor %}\n                                "
-                   "</tbody>\n                        </table>\n                    </div>\n                </div>\n  "
-                   "          </div>\n            {% endif %}\n\n            {% if results.connector_reports %}\n     "
-                   "       <div class=\"card\">\n                <div class=\"card-header collapsed\" id=\"drop_co\" "
-                   "data-toggle=\"collapse\" data-target=\"#drop_corep\" aria-expanded=\"false\" "
-                   "aria-controls=\"drop_corep\" role=\"button\">\n                    <div class=\"span-icon\">\n    "
-                   "                    <div class=\"flaticon-file\"></div>\n                    </div>\n             "
-                   "       <div class=\"span-title\">\n                        Connector results\n                    "
-                   "</div>\n                    <div class=\"span-mode\"></div>\n                </div>\n             "
-                   "   <div id=\"drop_corep\" class=\"collapse\" aria-labelledby=\"drop_co\" style=\"\">\n            "
-                   "        <div class=\"card-body\">\n                        <table class=\"table display "
-                   "table-bordered table-striped table-hover\" width=\"100%\" cellspacing=\"0\" id=\"il_in_corep\" "
-                   ">\n                                <thead>\n                                  <tr>\n              "
-                   "                        <th>Name</th>\n                                      <th>Status</th>\n    "
-                   "                                  <th>ProcessTime</th>\n                                      "
-                   "<th>StartTime</th>\n                                      <th>Report</th>\n                       "
-                   "           </tr>\n                                </thead>\n                                "
-                   "<tbody>\n                                {% for connector_report in results.connector_reports %} "
-                   "\n                                    <tr role=\"row\">\n                                        "
-                   "<td>{{ connector_report.name }}</td>\n                                        <td>{{ "
-                   "connector_report.status }}</td>\n                                        <td>{{ "
-                   "connector_report.process_time }}</td>\n                                        <td>{{ "
-                   "connector_report.start_time }}</td>\n                                        <td>\n               "
-                   "                             <div class=\"card\">\n                                               "
-                   " <div class=\"card-header collapsed\" id=\"drop_r_intelowl_{{ connector_report.name }}\" "
-                   "data-toggle=\"collapse\" data-target=\"#drop_raw_intelowl_{{ connector_report.name }}\" "
-                   "aria-expanded=\"false\" aria-controls=\"drop_raw_intelowl_{{ connector_report.name }}\" "
-                   "role=\"button\">\n                                                    <div "
-                   "class=\"span-title\">\n                                                        {{ "
-                   "connector_report.name }} raw report\n                                                    </div>\n "
-                   "                                                   <div class=\"span-mode\"></div>\n              "
-                   "                                  </div>\n                                                <div "
-                   "id=\"drop_raw_intelowl_{{ connector_report.name }}\" class=\"collapse\" "
-                   "aria-labelledby=\"drop_r_intelowl_{{ connector_report.name }}\" style=\"\">\n                     "
-                   "                               <div class=\"card-body\">\n                                        "
-                   "                <div id='intelowl__{{ connector_report.name }}_raw_ace'>{{ "
-                   "connector_report.report|tojson(indent=4) }}</div>\n                                               "
-                   "     </div>\n                                                </div>\n                             "
-                   "               </div>\n                                        </td>\n                            "
-                   "        </tr>\n                                {% endfor %}\n                                "
-                   "</tbody>\n                        </table>\n                    </div>\n                </div>\n  "
-                   "          </div>\n            {% endif %}\n\n        </div>\n    </div>\n</div>\n\n<div "
-                   "class=\"row\">\n    <div class=\"col-12\">\n        <div class=\"accordion\">\n            "
-                   "<h3>IntelOwl raw results</h3>\n\n            <div class=\"card\">\n                <div "
-                   "class=\"card-header collapsed\" id=\"drop_r_intelowl\" data-toggle=\"collapse\" "
-                   "data-target=\"#drop_raw_intelowl\" aria-expanded=\"false\" aria-controls=\"drop_raw_intelowl\" "
-                   "role=\"button\">\n                    <div class=\"span-icon\">\n                        <div "
-                   "class=\"flaticon-file\"></div>\n                    </div>\n                    <div "
-                   "class=\"span-title\">\n                        IntelOwl raw results\n                    </div>\n "
-                   "                   <div class=\"span-mode\"></div>\n                </div>\n                <div "
-                   "id=\"drop_raw_intelowl\" class=\"collapse\" aria-labelledby=\"drop_r_intelowl\" style=\"\">\n     "
-                   "               <div class=\"card-body\">\n                        <div id='intelowl_raw_ace'>{{ "
-                   "results|default(\"\")|tojson(indent=4) }}</div>\n                    </div>\n                "
-                   "</div>\n            </div>\n        </div>\n    </div>\n</div> \n<script>\nvar intelowl_in_raw = "
-                   "ace.edit(\"intelowl_raw_ace\",\n{\n    autoScrollEditorIntoView: true,\n    minLines: 30,"
-                   "\n});\nintelowl_in_raw.setReadOnly(true);\nintelowl_in_raw.setTheme("
-                   "\"ace/theme/tomorrow\");\nintelowl_in_raw.session.setMode("
-                   "\"ace/mode/json\");\nintelowl_in_raw.renderer.setShowGutter(true);\nintelowl_in_raw.setOption("
-                   "\"showLineNumbers\", true);\nintelowl_in_raw.setOption(\"showPrintMargin\", "
-                   "false);\nintelowl_in_raw.setOption(\"displayIndentGuides\", true);\nintelowl_in_raw.setOption("
-                   "\"maxLines\", \"Infinity\");\nintelowl_in_raw.session.setUseWrapMode("
-                   "true);\nintelowl_in_raw.setOption(\"indentedSoftWrap\", "
-                   "true);\nintelowl_in_raw.renderer.setScrollMargin(8, 5);\n{% if results.analyzer_reports %}\n$("
-                   "\"#il_in_anrep\").DataTable({\n    filter: true,\n    info: true,\n    ordering: true,"
-                   "\n    processing: true,\n});\n{% endif %}\n{% if results.connector_reports %}\n$("
-                   "\"#il_in_corep\").DataTable({\n    filter: true,\n    info: true,\n    ordering: true,"
-                   "\n    processing: true,\n});\n{% endif %}\n</script> ",
+        "param_description": "Generic ioc report template used to add a new custom attribute to the target "
+                             "IOC. Leave empty to use the default template packaged with the module",
+        "default": "",
         "mandatory": False,
         "type": "textfield_html",
         "section": "Templates"
@@ -9,13 +9,17 @@
 #  License Apache Software License 3.0
 
 import traceback
+from contextlib import nullcontext
 from pathlib import Path
 
 import iris_interface.IrisInterfaceStatus as InterfaceStatus
 from iris_interface.IrisModuleInterface import IrisPipelineTypes, IrisModuleInterface, IrisModuleTypes
 
 import iris_intelowl_module_2.IrisIntelowlConfig as interface_conf
-from iris_intelowl_module_2.intelowl_handler.intelowl_handler import IntelowlHandler
+
+# IRIS imports this module in the web app as well as in the worker, often only to read the configuration.
+# The handler pulls jinja2, pyintelowl and the IRIS database layer, so it is imported when a hook runs.
+# `make importtime` reports the import cost of this module.
 
 
 class IrisIntelowlInterface(IrisModuleInterface):
@@ -42,6 +46,14 @@ class IrisIntelowlInterface(IrisModuleInterface):
         """
         self.module_id = module_id
         module_conf = self.module_dict_conf
+
+        # Compile the report templates now, so a broken custom template shows up at configuration time
+        from iris_intelowl_module_2.intelowl_handler.templates import compile_templates
+
+        template_errors = compile_templates(module_conf)
+        for template_key, error in template_errors.items():
+            self.log.error(f"Invalid {template_key}: {error}")
+
         if module_conf.get('intelowl_on_create_hook_enabled'):
             status = self.register_to_hook(module_id, iris_hook_name='on_postload_ioc_create')
             if status.is_failure():
@@ -89,7 +101,8 @@ class IrisIntelowlInterface(IrisModuleInterface):
 
         self.log.info(f'Received {hook_name}')
         if hook_name in ['on_postload_ioc_create', 'on_postload_ioc_update', 'on_manual_trigger_ioc']:
-            status = self._handle_ioc(data=data)
+            with self._get_profiler(hook_name):
+                status = self._handle_ioc(data=data)
 
         else:
             self.log.critical(f'Received unsupported hook {hook_name}')
@@ -102,6 +115,24 @@ class IrisIntelowlInterface(IrisModuleInterface):
         self.log.info(f"Successfully processed hook {hook_name}")
         return InterfaceStatus.I2Success(data=data, logs=list(self.message_queue))
 
+    def _get_profiler(self, hook_name):
+        """
+        Returns the profiler wrapping a hook invocation, a no-op context unless profiling is enabled
+
+        :param hook_name: Name of the hook which triggered
+        :return: Context manager
+        """
+        if (self.module_dict_conf.get('intelowl_profiling_mode') or 'off') == 'off':
+            return nullcontext()
+
+        from iris_intelowl_module_2.intelowl_handler.profiling import get_hook_profiler
+
+        try:
+            return get_hook_profiler(self.module_dict_conf, hook_name, self.log) or nullcontext()
+        except Exception:
+            self.log.error(traceback.format_exc())
+            return nullcontext()
+
     def _handle_ioc(self, data) -> InterfaceStatus.IIStatus:
         """
         Handle the IOC data the module just received. The module registered
@@ -112,34 +143,152 @@ class IrisIntelowlInterface(IrisModuleInterface):
         :param data: Data associated to the hook, here IOC object
         :return: IIStatus
         """
+        from iris_intelowl_module_2.intelowl_handler.budget import Deadline
+        from iris_intelowl_module_2.intelowl_handler.intelowl_handler import IntelowlHandler
 
         intelowl_handler = IntelowlHandler(mod_config=self.module_dict_conf,
                                            server_config=self.server_dict_conf,
-                                           logger=self.log)
+                                           logger=self.log,
+                                           retry_queue=self._get_retry_queue(),
+                                           deadline=Deadline(self.module_dict_conf.get('intelowl_hook_time_budget')))
 
         in_status = InterfaceStatus.IIStatus(code=InterfaceStatus.I2CodeNoError)
+        self._ensure_refresh_ahead()
 
-        for element in data:
-            # Check that the IOC we receive is of type the module can handle and dispatch
-            if 'ip-' in element.ioc_type.type_name:
-                status = intelowl_handler.handle_ip(ioc=element)
-                in_status = InterfaceStatus.merge_status(in_status, status)
-            elif 'domain' in element.ioc_type.type_name:
-                status = intelowl_handler.handle_domain(ioc=element)
-                in_status = InterfaceStatus.merge_status(in_status, status)
-            elif 'url' in element.ioc_type.type_name:
-                status = intelowl_handler.handle_url(ioc=element)
-                in_status = InterfaceStatus.merge_status(in_status, status)
-            elif element.ioc_type.type_name in ['md5', 'sha1', 'sha224', 'sha256', 'sha512']:
-                status = intelowl_handler.handle_hash(ioc=element)
-                in_status = InterfaceStatus.merge_status(in_status, status)
-            else:
-                status = intelowl_handler.handle_generic(ioc=element)
+        # 0 or a negative size processes the whole payload at once
+        chunk_size = max(self.module_dict_conf.get('intelowl_chunk_size') or 0, 0) or len(data) or 1
+        for chunk_start in range(0, len(data), chunk_size):
+            chunk = data[chunk_start:chunk_start + chunk_size]
+            if chunk_size < len(data):
+                self.log.info(f'Processing IOCs {chunk_start + 1} to {chunk_start + len(chunk)} of {len(data)}')
+
+            intelowl_handler.adopt_jobs(chunk)
+            intelowl_handler.presubmit(chunk)
+            intelowl_handler.collect_submitted()
+            for element in chunk:
+                status = intelowl_handler.handle_ioc(element)
                 in_status = InterfaceStatus.merge_status(in_status, status)
 
-            # elif element.ioc_type.type_name in etc...
+            in_status = InterfaceStatus.merge_status(in_status, intelowl_handler.finalize())
 
-            #else:
-            #    self.log.error(f'IOC type {element.ioc_type.type_name} not handled by intelowl module. Skipping')
+            if chunk_size < len(data):
+                in_status = InterfaceStatus.merge_status(in_status, self._persist_chunk())
+
+        self._schedule_prefetch(intelowl_handler.get_derived_observables())
 
         return in_status(data=data)
+
+    def _make_background_handler(self):
+        """
+        Builds a handler for the enrichments done outside of any hook, by the prefetcher and the refresh-ahead
+
+        :return: IntelowlHandler
+        """
+        from iris_intelowl_module_2.intelowl_handler.intelowl_handler import IntelowlHandler
+
+        return IntelowlHandler(mod_config=self.module_dict_conf, server_config=self.server_dict_conf, logger=self.log)
+
+    def _ensure_refresh_ahead(self):
+        """
+        Makes sure the refresh-ahead scheduler runs in this process, if it is enabled
+
+        :return: Nothing
+        """
+        if not self.module_dict_conf.get('intelowl_refresh_enabled'):
+            return
+
+        from iris_intelowl_module_2.intelowl_handler.refresh_ahead import ensure_scheduler
+
+        try:
+            ensure_scheduler(self.module_dict_conf, self._make_background_handler, self.log)
+        except Exception:
+            self.log.error(traceback.format_exc())
+
+    def _schedule_prefetch(self, derived_observables):
+        """
+        Hands the observables derived from the enriched IOCs to the background prefetcher
+
+        :param derived_observables: List of (classification, observable)
+        :return: Nothing
+        """
+        if not derived_observables:
+            return
+
+        from iris_intelowl_module_2.intelowl_handler.prefetch import get_prefetcher
+
+        try:
+            queued = get_prefetcher(self._make_background_handler, self.log).submit(derived_observables)
+            self.log.info(f'Queued {queued} derived observables for prefetching')
+        except Exception:
+            self.log.error(traceback.format_exc())
+
+    def _persist_chunk(self) -> InterfaceStatus.IIStatus:
+        """
+        Commits the reports of a processed chunk. Committing expires the IOC objects, so their reports
+        are released and the memory held stays bounded by the chunk size.
+
+        :return: IIStatus
+        """
+        from app import db
+
+        try:
+            db.session.commit()
+        except Exception:
+            self.log.error(traceback.format_exc())
+            db.session.rollback()
+            return InterfaceStatus.I2Error(traceback.format_exc())
+
+        return InterfaceStatus.I2Success()
+
+    def _get_retry_queue(self):
+        """
+        Returns the retry queue and makes sure its drainer runs in this process, if retries are enabled.
+        A hook time budget enables them as well, the IOCs left over when it is spent are only enriched by retries.
+
+        :return: RetryQueue or None
+        """
+        if not self.module_dict_conf.get('intelowl_retry_enabled') and \
+                not self.module_dict_conf.get('intelowl_hook_time_budget'):
+            return None
+
+        from iris_intelowl_module_2.intelowl_handler.retry_queue import get_retry_queue, ensure_drainer
+
+        try:
+            queue = get_retry_queue(self.module_dict_conf)
+            ensure_drainer(queue, self._retry_ioc, self.log)
+        except Exception:
+            self.log.error(traceback.format_exc())
+            return None
+
+        return queue
+
+    def _retry_ioc(self, entry) -> bool:
+        """
+        Retries the enrichment of a queued IOC. Called from the retry drainer thread,
+        so the IOC is reloaded in a fresh application context.
+
+        :param entry: Retry queue entry
+        :return: True if the enrichment succeeded
+        """
+        from app import app, db
+        from app.models.models import Ioc
+        from iris_intelowl_module_2.intelowl_handler.intelowl_handler import IntelowlHandler
+
+        with app.app_context():
+            ioc = Ioc.query.filter(Ioc.ioc_id == entry["ioc_id"]).first()
+            if ioc is None:
+                self.log.info(f'IOC {entry["ioc_id"]} no longer exists, dropping its IntelOwl retry')
+                return True
+
+            self.log.info(f'Retrying IntelOwl enrichment of {ioc.ioc_value} (attempt {entry["attempts"] + 1})')
+            resume_job_ids = {ioc.ioc_id: entry["job_id"]} if entry.get("job_id") else None
+            intelowl_handler = IntelowlHandler(mod_config=self.module_dict_conf,
+                                               server_config=self.server_dict_conf,
+                                               logger=self.log,
+                                               resume_job_ids=resume_job_ids)
+            status = intelowl_handler.handle_ioc(ioc)
+            status = InterfaceStatus.merge_status(status, intelowl_handler.finalize())
+            db.session.commit()
+
+        # A job that timed out again is still attached as a partial report, but it is not a success for the queue
+        return status.is_success() and not intelowl_handler.pending_retries
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+#
+#
+#  IRIS intelowl Source Code
+#  Copyright (C) 2022 - dfir-iris
+#  contact@dfir-iris.org
+#  Created by dfir-iris - 2022-10-29
+#
+#  License Apache Software License 3.0
+
+"""
+Bulk (re-)enrichment of existing IOCs. Runs inside an IRIS container, e.g:
+
+    python -m iris_intelowl_module_2.bulk_enrich --case-id 12 --concurrency 4 --max-age 24
+
+IOCs are streamed by ascending ID in pages. The last fully processed page is checkpointed, so an
+interrupted run resumes where it stopped when launched again with the same checkpoint file and filters.
+The checkpoint is removed once a run completes.
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+import iris_interface.IrisInterfaceStatus as InterfaceStatus
+
+
+log = logging.getLogger('iris_intelowl_module_2.bulk_enrich')
+
+
+def load_module_config(module_name='iris_intelowl_module_2') -> dict:
+    """
+    Reads the module configuration saved in IRIS
+
+    :param module_name: Package name of the module, as registered in IRIS
+    :return: Dict of parameter name to value
+    """
+    from app.models.models import IrisModule
+
+    module = IrisModule.query.filter(IrisModule.module_name == module_name).first()
+    if module is None:
+        raise RuntimeError(f'Module {module_name} is not registered in IRIS')
+
+    return {param['param_name']: param.get('value', param.get('default')) for param in module.module_config}
+
+
+def load_server_config(app) -> dict:
+    return {key: app.config.get(key) for key in ('http_proxy', 'https_proxy', 'HTTP_PROXY', 'HTTPS_PROXY')}
+
+
+class Checkpoint(object):
+    """
+    Progress of a bulk run, persisted as JSON after each page along with the filters of the run.
+    Resuming with other filters is refused, as it would skip the IOCs below the last ID of the previous run.
+    """
+    def __init__(self, path, filters=None):
+        self.path = path
+        self.filters = filters or {}
+        self.last_ioc_id = 0
+        self.enriched = 0
+        self.skipped = 0
+        self.failed = 0
+
+        if path and os.path.exists(path):
+            with open(path, 'r') as fd:
+                saved = json.load(fd)
+
+            if saved.get('filters', {}) != self.filters:
+                raise RuntimeError(f'Checkpoint {path} belongs to a run with other filters ({saved.get("filters")}), '
+                                   f'remove it or use another --checkpoint')
+
+            self.__dict__.update(saved)
+
+    def save(self):
+        if not self.path:
+            return
+
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w') as fd:
+            json.dump({'filters': self.filters, 'last_ioc_id': self.last_ioc_id, 'enriched': self.enriched,
+                       'skipped': self.skipped, 'failed': self.failed}, fd)
+        os.replace(tmp_path, self.path)
+
+    def remove(self):
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def iter_ioc_pages(case_id=None, ioc_types=None, after_id=0, page_size=200):
+    """
+    Streams the IDs of the IOCs matching the filters, by pages of ascending IDs
+
+    :param case_id: Only IOCs of this case
+    :param ioc_types: Only IOCs of these type names
+    :param after_id: Only IOCs with an ID greater than this one
+    :param page_size: Number of IDs per page
+    :return: Generator of lists of IOC IDs
+    """
+    from app.models.models import Ioc, IocType
+
+    query = Ioc.query.with_entities(Ioc.ioc_id)
+    if case_id is not None:
+        if hasattr(Ioc, 'case_id'):
+            query = query.filter(Ioc.case_id == case_id)
+        else:
+            from app.models.models import IocLink
+            query = query.join(IocLink, IocLink.ioc_id == Ioc.ioc_id).filter(IocLink.case_id == case_id)
+
+    if ioc_types:
+        query = query.filter(Ioc.ioc_type.has(IocType.type_name.in_(ioc_types)))
+
+    while True:
+        page = [row.ioc_id for row in query.filter(Ioc.ioc_id > after_id).order_by(Ioc.ioc_id).limit(page_size)]
+        if not page:
+            return
+
+        yield page
+        after_id = page[-1]
+
+
+def enrich_ioc(app, ioc_id, mod_config, server_config, max_age_hours, force) -> str:
+    """
+    Enriches one IOC in its own application context, hence its own database session
+
+    :return: 'enriched', 'skipped' or 'failed'
+    """
+    from app import db
+    from app.models.models import Ioc
+    from iris_intelowl_module_2.intelowl_handler.intelowl_handler import IntelowlHandler
+    from iris_intelowl_module_2.intelowl_handler.report_reuse import is_fresh
+
+    with app.app_context():
+        ioc = Ioc.query.filter(Ioc.ioc_id == ioc_id).first()
+        if ioc is None:
+            return 'skipped'
+
+        if not force and max_age_hours and \
+                is_fresh(ioc, mod_config.get('intelowl_playbook_name'), max_age_hours):
+            return 'skipped'
+
+        try:
+            intelowl_handler = IntelowlHandler(mod_config=mod_config, server_config=server_config, logger=log)
+            status = intelowl_handler.handle_ioc(ioc)
+            status = InterfaceStatus.merge_status(status, intelowl_handler.finalize())
+            db.session.commit()
+
+        except Exception:
+            log.error(traceback.format_exc())
+            db.session.rollback()
+            return 'failed'
+
+    return 'enriched' if status.is_success() else 'failed'
+
+
+def run(args) -> Checkpoint:
+    from app import app
+
+    with app.app_context():
+        mod_config = load_module_config(args.module_name)
+        server_config = load_server_config(app)
+
+    # The report attribute is what makes a bulk run useful
+    mod_config['intelowl_report_as_attribute'] = True
+
+    checkpoint = Checkpoint(args.checkpoint, {'case_id': args.case_id, 'ioc_types': sorted(args.ioc_type or [])})
+    if checkpoint.last_ioc_id:
+        log.info(f'Resuming after IOC {checkpoint.last_ioc_id}')
+
+    with app.app_context(), ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        for page in iter_ioc_pages(args.case_id, args.ioc_type, checkpoint.last_ioc_id, args.page_size):
+            outcomes = executor.map(lambda ioc_id: enrich_ioc(app, ioc_id, mod_config, server_config,
+                                                              args.max_age, args.force), page)
+            for outcome in outcomes:
+                setattr(checkpoint, outcome, getattr(checkpoint, outcome) + 1)
+
+            checkpoint.last_ioc_id = page[-1]
+            checkpoint.save()
+            log.info(f'Processed up to IOC {checkpoint.last_ioc_id}: {checkpoint.enriched} enriched, '
+                     f'{checkpoint.skipped} skipped, {checkpoint.failed} failed')
+
+    checkpoint.remove()
+    return checkpoint
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Refresh the IntelOwl insights of existing IRIS IOCs')
+    parser.add_argument('--case-id', type=int, help='Only enrich the IOCs of this case')
+    parser.add_argument('--ioc-type', action='append', help='Only enrich IOCs of this type (repeatable)')
+    parser.add_argument('--max-age', type=float, default=24,
+                        help='Skip IOCs whose report is younger than this many hours (default 24, 0 to disable)')
+    parser.add_argument('--force', action='store_true', help='Enrich IOCs even if their report is fresh')
+    parser.add_argument('--concurrency', type=int, default=4, help='IOCs enriched in parallel (default 4)')
+    parser.add_argument('--page-size', type=int, default=200, help='IOCs fetched per page (default 200)')
+    parser.add_argument('--checkpoint', default='intelowl_bulk_enrich.json',
+                        help='Progress file used to resume an interrupted run with the same filters')
+    parser.add_argument('--module-name', default='iris_intelowl_module_2',
+                        help='Name under which the module is registered in IRIS')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    checkpoint = run(args)
+    log.info(f'Done: {checkpoint.enriched} enriched, {checkpoint.skipped} skipped, {checkpoint.failed} failed')
+
+    return 1 if checkpoint.failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+#
+#
+#  IRIS intelowl Source Code
+#  Copyright (C) 2022 - dfir-iris
+#  contact@dfir-iris.org
+#  Created by dfir-iris - 2022-10-29
+#
+#  License Apache Software License 3.0
+
+"""
+Playbook requests: submission of many observables to a playbook in a single analyze request, and lookup of
+the analyzers a playbook runs.
+"""
+
+import requests
+from pyintelowl import IntelOwlClientException
+
+
+def submit_playbook_batch(client, classification, observables, playbook_name, tags_labels=None) -> list:
+    """
+    Submits observables of one classification to a playbook with one request
+
+    :param client: IntelOwl client, or a client routing over several instances
+    :param classification: IntelOwl observable classification
+    :param observables: List of observable values
+    :param playbook_name: Name of the playbook
+    :param tags_labels: Labels of the jobs
+    :return: List of job IDs in the order of the observables, None for an observable IntelOwl did not accept
+    """
+    submit = getattr(client, 'submit_playbook_batch', None)
+    if submit is not None:
+        return submit(classification, observables, playbook_name, tags_labels)
+
+    payload = {
+        "observables": [[classification, observable] for observable in observables],
+        "playbook_requested": playbook_name,
+        "tags_labels": tags_labels or [],
+    }
+    try:
+        response = client.session.post(f'{client.instance}/api/playbook/analyze_multiple_observables', json=payload)
+        response.raise_for_status()
+    except requests.RequestException as e:
+        raise IntelOwlClientException(e) from e
+
+    results = response.json().get("results") or []
+    if len(results) != len(observables):
+        raise IntelOwlClientException(f'IntelOwl answered {len(results)} jobs for {len(observables)} observables')
+
+    return [result.get("job_id") for result in results]
+
+
+def get_playbook_analyzers(client, playbook_name) -> list:
+    """
+    Asks IntelOwl which analyzers a playbook runs
+
+    :param client: IntelOwl client, or a client routing over several instances
+    :param playbook_name: Name of the playbook
+    :return: List of analyzer names
+    """
+    get_analyzers = getattr(client, 'get_playbook_analyzers', None)
+    if get_analyzers is not None:
+        return get_analyzers(playbook_name)
+
+    try:
+        response = client.session.get(f'{client.instance}/api/playbook/{playbook_name}')
+        response.raise_for_status()
+    except requests.RequestException as e:
+        raise IntelOwlClientException(e) from e
+
+    return response.json().get("analyzers") or []
@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+#
+#
+#  IRIS intelowl Source Code
+#  Copyright (C) 2022 - dfir-iris
+#  contact@dfir-iris.org
+#  Created by dfir-iris - 2022-10-29
+#
+#  License Apache Software License 3.0
+
+import time
+
+
+class Deadline(object):
+    """
+    Time budget shared by all the IOCs of a hook invocation
+    """
+    def __init__(self, seconds=None):
+        self.expires_at = time.monotonic() + seconds if seconds else None
+
+    def remaining(self):
+        """
+        :return: Seconds left, or None if the budget is unbounded
+        """
+        if self.expires_at is None:
+            return None
+
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+#
+#
+#  IRIS intelowl Source Code
+#  Copyright (C) 2022 - dfir-iris
+#  contact@dfir-iris.org
+#  Created by dfir-iris - 2022-10-29
+#
+#  License Apache Software License 3.0
+
+"""
+Push notification of finished IntelOwl jobs.
+
+A small HTTP endpoint receives completion callbacks, e.g from an IntelOwl webhook connector:
+
+    POST /intelowl/completion?token=<token>
+    {"job_id": 123}          # {"id": 123} and {"job": {"id": 123}} are accepted too
+
+Completions are signalled in-process and through marker files in the state directory, so every worker
+process waiting on a job wakes up, whichever process owns the listener socket.
+
+The listener binds to the loopback by default. It refuses to bind to another address without a token.
+"""
+
+import hmac
+import ipaddress
+import json
+import os
+import threading
+import time
+import traceback
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, urlsplit
+from urllib.request import Request, urlopen
+
+from iris_intelowl_module_2.intelowl_handler.retry_queue import get_state_dir
+
+
+COMPLETION_PATH = '/intelowl/completion'
+BIND_RETRY_DELAY = 60
+
+
+class CompletionRegistry(object):
+    """
+    Jobs reported as finished, shared between the listener and the waiting handlers.
+    Markers nobody waited for are pruned every prune_interval seconds, and at most max_markers are kept.
+    """
+    def __init__(self, markers_dir, max_markers=10000, prune_interval=60):
+        self.markers_dir = markers_dir
+        self.max_markers = max_markers
+        self.prune_interval = prune_interval
+        self._condition = threading.Condition()
+        self._pruned_at = 0
+        os.makedirs(markers_dir, exist_ok=True)
+
+    def _marker(self, job_id):
+        return os.path.join(self.markers_dir, str(int(job_id)))
+
+    def notify(self, job_id):
+        if time.monotonic() - self._pruned_at >= self.prune_interval:
+            self.prune()
+
+        with open(self._marker(job_id), 'w'):
+            pass
+
+        with self._condition:
+            self._condition.notify_all()
+
+    def wait(self, job_id, timeout) -> bool:
+        """
+        Waits until the job is reported as finished
+
+        :param job_id: IntelOwl job ID
+        :param timeout: Maximum wait in seconds
+        :return: True if the job was reported as finished
+        """
+        marker = self._marker(job_id)
+        deadline = time.monotonic() + timeout
+        while True:
+            if os.path.exists(marker):
+                try:
+                    os.remove(marker)
+                except OSError:
+                    pass
+                return True
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+
+            # Completions received by another process only show up as marker files, hence the short slices
+            with self._condition:
+                self._condition.wait(min(remaining, 0.5))
+
+    def prune(self, max_age=3600):
+        """
+        Removes the markers of jobs nobody waited for, and the oldest ones beyond max_markers
+        """
+        self._pruned_at = time.monotonic()
+        now = time.time()
+        markers = []
+        for name in os.listdir(self.markers_dir):
+            path = os.path.join(self.markers_dir, name)
+            try:
+                modified_at = os.path.getmtime(path)
+                if now - modified_at > max_age:
+                    os.remove(path)
+                else:
+                    markers.append((modified_at, path))
+            except OSError:
+                pass
+
+        markers.sort()
+        for _, path in markers[:max(0, len(markers) - self.max_markers)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def _extract_job_id(payload):
+    if not isinstance(payload, dict):
+        return None
+
+    job_id = payload.get("job_id") or payload.get("id") or (payload.get("job") or {}).get("id")
+    try:
+        return int(job_id)
+    except (TypeError, ValueError):
+        return None
+
+
+def _make_request_handler(registry, token, logger):
+
+    class CompletionRequestHandler(BaseHTTPRequestHandler):
+
+        def log_message(self, format, *args):
+            logger.debug(format % args)
+
+        def do_POST(self):
+            url = urlsplit(self.path)
+            if url.path.rstrip('/') != COMPLETION_PATH:
+                self.send_error(404)
+                return
+
+            sent_token = parse_qs(url.query).get('token', [None])[0] or self.headers.get('X-IntelOwl-Token')
+            if token and not hmac.compare_digest((sent_token or '').encode('utf-8'), token.encode('utf-8')):
+                self.send_error(403)
+                return
+
+            try:
+                length = int(self.headers.get('Content-Length') or 0)
+                job_id = _extract_job_id(json.loads(self.rfile.read(length) or b'null'))
+            except ValueError:
+                job_id = None
+
+            if job_id is None:
+                self.send_error(400, 'Missing job id')
+                return
+
+            registry.notify(job_id)
+            self.send_response(204)
+            self.end_headers()
+
+    return CompletionRequestHandler
+
+
+class CompletionListener(threading.Thread):
+    """
+    Background HTTP server feeding a CompletionRegistry
+    """
+    def __init__(self, registry, host, port, token, logger):
+        super().__init__(name="intelowl-completion-listener", daemon=True)
+        self.server = ThreadingHTTPServer((host, port), _make_request_handler(registry, token, logger))
+
+    def run(self):
+        self.server.serve_forever()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def _is_loopback(host) -> bool:
+    if host == 'localhost':
+        return True
+
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+_registries = {}
+_listener = None
+_listener_retry_at = 0
+_lock = threading.Lock()
+
+
+def get_completion_registry(mod_config, logger) -> CompletionRegistry:
+    """
+    Returns the completion registry of the configuration and makes sure a listener serves it.
+    Only one worker process can bind the listener port, the others rely on the marker files and try to
+    bind it again every BIND_RETRY_DELAY seconds, in case the process owning it exited.
+
+    :param mod_config: Module configuration
+    :param logger: Logger
+    :return: CompletionRegistry
+    """
+    global _listener, _listener_retry_at
+
+    markers_dir = os.path.join(get_state_dir(mod_config), 'completions')
+    with _lock:
+        registry = _registries.get(markers_dir)
+        if registry is None:
+            registry = CompletionRegistry(markers_dir)
+            registry.prune()
+            _registries[markers_dir] = registry
+
+        if _listener is None or (_listener is False and time.monotonic() >= _listener_retry_at):
+            host = mod_config.get('intelowl_completion_listener_host') or '127.0.0.1'
+            port = mod_config.get('intelowl_completion_listener_port') or 8765
+            token = mod_config.get('intelowl_completion_listener_token')
+            if not token and not _is_loopback(host):
+                logger.error(f'Not starting the IntelOwl completion listener on {host}: a token is required '
+                             f'to listen on another address than the loopback')
+                _listener = False
+                _listener_retry_at = time.monotonic() + BIND_RETRY_DELAY
+                return registry
+
+            try:
+                _listener = CompletionListener(registry, host, port, token, logger)
+                _listener.start()
+                logger.info(f'IntelOwl completion listener started on {host}:{port}')
+            except OSError:
+                # Most likely bound by another worker process
+                logger.debug(traceback.format_exc())
+                _listener = False
+                _listener_retry_at = time.monotonic() + BIND_RETRY_DELAY
+
+    return registry
+
+
+def post_completion(url, job_id, token=None, timeout=5) -> int:
+    """
+    Posts a job completion to a listener, as IntelOwl or a stand-in would
+
+    :param url: Base URL of the listener, e.g http://127.0.0.1:8765
+    :param job_id: IntelOwl job ID
+    :param token: Shared token of the listener
+    :param timeout: Request timeout in seconds
+    :return: HTTP status code
+    """
+    target = url.rstrip('/') + COMPLETION_PATH + (f'?token={quote(token)}' if token else '')
+    request = Request(target, data=json.dumps({"job_id": job_id}).encode('utf-8'),
+                      headers={'Content-Type': 'application/json'}, method='POST')
+    with urlopen(request, timeout=timeout) as response:
+        return response.status
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+#
+#
+#  IRIS intelowl Source Code
+#  Copyright (C) 2022 - dfir-iris
+#  contact@dfir-iris.org
+#  Created by dfir-iris - 2022-10-29
+#
+#  License Apache Software License 3.0
+
+"""
+Several IntelOwl instances behind one client.
+
+New jobs go to the healthy instance with the fewest outstanding jobs per unit of weight, or are spread at random
+in proportion to the weights. Job IDs carry their instance: IDs of the first instance are unchanged, those of
+instance i are offset by i * JOB_ID_STRIDE. Polling and killing a job therefore reach the instance owning it,
+whichever process or retry handles it.
+"""
+
+import random
+import threading
+import time
+import traceback
+
+from pyintelowl import IntelOwlClientException
+
+
+JOB_ID_STRIDE = 10 ** 12
+_UNFINISHED = ("pending", "running")
+
+
+def parse_instances(spec):
+    """
+    Parses the additional instances setting, one instance per line: <url> <api key> [weight]
+
+    :param spec: Setting value
+    :return: List of (url, key, weight)
+    """
+    instances = []
+    for line in (spec or '').splitlines():
+        fields = line.split()
+        if not fields or fields[0].startswith('#'):
+            continue
+
+        if len(fields) < 2:
+            raise ValueError(f'Missing API key for IntelOwl instance {fields[0]}')
+
+        instances.append((fields[0], fields[1], float(fields[2]) if len(fields) > 2 else 1.0))
+
+    return instances
+
+
+def is_unreachable(error) -> bool:
+    """
+    Tells whether an IntelOwl client error means the instance is down rather than the request is wrong
+    """
+    import requests
+
+    for cause in (error, *error.args, error.__cause__, error.__context__):
+        if isinstance(cause, (requests.ConnectionError, requests.Timeout)):
+            return True
+
+        status_code = getattr(getattr(cause, 'response', None), 'status_code', None)
+        if status_code is not None:
+            return status_code >= 500
+
+    return False
+
+
+class PoolMember(object):
+
+    def __init__(self, index, client, weight=1.0):
+        self.index = index
+        self.client = client
+        self.url = client.instance.rstrip('/')
+        self.weight = weight
+        self.healthy = True
+        self.outstanding = {}
+
+    def load(self) -> float:
+        return len(self.outstanding) / self.weight
+
+
+class InstancePool(object):
+    """
+    IntelOwl client routing the jobs over several instances. Unhealthy instances, and instances of weight 0,
+    get no new job but their running jobs are still collected. The pool has no session of its own: only the
+    requests it routes are available.
+    """
+    def __init__(self, members, routing='least_outstanding', logger=None, outstanding_max_age=7200):
+        self.members = members
+        self.routing = routing
+        self.log = logger
+        self.outstanding_max_age = outstanding_max_age
+        self._lock = threading.Lock()
+
+    def _locate(self, job_id):
+        job_id = int(job_id)
+        index = job_id // JOB_ID_STRIDE
+        if index >= len(self.members):
+            raise IntelOwlClientException(f'Job {job_id} belongs to an IntelOwl instance no longer configured')
+
+        return self.members[index], job_id % JOB_ID_STRIDE
+
+    def _pick(self, excluded):
+        with self._lock:
+            now = time.monotonic()
+            for member in self.members:
+                # Jobs collected by another process never get finished here
+                member.outstanding = {job_id: submitted_at for job_id, submitted_at in member.outstanding.items()
+                                      if now - submitted_at < self.outstanding_max_age}
+
+            candidates = [member for member in self.members
+                          if member.healthy and member.weight > 0 and member.index not in excluded]
+            if not candidates:
+                return None
+
+            if self.routing == 'weighted':
+                return random.choices(candidates, weights=[member.weight for member in candidates])[0]
+
+            return min(candidates, key=lambda member: (member.load(), member.index))
+
+    def set_health(self, member, healthy):
+        if member.healthy != healthy and self.log is not None:
+            if healthy:
+                self.log.info(f'IntelOwl instance {member.url} is back, routing jobs to it again')
+            else:
+                self.log.warning(f'IntelOwl instance {member.url} is unhealthy, draining it')
+        member.healthy = healthy
+
+    def _route(self, submit):
+        """
+        Calls submit(client) on the instance picked for new jobs, failing over to the next one when it is down
+
+        :return: Tuple (member, result)
+        """
+        excluded = set()
+        error = None
+        while True:
+            member = self._pick(excluded)
+            if member is None:
+                raise error or IntelOwlClientException('No healthy IntelOwl instance available')
+
+            try:
+                return member, submit(member.client)
+            except IntelOwlClientException as e:
+                if not is_unreachable(e):
+                    raise
+                self.set_health(member, False)
+                excluded.add(member.index)
+                error = e
+
+    def _track(self, member, instance_job_id):
+        job_id = member.index * JOB_ID_STRIDE + int(instance_job_id)
+        with self._lock:
+            member.outstanding[job_id] = time.monotonic()
+        return job_id
+
+    def _submit(self, method_name, **kwargs):
+        member, response = self._route(lambda client: getattr(client, method_name)(**kwargs))
+        response = dict(response)
+        response["job_id"] = self._track(member, response["job_id"])
+        return response
+
+    def submit_playbook_batch(self, classification, observables, playbook_name, tags_labels=None):
+        from iris_intelowl_module_2.intelowl_handler.batch import submit_playbook_batch
+
+        member, job_ids = self._route(lambda client: submit_playbook_batch(client, classification, observables,
+                                                                           playbook_name, tags_labels))
+        return [None if job_id is None else self._track(member, job_id) for job_id in job_ids]
+
+    def upload_sample(self, path, filename, playbook_name, tags_labels=None, tlp="CLEAR", timeout=600):
+        from iris_intelowl_module_2.intelowl_handler.samples import upload_sample
+
+        member, job_id = self._route(lambda client: upload_sample(client, path, filename, playbook_name,
+                                                                  tags_labels, tlp, timeout))
+        return self._track(member, job_id)
+
+    def find_file_job(self, md5, playbook_name, minutes_ago=None):
+        from iris_intelowl_module_2.intelowl_handler.samples import find_file_job
+
+        for member in self.members:
+            try:
+                job_id = find_file_job(member.client, md5, playbook_name, minutes_ago)
+            except Exception:
+                if self.log is not None:
+                    self.log.warning(f'Could not look up the sample on IntelOwl instance {member.url}')
+                continue
+
+            if job_id is not None:
+                return member.index * JOB_ID_STRIDE + job_id
+
+        return None
+
+    def get_playbook_analyzers(self, playbook_name):
+        from iris_intelowl_module_2.intelowl_handler.batch import get_playbook_analyzers
+
+        _, analyzers = self._route(lambda client: get_playbook_analyzers(client, playbook_name))
+        return analyzers
+
+    def list_jobs(self, tag, page_size=100, max_pages=20, statuses=None):
+        from iris_intelowl_module_2.intelowl_handler.job_tags import list_jobs
+
+        jobs = []
+        for member in self.members:
+            try:
+                member_jobs = list_jobs(member.client, tag, page_size, max_pages, statuses)
+            except Exception:
+                if self.log is not None:
+                    self.log.warning(f'Could not list the jobs of IntelOwl instance {member.url}')
+                continue
+
+            for job in member_jobs:
+                job = dict(job)
+                job["id"] = member.index * JOB_ID_STRIDE + int(job["id"])
+                jobs.append(job)
+
+        return jobs
+
+    def _release(self, member, job_id):
+        with self._lock:
+            member.outstanding.pop(job_id, None)
+
+    def send_observable_analysis_playbook_request(self, **kwargs):
+        return self._submit('send_observable_analysis_playbook_request', **kwargs)
+
+    def send_observable_analysis_request(self, **kwargs):
+        return self._submit('send_observable_analysis_request', **kwargs)
+
+    def get_job_by_id(self, job_id):
+        member, instance_job_id = self._locate(job_id)
+        job = dict(member.client.get_job_by_id(instance_job_id))
+        if job.get("status") not in _UNFINISHED:
+            self._release(member, int(job_id))
+
+        job["id"] = int(job_id)
+        job["job_url"] = f'{member.url}/jobs/{instance_job_id}'
+        return job
+
+    def kill_running_job(self, job_id):
+        member, instance_job_id = self._locate(job_id)
+        self._release(member, int(job_id))
+        return member.client.kill_running_job(instance_job_id)
+
+    def kill_running_analyzer(self, job_id, analyzer_name):
+        member, instance_job_id = self._locate(job_id)
+        return member.client.kill_running_analyzer(instance_job_id, analyzer_name)
+
+    def check_health(self, timeout=10):
+        """
+        Probes every instance with an authenticated request, draining those that fail
+        """
+        for member in self.members:
+            try:
+                response = member.client.session.get(f'{member.url}/api/jobs', params={"page_size": 1},
+                                                     timeout=timeout)
+                healthy = 200 <= response.status_code < 300
+            except Exception:
+                if self.log is not None:
+                    self.log.debug(traceback.format_exc())
+                healthy = False
+
+            self.set_health(member, healthy)
+
+
+class HealthChecker(threading.Thread):
+    """
+    Background thread periodically checking the instances of a pool
+    """
+    def __init__(self, pool, interval=30):
+        super().__init__(name="intelowl-health-checker", daemon=True)
+        self.pool = pool
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self.pool.check_health()
+
+
+_pool = None
+_pool_key = None
+_checker = None
+_lock = threading.Lock()
+
+
+def get_instance_pool(mod_config, make_client, logger) -> InstancePool:
+    """
+    Returns the process-wide pool of the configured IntelOwl instances, and keeps its health checker running
+
+    :param mod_config: Module configuration
+    :param make_client: Callable (url, key) -> IntelOwl client
+    :param logger: Logger
+    :return: InstancePool
+    """
+    global _pool, _pool_key, _checker
+
+    key = (mod_config.get('intelowl_url'), mod_config.get('intelowl_key'), mod_config.get('intelowl_instances'),
+           mod_config.get('intelowl_routing'))
+    interval = mod_config.get('intelowl_health_check_interval') or 30
+
+    with _lock:
+        if _pool is None or _pool_key != key:
+            instances = [(mod_config.get('intelowl_url'), mod_config.get('intelowl_key'), 1.0)]
+            instances.extend(parse_instances(mod_config.get('intelowl_instances')))
+            members = [PoolMember(index, make_client(url, api_key), weight)
+                       for index, (url, api_key, weight) in enumerate(instances)]
+
+            _pool = InstancePool(members, mod_config.get('intelowl_routing') or 'least_outstanding', logger)
+            _pool_key = key
+            if _checker is not None:
+                _checker.stop()
+            _checker = None
+
+        if _checker is None or not _checker.is_alive():
+            _checker = HealthChecker(_pool, interval)
+            _checker.start()
+
+    return _pool
@@ -9,29 +9,86 @@
 #  License Apache Software License 3.0
 
 
+import os
 import traceback
-from jinja2 import Template
+import uuid
+from datetime import datetime, timedelta, timezone
+from html import escape
 
 import iris_interface.IrisInterfaceStatus as InterfaceStatus
 from app.datamgmt.manage.manage_attribute_db import add_tab_attribute_field
 
 from pyintelowl import IntelOwl, IntelOwlClientException
-from time import sleep
+from iris_intelowl_module_2.intelowl_handler.batch import get_playbook_analyzers, submit_playbook_batch
+from iris_intelowl_module_2.intelowl_handler.budget import Deadline
+from iris_intelowl_module_2.intelowl_handler.completion_listener import get_completion_registry
+from iris_intelowl_module_2.intelowl_handler.instance_pool import get_instance_pool
+from iris_intelowl_module_2.intelowl_handler.job_tags import (BASE_TAG, UNFINISHED_STATUSES, batch_tag, case_tag,
+                                                              get_received_time, list_jobs)
+from iris_intelowl_module_2.intelowl_handler.normalize import normalize_observable
+from iris_intelowl_module_2.intelowl_handler.prefetch import derive_observables
+from iris_intelowl_module_2.intelowl_handler.prefilter import get_prefilter
+from iris_intelowl_module_2.intelowl_handler.refresh_ahead import get_hot_observables
+from iris_intelowl_module_2.intelowl_handler.render_pool import submit_render
+from iris_intelowl_module_2.intelowl_handler.replay import RecordingClient, get_replay_client
+from iris_intelowl_module_2.intelowl_handler.report_reuse import (REPORT_TAB, REPORT_FIELD, ENRICHED_AT_FIELD,
+                                                                 PLAYBOOK_FIELD)
+from iris_intelowl_module_2.intelowl_handler.result_cache import get_result_cache, make_key
+from iris_intelowl_module_2.intelowl_handler.retry_queue import get_state_dir
+from iris_intelowl_module_2.intelowl_handler.samples import (find_file_job, find_sample, get_hash_algorithm, hash_file,
+                                                             is_file_hash_type, split_file_ioc, upload_sample)
+from iris_intelowl_module_2.intelowl_handler.summary import extract_summary
+from iris_intelowl_module_2.intelowl_handler.templates import get_template
+from time import monotonic, sleep, time
+
+
+SUMMARY_TAB = 'IntelOwl Summary'
+NEGATIVE_NAMESPACE = 'negative'
+ANALYZER_NAMESPACE = 'analyzer'
+PLAYBOOK_NAMESPACE = 'playbook'
+JOB_NAMESPACE = 'job'
+FILE_IOC_TYPES = ('file', 'attachment', 'malware-sample')
+# Failed analyzers are usually transient (rate limit, outage), they are only kept out of the next few hooks
+FAILED_ANALYZER_TTL = 5 * 60
 
 
 class IntelowlHandler(object):
-    def __init__(self, mod_config, server_config, logger):
+    def __init__(self, mod_config, server_config, logger, retry_queue=None, deadline=None, resume_job_ids=None):
         self.mod_config = mod_config
         self.server_config = server_config
-        self.intelowl = self.get_intelowl_instance()
         self.log = logger
+        self.intelowl = self.get_intelowl_instance()
+        self.retry_queue = retry_queue
+        self.deadline = deadline or Deadline()
+        self.resume_job_ids = resume_job_ids or {}
+        self.pending_retries = []
+        self._jobs = {}
+        self._submitted = {}
+        self._pending_renders = []
+        self.batch_id = uuid.uuid4().hex[:12]
+        self._batch_job_ids = set()
+        self._collected = {}
+        self._job_started_at = {}
+        self._enriched_observables = set()
+        self._derived_observables = {}
 
     def get_intelowl_instance(self):
         """
-        Returns an intelowl API instance depending if the key is premium or not
+        Returns an intelowl API instance depending if the key is premium or not.
+        With additional instances configured, the instance is a pool routing the jobs over all of them.
+        In record mode the instance records its responses, in replay mode a recording stands in for IntelOwl.
 
         :return: IntelOwl Instance
         """
+        replay_mode = self.mod_config.get('intelowl_replay_mode') or 'off'
+        replay_file = self.mod_config.get('intelowl_replay_file') or \
+            os.path.join(get_state_dir(self.mod_config), 'intelowl_recording.jsonl.gz')
+
+        if replay_mode == 'replay':
+            time_scale = float(self.mod_config.get('intelowl_replay_time_scale') or 1)
+            self.log.warning(f'Replaying IntelOwl responses from {replay_file}')
+            return get_replay_client(replay_file, time_scale)
+
         url = self.mod_config.get('intelowl_url')
         key = self.mod_config.get('intelowl_key')
         should_use_proxy = self.mod_config.get('intelowl_should_use_proxy')
@@ -44,12 +101,22 @@ class IntelowlHandler(object):
             if self.server_config.get('https_proxy'):
                 proxies['http'] = self.server_config.get('HTTP_PROXY')
 
-        intelowl = IntelOwl(
-            key,
-            url,
-            certificate=None,
-            proxies=proxies
-        )
+        def make_client(instance_url, instance_key):
+            return IntelOwl(
+                instance_key,
+                instance_url,
+                certificate=None,
+                proxies=proxies
+            )
+
+        if self.mod_config.get('intelowl_instances'):
+            intelowl = get_instance_pool(self.mod_config, make_client, self.log)
+        else:
+            intelowl = make_client(url, key)
+
+        if replay_mode == 'record':
+            self.log.info(f'Recording IntelOwl responses to {replay_file}')
+            return RecordingClient(intelowl, replay_file)
 
         return intelowl
 
@@ -68,12 +135,17 @@ class IntelowlHandler(object):
             pre_render["nb_connector_reports"] = len(connector_reports)
 
         iol_report_id = intelowl_report.get("id")
-        if iol_report_id:
+        if intelowl_report.get("job_url"):
+            iol_report_link = intelowl_report["job_url"]
+        elif iol_report_id:
             iol_report_link = "/".join((self.mod_config.get("intelowl_url").strip("/"), "jobs", str(iol_report_id)))
         else:
             iol_report_link = ""
 
         pre_render["external_link"] = iol_report_link
+        pre_render["summary"] = self.get_summary(intelowl_report)
+        pre_render["timed_out"] = intelowl_report.get("timed_out", False)
+        pre_render["cut_off_analyzers"] = intelowl_report.get("cut_off_analyzers", [])
         
         # Add playbook name for display in banner
         if playbook_name:
@@ -105,23 +177,49 @@ class IntelowlHandler(object):
         
         return playbook_banner + rendered_html
 
-    def gen_domain_report_from_template(self, html_template, intelowl_report, playbook_name=None) -> InterfaceStatus:
+    def _add_timeout_banner(self, rendered_html: str, intelowl_report: dict) -> str:
         """
-        Generates an HTML report for Domain, displayed as an attribute in the IOC
+        Add a warning banner at the top of the rendered HTML report when the job did not finish in time
 
-        :param html_template: A string representing the HTML template
+        :param rendered_html: The rendered HTML content
+        :param intelowl_report: The JSON report fetched with intelowl API
+        :return: HTML with timeout banner prepended
+        """
+        if not intelowl_report.get("timed_out"):
+            return rendered_html
+
+        cut_off = ", ".join(escape(str(name)) for name in intelowl_report.get("cut_off_analyzers") or [])
+        timeout_banner = f'''
+<div class="alert alert-warning" role="alert" style="margin-bottom: 20px; border-left: 4px solid #ffc107;">
+    <h5 class="alert-heading mb-2"><i class="fas fa-hourglass-end"></i> Partial results</h5>
+    <p class="mb-0">The IntelOwl job did not finish within the maximum job time.</p>
+    {f'<p class="mb-0">Analyzers cut off: <strong>{cut_off}</strong></p>' if cut_off else ''}
+</div>
+'''
+
+        return timeout_banner + rendered_html
+
+    def _gen_report_from_template(self, html_template, intelowl_report, playbook_name=None,
+                                  classification="generic") -> InterfaceStatus:
+        """
+        Generates an HTML report, displayed as an attribute in the IOC.
+        Templates are compiled once per process, see templates.get_template.
+
+        :param html_template: A string representing the HTML template, empty for the packaged default
         :param intelowl_report: The JSON report fetched with intelowl API
         :param playbook_name: Name of the playbook used
+        :param classification: IntelOwl observable classification, selects the packaged default template
         :return: InterfaceStatus
         """
-        template = Template(html_template)
         pre_render = self.prerender_report(intelowl_report, playbook_name)
 
         try:
-            rendered = template.render(pre_render)
+            template = get_template(self.mod_config, html_template, classification)
+            rendered = template.render(pre_render, _tojson_memo={})
             # Add playbook banner if playbook name is provided
             if playbook_name:
                 rendered = self._add_playbook_banner(rendered, playbook_name)
+            rendered = self._add_timeout_banner(rendered, intelowl_report)
 
         except Exception:
 
@@ -130,30 +228,27 @@ class IntelowlHandler(object):
 
         return InterfaceStatus.I2Success(data=rendered)
 
-    def gen_ip_report_from_template(self, html_template, intelowl_report, playbook_name=None) -> InterfaceStatus:
+    def gen_domain_report_from_template(self, html_template, intelowl_report, playbook_name=None) -> InterfaceStatus:
         """
-        Generates an HTML report for IP, displayed as an attribute in the IOC
+        Generates an HTML report for Domain, displayed as an attribute in the IOC
 
         :param html_template: A string representing the HTML template
         :param intelowl_report: The JSON report fetched with intelowl API
         :param playbook_name: Name of the playbook used
         :return: InterfaceStatus
         """
-        template = Template(html_template)
-        pre_render = self.prerender_report(intelowl_report, playbook_name)
-
-        try:
-            rendered = template.render(pre_render)
-            # Add playbook banner if playbook name is provided
-            if playbook_name:
-                rendered = self._add_playbook_banner(rendered, playbook_name)
+        return self._gen_report_from_template(html_template, intelowl_report, playbook_name, "domain")
 
-        except Exception:
-
-            self.log.error(traceback.format_exc())
-            return InterfaceStatus.I2Error(traceback.format_exc())
+    def gen_ip_report_from_template(self, html_template, intelowl_report, playbook_name=None) -> InterfaceStatus:
+        """
+        Generates an HTML report for IP, displayed as an attribute in the IOC
 
-        return InterfaceStatus.I2Success(data=rendered)
+        :param html_template: A string representing the HTML template
+        :param intelowl_report: The JSON report fetched with intelowl API
+        :param playbook_name: Name of the playbook used
+        :return: InterfaceStatus
+        """
+        return self._gen_report_from_template(html_template, intelowl_report, playbook_name, "ip")
 
     def gen_url_report_from_template(self, html_template, intelowl_report, playbook_name=None) -> InterfaceStatus:
         """
@@ -164,21 +259,7 @@ class IntelowlHandler(object):
         :param playbook_name: Name of the playbook used
         :return: InterfaceStatus
         """
-        template = Template(html_template)
-        pre_render = self.prerender_report(intelowl_report, playbook_name)
-
-        try:
-            rendered = template.render(pre_render)
-            # Add playbook banner if playbook name is provided
-            if playbook_name:
-                rendered = self._add_playbook_banner(rendered, playbook_name)
-
-        except Exception:
-
-            self.log.error(traceback.format_exc())
-            return InterfaceStatus.I2Error(traceback.format_exc())
-
-        return InterfaceStatus.I2Success(data=rendered)
+        return self._gen_report_from_template(html_template, intelowl_report, playbook_name, "url")
 
     def gen_hash_report_from_template(self, html_template, intelowl_report, playbook_name=None) -> InterfaceStatus:
         """
@@ -189,21 +270,7 @@ class IntelowlHandler(object):
         :param playbook_name: Name of the playbook used
         :return: InterfaceStatus
         """
-        template = Template(html_template)
-        pre_render = self.prerender_report(intelowl_report, playbook_name)
-
-        try:
-            rendered = template.render(pre_render)
-            # Add playbook banner if playbook name is provided
-            if playbook_name:
-                rendered = self._add_playbook_banner(rendered, playbook_name)
-
-        except Exception:
-
-            self.log.error(traceback.format_exc())
-            return InterfaceStatus.I2Error(traceback.format_exc())
-
-        return InterfaceStatus.I2Success(data=rendered)
+        return self._gen_report_from_template(html_template, intelowl_report, playbook_name, "hash")
 
     def gen_generic_report_from_template(self, html_template, intelowl_report, playbook_name=None) -> InterfaceStatus:
         """
@@ -214,29 +281,21 @@ class IntelowlHandler(object):
         :param playbook_name: Name of the playbook used
         :return: InterfaceStatus
         """
-        template = Template(html_template)
-        pre_render = self.prerender_report(intelowl_report, playbook_name)
-
-        try:
-            rendered = template.render(pre_render)
-            # Add playbook banner if playbook name is provided
-            if playbook_name:
-                rendered = self._add_playbook_banner(rendered, playbook_name)
-
-        except Exception:
-
-            self.log.error(traceback.format_exc())
-            return InterfaceStatus.I2Error(traceback.format_exc())
-
-        return InterfaceStatus.I2Success(data=rendered)
+        return self._gen_report_from_template(html_template, intelowl_report, playbook_name, "generic")
 
     def get_job_result(self, job_id):
         """
-        Periodically fetches job status until it's finished to get the results
+        Periodically fetches job status until it's finished to get the results.
+        When the completion listener is enabled, the job is fetched as soon as its completion is pushed,
+        and polling only remains as a slower fallback.
 
         :param job_id: Union[int, str], The job ID to query
         :return:
         """
+        job_result = self._collected.pop(job_id, None)
+        if job_result is not None:
+            return job_result
+
         try:
             max_job_time = self.mod_config.get("intelowl_maxtime") * 60
         except Exception:
@@ -244,287 +303,1227 @@ class IntelowlHandler(object):
             return InterfaceStatus.I2Error(traceback.format_exc())
 
         wait_interval = 2
+        completions = self._get_completions()
+        if completions is not None:
+            wait_interval = self.mod_config.get('intelowl_completion_fallback_interval') or 30
 
         job_result = self.intelowl.get_job_by_id(job_id)
         status = job_result["status"]
 
-        spent_time = 0
-        while (status == "pending" or status == "running") and spent_time <= max_job_time:
-            sleep(wait_interval)
-            spent_time += wait_interval
+        # A job already waited for by collect_submitted keeps its elapsed time
+        started_at = self._job_started_at.pop(job_id, monotonic())
+        while (status == "pending" or status == "running") and monotonic() - started_at <= max_job_time:
+            remaining = self.deadline.remaining()
+            if remaining is not None and remaining <= 0:
+                # The hook budget is spent: leave the job running, it is collected later
+                job_result["deferred"] = True
+                return job_result
+
+            interval = wait_interval if remaining is None else min(wait_interval, remaining)
+            if completions is not None:
+                completions.wait(job_id, interval)
+            else:
+                sleep(interval)
+
             job_result = self.intelowl.get_job_by_id(job_id)
             status = job_result["status"]
 
+        if status == "pending" or status == "running":
+            job_result = self.cancel_timed_out_job(job_id, job_result)
+
         return job_result
 
-    def handle_domain(self, ioc):
+    def collect_submitted(self):
         """
-        Handles an IOC of type domain and adds IntelOwl insights
+        Waits for the jobs of the chunk submitted by presubmit or picked up by adopt_jobs, all in one loop.
+        Each round costs one list query of the unfinished jobs of the batch tag, and one fetch per job that
+        finished since. Jobs left running when the wait ends, at intelowl_maxtime or when the hook budget is
+        spent, are handled by handle_ioc as usual.
+
+        :return: Nothing
+        """
+        if not self.mod_config.get('intelowl_job_tagging_enabled'):
+            return
+
+        waiting = {job_id for job_id in self._submitted.values() if job_id not in self._collected}
+        max_job_time = (self.mod_config.get("intelowl_maxtime") or 0) * 60
+        started_at = monotonic()
+        for job_id in waiting:
+            self._job_started_at.setdefault(job_id, started_at)
+
+        while waiting:
+            try:
+                running = {int(job["id"]) for job in list_jobs(self.intelowl, batch_tag(self.batch_id),
+                                                                statuses=UNFINISHED_STATUSES)}
+            except Exception as e:
+                # e.g a client without list queries: the jobs are polled one by one
+                self.log.warning(f'Could not list the jobs of batch {self.batch_id}: {e}')
+                return
+
+            # Adopted jobs carry the tag of an older batch, they are fetched every round
+            for job_id in [job_id for job_id in waiting
+                           if job_id not in self._batch_job_ids or int(job_id) not in running]:
+                try:
+                    job_result = self.intelowl.get_job_by_id(job_id)
+                except IntelOwlClientException as e:
+                    self.log.error(e)
+                    waiting.discard(job_id)
+                    continue
+
+                if job_result.get("status") not in UNFINISHED_STATUSES:
+                    self._collected[job_id] = job_result
+                    waiting.discard(job_id)
+
+            remaining = self.deadline.remaining()
+            if not waiting or monotonic() - started_at > max_job_time or (remaining is not None and remaining <= 0):
+                return
+
+            sleep(2 if remaining is None else min(2, remaining))
+
+    def get_tags(self, ioc=None) -> list:
+        """
+        Returns the labels of the jobs submitted for an IOC: iris, plus the batch and case tags when job
+        tagging is enabled
 
         :param ioc: IOC instance
-        :return: IIStatus
+        :return: List of tag labels
         """
+        if not self.mod_config.get('intelowl_job_tagging_enabled'):
+            return [BASE_TAG]
 
-        self.log.info(f'Getting domain report for {ioc.ioc_value}')
+        tags = [BASE_TAG, batch_tag(self.batch_id)]
+        case_id = getattr(ioc, 'case_id', None)
+        if case_id is not None:
+            tags.append(case_tag(case_id))
+
+        return tags
+
+    def _track_job(self, job_id):
+        if job_id is not None and self.mod_config.get('intelowl_job_tagging_enabled'):
+            self._batch_job_ids.add(job_id)
+
+    def adopt_jobs(self, iocs):
+        """
+        Picks up the jobs a previous run left in IntelOwl for the IOCs of a chunk, e.g when the worker restarted
+        during a hook. Jobs of the same case, observable and playbook received less than intelowl_maxtime ago
+        are collected instead of submitted again. Costs one list query per case.
+
+        :param iocs: IOC instances
+        :return: Nothing
+        """
+        if not self.mod_config.get('intelowl_job_tagging_enabled'):
+            return
 
-        domain = ioc.ioc_value
         playbook_name = self.mod_config.get("intelowl_playbook_name")
+        max_age = timedelta(minutes=self.mod_config.get("intelowl_maxtime") or 0)
+
+        wanted = {}
+        for ioc in iocs:
+            case_id = getattr(ioc, 'case_id', None)
+            classification = self.get_classification(ioc)
+            if case_id is None or classification == 'file' or ioc.ioc_id in self.resume_job_ids:
+                continue
+
+            wanted.setdefault(case_id, set()).add((classification,
+                                                   normalize_observable(classification, ioc.ioc_value)))
+
+        now = datetime.now(timezone.utc)
+        for case_id, observables in wanted.items():
+            try:
+                jobs = list_jobs(self.intelowl, case_tag(case_id))
+            except Exception as e:
+                self.log.warning(f'Could not list the jobs of case {case_id}: {e}')
+                continue
+
+            for job in jobs:
+                received = get_received_time(job)
+                if received is None or now - received > max_age or job.get("status") in ("failed", "killed"):
+                    continue
+
+                job_playbook = job.get("playbook_requested")
+                if isinstance(job_playbook, dict):
+                    job_playbook = job_playbook.get("name")
+
+                key = (job.get("observable_classification"), job.get("observable_name"))
+                job_key = (*key, playbook_name)
+                if job_playbook == playbook_name and key in observables and job_key not in self._submitted:
+                    self.log.info(f'Collecting IntelOwl job {job["id"]} of {key[1]} left by a previous run')
+                    self._submitted[job_key] = int(job["id"])
+
+    def _get_completions(self):
+        """
+        Returns the registry of pushed job completions, if the completion listener is enabled
+
+        :return: CompletionRegistry or None
+        """
+        if not self.mod_config.get('intelowl_completion_listener_enabled'):
+            return None
+
         try:
-            query_result = self.intelowl.send_observable_analysis_playbook_request(observable_name=domain,
-                                                                                   playbook_requested=playbook_name,
-                                                                                   tags_labels=["iris"],
-                                                                                   observable_classification="domain")
-        except IntelOwlClientException as e:
-            self.log.error(e)
-            return InterfaceStatus.I2Error(e)
+            return get_completion_registry(self.mod_config, self.log)
+        except Exception:
+            self.log.error(traceback.format_exc())
+            return None
+
+    @staticmethod
+    def get_unfinished_analyzers(job_result) -> list:
+        """
+        Lists the analyzers of a job which have not completed yet
+
+        :param job_result: Job as returned by the IntelOwl API
+        :return: List of analyzer names
+        """
+        unfinished = []
+        reported = set()
+        for analyzer_report in job_result.get("analyzer_reports") or []:
+            reported.add(analyzer_report.get("name"))
+            if str(analyzer_report.get("status", "")).lower() in ("pending", "running"):
+                unfinished.append(analyzer_report.get("name"))
+
+        for analyzer_name in job_result.get("analyzers_to_execute") or []:
+            if analyzer_name not in reported:
+                unfinished.append(analyzer_name)
+
+        return unfinished
+
+    def cancel_timed_out_job(self, job_id, job_result) -> dict:
+        """
+        Applies the configured timeout action on a job still running after intelowl_maxtime, so abandoned jobs
+        do not keep IntelOwl analyzers busy. The returned job holds the partial results and lists the
+        analyzers that were cut off.
+
+        :param job_id: Union[int, str], The job ID
+        :param job_result: Last job status fetched
+        :return: Job result
+        """
+        action = self.mod_config.get("intelowl_timeout_action") or "none"
+        cut_off = self.get_unfinished_analyzers(job_result)
+
+        if action == "kill_job":
+            self.log.warning(f'Killing IntelOwl job {job_id} after timeout')
+            try:
+                self.intelowl.kill_running_job(job_id)
+            except IntelOwlClientException as e:
+                self.log.error(e)
+
+        elif action == "kill_analyzers":
+            for analyzer_name in cut_off:
+                self.log.warning(f'Killing analyzer {analyzer_name} of IntelOwl job {job_id} after timeout')
+                try:
+                    self.intelowl.kill_running_analyzer(job_id, analyzer_name)
+                except IntelOwlClientException as e:
+                    self.log.error(e)
+
+        elif action != "none":
+            self.log.error(f'Unknown timeout action {action}, leaving job {job_id} running')
+
+        if action in ("kill_job", "kill_analyzers"):
+            try:
+                job_result = self.intelowl.get_job_by_id(job_id)
+            except IntelOwlClientException as e:
+                self.log.error(e)
+
+        job_result["timed_out"] = True
+        job_result["cut_off_analyzers"] = cut_off
+
+        return job_result
 
-        job_id = query_result.get("job_id")
+    def _schedule_retry(self, ioc, classification, playbook_name, reason, job_id=None) -> bool:
+        """
+        Queues a failed enrichment so the retry drainer picks it up later
+
+        :param ioc: IOC instance
+        :param classification: IntelOwl observable classification
+        :param playbook_name: Name of the playbook requested
+        :param reason: Why the enrichment failed
+        :param job_id: IntelOwl job still running, collected by the retry instead of submitting again
+        :return: True if the IOC was queued
+        """
+        self.pending_retries.append(ioc.ioc_id)
+        if self.retry_queue is None:
+            return False
 
         try:
-            job_result = self.get_job_result(job_id)
-        except IntelOwlClientException as e:
-            self.log.error(e)
-            return InterfaceStatus.I2Error(e)
+            self.retry_queue.enqueue(ioc.ioc_id, ioc.ioc_value, classification, playbook_name, str(reason), job_id)
+            self.log.info(f'Queued {ioc.ioc_value} for a later IntelOwl retry')
+        except Exception:
+            self.log.error(traceback.format_exc())
+            return False
 
-        if self.mod_config.get('intelowl_report_as_attribute') is True:
-            self.log.info('Adding new attribute IntelOwl Domain Report to IOC')
+        return True
 
-            report = job_result
+    def _defer(self, ioc, classification, playbook_name, job_id=None) -> InterfaceStatus:
+        """
+        Hands an IOC left over by an exhausted hook time budget to the retry queue
 
-            status = self.gen_domain_report_from_template(self.mod_config.get('intelowl_domain_report_template'),
-                                                          report, playbook_name)
+        :param ioc: IOC instance
+        :param classification: IntelOwl observable classification
+        :param playbook_name: Name of the playbook requested
+        :param job_id: IntelOwl job already running for the IOC, if any
+        :return: IIStatus
+        """
+        self.log.warning(f'Hook time budget exhausted, deferring {ioc.ioc_value}')
+        if self._schedule_retry(ioc, classification, playbook_name, 'Hook time budget exhausted', job_id):
+            return InterfaceStatus.I2Success()
 
-            if not status.is_success():
-                return status
+        return InterfaceStatus.I2Error(f'Hook time budget exhausted before {ioc.ioc_value} was enriched')
+
+    def get_skip_reason(self, classification, observable):
+        """
+        Checks the observable against the local prefilter (non-routable IPs and allow-lists)
+
+        :param classification: IntelOwl observable classification
+        :param observable: Observable value
+        :return: The reason why the observable is skipped, or None
+        """
+        if not self.mod_config.get('intelowl_prefilter_enabled'):
+            return None
+
+        try:
+            return get_prefilter(self.mod_config, self.log).match(classification, observable)
+        except Exception:
+            self.log.error(traceback.format_exc())
+            return None
+
+    def _annotate_skipped(self, ioc, reason) -> InterfaceStatus:
+        """
+        Short-circuits the enrichment of a filtered IOC, with a lightweight attribute explaining why
 
-            rendered_report = status.get_data()
+        :param ioc: IOC instance
+        :param reason: Why the IOC is skipped
+        :return: IIStatus
+        """
+        self.log.info(f'Skipping IntelOwl analysis: {reason}')
 
+        if self.mod_config.get('intelowl_report_as_attribute') is True:
             try:
-                add_tab_attribute_field(ioc, tab_name='IntelOwl Report', field_name="HTML report", field_type="html",
-                                        field_value=rendered_report)
+                add_tab_attribute_field(ioc, tab_name=REPORT_TAB, field_name="Skipped",
+                                        field_type="input_string", field_value=reason)
 
             except Exception:
 
                 self.log.error(traceback.format_exc())
                 return InterfaceStatus.I2Error(traceback.format_exc())
-        else:
-            self.log.info('Skipped adding attribute report. Option disabled')
 
         return InterfaceStatus.I2Success()
 
-    def handle_ip(self, ioc):
+    @staticmethod
+    def is_rejection(error) -> bool:
         """
-        Handles an IOC of type ip and adds IntelOwl insights
+        Tells whether an IntelOwl client error is a rejection of the request, worth remembering,
+        rather than a transient failure (connection error, timeout, server error). An error without
+        a response status is not taken for a rejection.
+
+        :param error: IntelOwlClientException
+        :return: bool
+        """
+        import requests
+
+        for cause in (error, *error.args, error.__cause__, error.__context__):
+            if isinstance(cause, (requests.ConnectionError, requests.Timeout)):
+                return False
+
+            status_code = getattr(getattr(cause, 'response', None), 'status_code', None)
+            if status_code is not None:
+                return 400 <= status_code < 500
+
+        return False
+
+    @staticmethod
+    def is_empty_result(job_result) -> bool:
+        """
+        Tells whether a finished job holds no data at all: every analyzer failed or reported nothing
+
+        :param job_result: Job as returned by the IntelOwl API
+        :return: bool
+        """
+        if job_result.get("status") in ("pending", "running") or job_result.get("timed_out"):
+            return False
+
+        for analyzer_report in job_result.get("analyzer_reports") or []:
+            if str(analyzer_report.get("status", "")).upper() == "SUCCESS" and analyzer_report.get("report"):
+                return False
+
+        return True
+
+    @staticmethod
+    def has_failed_analyzers(job_result) -> bool:
+        """
+        Tells whether some analyzers of a job failed or were killed, in which case its lack of data
+        says nothing about the observable
+
+        :param job_result: Job as returned by the IntelOwl API
+        :return: bool
+        """
+        return any(str(analyzer_report.get("status", "")).upper() in ("FAILED", "KILLED")
+                   for analyzer_report in job_result.get("analyzer_reports") or [])
+
+    def _get_negative(self, classification, observable, playbook_name):
+        """
+        Looks up the negative cache of observables IntelOwl rejected or had no data for
+
+        :return: Cached outcome dict with kind and reason, or None
+        """
+        if not self.mod_config.get('intelowl_negative_cache_ttl'):
+            return None
+
+        try:
+            return get_result_cache(self.mod_config).get(NEGATIVE_NAMESPACE,
+                                                         make_key(classification, observable, playbook_name))
+        except Exception:
+            self.log.error(traceback.format_exc())
+            return None
+
+    def _put_negative(self, classification, observable, playbook_name, kind, reason):
+        ttl = self.mod_config.get('intelowl_negative_cache_ttl')
+        if not ttl:
+            return
+
+        try:
+            get_result_cache(self.mod_config).put(NEGATIVE_NAMESPACE,
+                                                  make_key(classification, observable, playbook_name),
+                                                  {"kind": kind, "reason": reason}, ttl * 60)
+        except Exception:
+            self.log.error(traceback.format_exc())
+
+    def _handle_negative(self, ioc, negative) -> InterfaceStatus:
+        """
+        Replays a cached failure without contacting IntelOwl
 
         :param ioc: IOC instance
+        :param negative: Cached outcome, see _get_negative
         :return: IIStatus
         """
+        self.log.info(f'Negative cache hit for {ioc.ioc_value}')
+        if negative.get("kind") == "empty":
+            return self._annotate_skipped(ioc, negative.get("reason"))
 
-        self.log.info(f'Getting IP report for {ioc.ioc_value}')
+        self.log.error(negative.get("reason"))
+        return InterfaceStatus.I2Error(negative.get("reason"))
+
+    def get_playbook_analyzers(self, playbook_name) -> list:
+        """
+        Returns the analyzers run by a playbook, cached for an hour
+
+        :param playbook_name: Name of the playbook
+        :return: List of analyzer names
+        """
+        cache = get_result_cache(self.mod_config)
+        analyzers = cache.get(PLAYBOOK_NAMESPACE, playbook_name)
+        if analyzers is None:
+            analyzers = get_playbook_analyzers(self.intelowl, playbook_name)
+            cache.put(PLAYBOOK_NAMESPACE, playbook_name, analyzers, 3600)
+
+        return analyzers
+
+    def _get_cached_analyzers(self, classification, observable, playbook_name):
+        """
+        Splits the analyzers of the playbook between those with a fresh cached report, or cached as not run on the
+        observable, and the missing ones
+
+        :return: Tuple (list of cached analyzer reports, list of missing analyzer names)
+        """
+        if not self.mod_config.get('intelowl_analyzer_cache_ttl'):
+            return [], []
+
+        try:
+            analyzers = self.get_playbook_analyzers(playbook_name)
+            cache = get_result_cache(self.mod_config)
+            cached_reports = []
+            missing_analyzers = []
+            for analyzer_name in analyzers:
+                report = cache.get(ANALYZER_NAMESPACE, make_key(classification, observable, analyzer_name))
+                if report is None:
+                    missing_analyzers.append(analyzer_name)
+                else:
+                    cached_reports.append(report)
+
+        except Exception:
+            self.log.error(traceback.format_exc())
+            return [], []
+
+        return cached_reports, missing_analyzers
+
+    def _put_cached_analyzers(self, classification, observable, job_result):
+        """
+        Caches the finished analyzer reports of a job, for any playbook running the same analyzers. Failed
+        analyzers are only cached for FAILED_ANALYZER_TTL, and the requested analyzers IntelOwl did not run on
+        the observable are cached as not run, so that they are not requested again on their own until the cache
+        expires.
+        """
+        ttl = self.mod_config.get('intelowl_analyzer_cache_ttl')
+        if not ttl or job_result.get("timed_out") or job_result.get("status") in UNFINISHED_STATUSES:
+            return
+
+        try:
+            cache = get_result_cache(self.mod_config)
+            reported = set()
+            for analyzer_report in job_result.get("analyzer_reports") or []:
+                reported.add(analyzer_report.get("name"))
+                status = str(analyzer_report.get("status", "")).upper()
+                if status == "SUCCESS":
+                    report_ttl = ttl * 60
+                elif status in ("FAILED", "KILLED"):
+                    report_ttl = min(ttl * 60, FAILED_ANALYZER_TTL)
+                else:
+                    continue
+
+                cache.put(ANALYZER_NAMESPACE, make_key(classification, observable, analyzer_report.get("name")),
+                          analyzer_report, report_ttl)
+
+            self._put_not_run_analyzers(classification, observable,
+                                        [analyzer_name for analyzer_name in job_result.get("analyzers_requested") or []
+                                         if isinstance(analyzer_name, str) and analyzer_name not in reported])
+        except Exception:
+            self.log.error(traceback.format_exc())
+
+    def _put_not_run_analyzers(self, classification, observable, analyzer_names):
+        ttl = self.mod_config.get('intelowl_analyzer_cache_ttl')
+        cache = get_result_cache(self.mod_config)
+        for analyzer_name in analyzer_names:
+            cache.put(ANALYZER_NAMESPACE, make_key(classification, observable, analyzer_name),
+                      {"name": analyzer_name, "status": "NOT_RUN", "not_run": True}, ttl * 60)
+
+    @staticmethod
+    def _make_cached_job(classification, observable, playbook_name) -> dict:
+        """
+        :return: A finished job without any report, completed with the cached analyzer reports
+        """
+        return {"id": None, "status": "reported_without_fails", "observable_name": observable,
+                "observable_classification": classification, "playbook_requested": playbook_name,
+                "analyzer_reports": [], "connector_reports": []}
+
+    def presubmit(self, iocs):
+        """
+        Submits the observables of a chunk that need a new job with one analyze request per classification and case,
+        of at most intelowl_submit_batch_size observables. handle_ioc then collects the jobs instead of
+        submitting the observables one by one. Observables of a failed batch are submitted one by one.
+        An observable shared by IOCs of several cases is submitted once, tagged with the case of its first IOC.
+
+        :param iocs: IOC instances
+        :return: Nothing
+        """
+        batch_size = self.mod_config.get('intelowl_submit_batch_size') or 0
+        if batch_size < 2:
+            return
 
-        ip = ioc.ioc_value
         playbook_name = self.mod_config.get("intelowl_playbook_name")
+
+        groups = {}
+        grouped = set()
+        for ioc in iocs:
+            classification = self.get_classification(ioc)
+            if classification == 'file' or ioc.ioc_id in self.resume_job_ids:
+                continue
+
+            observable = normalize_observable(classification, ioc.ioc_value)
+            job_key = (classification, observable, playbook_name)
+            group_key = (classification, getattr(ioc, 'case_id', None))
+            if job_key in self._jobs or job_key in self._submitted or job_key in grouped:
+                continue
+
+            if self.get_skip_reason(classification, observable) or \
+                    self._get_negative(classification, observable, playbook_name) is not None or \
+                    self._get_cached_job(classification, observable, playbook_name) is not None or \
+                    self._get_cached_analyzers(classification, observable, playbook_name)[0]:
+                continue
+
+            grouped.add(job_key)
+            groups.setdefault(group_key, {})[observable] = ioc
+
+        for (classification, _), iocs_by_observable in groups.items():
+            observables = list(iocs_by_observable)
+            tags = self.get_tags(next(iter(iocs_by_observable.values())))
+            for batch_start in range(0, len(observables), batch_size):
+                if self.deadline.expired():
+                    return
+
+                batch = observables[batch_start:batch_start + batch_size]
+                try:
+                    job_ids = submit_playbook_batch(self.intelowl, classification, batch, playbook_name,
+                                                    tags_labels=tags)
+                except Exception:
+                    self.log.error(traceback.format_exc())
+                    self.log.warning(f'Batch submission of {len(batch)} observables failed, '
+                                     f'submitting them one by one')
+                    continue
+
+                self.log.info(f'Submitted {len(batch)} {classification} observables in one request')
+                for observable, job_id in zip(batch, job_ids):
+                    if job_id is not None:
+                        self._submitted[(classification, observable, playbook_name)] = job_id
+                        self._track_job(job_id)
+
+    def _collect_derived(self, classification, observable, job_result):
+        if not self.mod_config.get('intelowl_prefetch_enabled'):
+            return
+
+        for derived in derive_observables(classification, observable, job_result):
+            self._derived_observables.setdefault(derived, None)
+
+    def get_derived_observables(self) -> list:
+        """
+        Returns the observables derived from the IOCs enriched by this handler, worth enriching ahead of their
+        IOC. Observables enriched by this handler are left out.
+
+        :return: List of (classification, observable), at most intelowl_prefetch_max_per_hook
+        """
+        max_count = self.mod_config.get('intelowl_prefetch_max_per_hook') or 20
+        return [derived for derived in self._derived_observables
+                if derived not in self._enriched_observables][:max_count]
+
+    def _get_cached_job(self, classification, observable, playbook_name):
+        """
+        :return: A fresh finished job of the observable, enriched for another IOC of any case, or ahead of its IOC
+                 by the prefetch or the refresh-ahead, or None
+        """
+        if not self.mod_config.get('intelowl_prefetch_enabled') and \
+                not self.mod_config.get('intelowl_refresh_enabled') and \
+                not self.mod_config.get('intelowl_reuse_max_age'):
+            return None
+
         try:
-            query_result = self.intelowl.send_observable_analysis_playbook_request(observable_name=ip,
-                                                                                   playbook_requested=playbook_name,
-                                                                                   tags_labels=["iris"],
-                                                                                   observable_classification="ip")
-        except IntelOwlClientException as e:
-            self.log.error(e)
-            return InterfaceStatus.I2Error(e)
+            return get_result_cache(self.mod_config).get(JOB_NAMESPACE, make_key(classification, observable,
+                                                                                 playbook_name))
+        except Exception:
+            self.log.error(traceback.format_exc())
+            return None
+
+    def _put_cached_job(self, classification, observable, playbook_name, job_result, ttl):
+        """
+        Caches a finished job for the future IOCs of the observable, stamped with the time it was enriched
+        """
+        job_result.setdefault("enriched_at", datetime.now(timezone.utc).isoformat())
+        get_result_cache(self.mod_config).put(JOB_NAMESPACE, make_key(classification, observable, playbook_name),
+                                              job_result, ttl)
 
-        job_id = query_result.get("job_id")
+    def _enrich_ahead(self, classification, observable, playbook_name, ttl) -> bool:
+        """
+        Runs the playbook on an observable outside of any hook, and caches the finished job for its future IOCs
 
+        :param classification: IntelOwl observable classification
+        :param observable: Normalized observable value
+        :param playbook_name: Name of the playbook
+        :param ttl: Time the job is cached, in seconds
+        :return: True if a job was cached
+        """
         try:
-            job_result = self.get_job_result(job_id)
+            query_result = self.intelowl.send_observable_analysis_playbook_request(
+                observable_name=observable,
+                playbook_requested=playbook_name,
+                tags_labels=self.get_tags(),
+                observable_classification=classification)
+            job_result = self.get_job_result(query_result.get("job_id"))
         except IntelOwlClientException as e:
-            self.log.error(e)
-            return InterfaceStatus.I2Error(e)
+            self.log.warning(f'Enrichment of {observable} ahead of its IOC failed: {e}')
+            return False
 
-        if self.mod_config.get('intelowl_report_as_attribute') is True:
-            self.log.info('Adding new attribute IntelOwl IP Report to IOC')
+        if not isinstance(job_result, dict) or job_result.get("status") in UNFINISHED_STATUSES or \
+                job_result.get("timed_out"):
+            return False
 
-            report = job_result
+        self._put_cached_analyzers(classification, observable, job_result)
+        if self.is_empty_result(job_result):
+            if not self.has_failed_analyzers(job_result):
+                self._put_negative(classification, observable, playbook_name, "empty",
+                                   f'No analyzer of {playbook_name} returned data for {observable}')
+            return False
 
-            status = self.gen_ip_report_from_template(self.mod_config.get('intelowl_ip_report_template'), report, playbook_name)
+        self._put_cached_job(classification, observable, playbook_name, job_result, ttl)
+        return True
 
-            if not status.is_success():
-                return status
+    def prefetch(self, classification, observable) -> bool:
+        """
+        Enriches a derived observable into the result cache, for the IOC analysts are likely to add next.
+        Called from the prefetcher thread.
 
-            rendered_report = status.get_data()
+        :param classification: IntelOwl observable classification
+        :param observable: Normalized observable value
+        :return: True if a job was cached
+        """
+        playbook_name = self.mod_config.get("intelowl_playbook_name")
+        if self.get_skip_reason(classification, observable) or \
+                self._get_negative(classification, observable, playbook_name) is not None or \
+                self._get_cached_job(classification, observable, playbook_name) is not None:
+            return False
 
-            try:
-                add_tab_attribute_field(ioc, tab_name='IntelOwl Report', field_name="HTML report", field_type="html",
-                                        field_value=rendered_report)
+        self.log.info(f'Prefetching IntelOwl analysis of {classification} {observable}')
+        return self._enrich_ahead(classification, observable, playbook_name,
+                                  (self.mod_config.get('intelowl_prefetch_ttl') or 60) * 60)
 
-            except Exception:
+    def refresh(self, classification, observable, playbook_name) -> bool:
+        """
+        Re-enriches a hot observable before its cached job expires. Called from the refresh-ahead scheduler.
 
-                self.log.error(traceback.format_exc())
-                return InterfaceStatus.I2Error(traceback.format_exc())
-        else:
-            self.log.info('Skipped adding attribute report. Option disabled')
+        :param classification: IntelOwl observable classification
+        :param observable: Normalized observable value
+        :param playbook_name: Name of the playbook
+        :return: True if the cached job was renewed
+        """
+        self.log.info(f'Refreshing IntelOwl analysis of hot {classification} {observable}')
+        ttl = (self.mod_config.get('intelowl_refresh_ttl') or 240) * 60
+        if not self._enrich_ahead(classification, observable, playbook_name, ttl):
+            return False
 
-        return InterfaceStatus.I2Success()
+        get_hot_observables(self.mod_config).set_expiry(classification, observable, playbook_name, time() + ttl)
+        return True
 
-    def handle_url(self, ioc):
+    @staticmethod
+    def is_reusable(job_result) -> bool:
         """
-        Handles an IOC of type URL and adds IntelOwl insights
+        Tells whether a job is finished with data, and worth handing to the other IOCs of its observable
 
-        :param ioc: IOC instance
-        :return: IIStatus
+        :param job_result: Job as returned by the IntelOwl API
+        :return: bool
         """
+        return isinstance(job_result, dict) and job_result.get("status") not in UNFINISHED_STATUSES and \
+            not job_result.get("timed_out") and not job_result.get("deferred") and \
+            not IntelowlHandler.is_empty_result(job_result)
 
-        self.log.info(f'Getting URL report for {ioc.ioc_value}')
+    def _share_job(self, classification, observable, playbook_name, job_result):
+        """
+        Caches a new job for intelowl_reuse_max_age hours, so IOCs of the same observable in any case reuse it.
+        The reused job is rendered again for each IOC, reports already attached to other IOCs are not looked up.
+        """
+        reuse_max_age = self.mod_config.get('intelowl_reuse_max_age')
+        if not reuse_max_age or not self.is_reusable(job_result):
+            return
 
-        url = ioc.ioc_value
-        playbook_name = self.mod_config.get("intelowl_playbook_name")
         try:
-            query_result = self.intelowl.send_observable_analysis_playbook_request(observable_name=url,
-                                                                                   playbook_requested=playbook_name,
-                                                                                   tags_labels=["iris"],
-                                                                                   observable_classification="url")
-        except IntelOwlClientException as e:
-            self.log.error(e)
-            return InterfaceStatus.I2Error(e)
+            self._put_cached_job(classification, observable, playbook_name, job_result, reuse_max_age * 3600)
+        except Exception:
+            self.log.error(traceback.format_exc())
 
-        job_id = query_result.get("job_id")
+    def _record_hit(self, classification, observable, playbook_name, job_result, from_job_cache):
+        """
+        Counts an enrichment for the refresh-ahead. The job of an observable turning hot is cached, so the
+        scheduler keeps it fresh from then on.
+        """
+        if not self.mod_config.get('intelowl_refresh_enabled'):
+            return
 
         try:
-            job_result = self.get_job_result(job_id)
-        except IntelOwlClientException as e:
-            self.log.error(e)
-            return InterfaceStatus.I2Error(e)
+            hot_observables = get_hot_observables(self.mod_config)
+            score = hot_observables.hit(classification, observable, playbook_name)
+            if from_job_cache or score < (self.mod_config.get('intelowl_refresh_min_hits') or 3) or \
+                    not self.is_reusable(job_result):
+                return
+
+            ttl = (self.mod_config.get('intelowl_refresh_ttl') or 240) * 60
+            self._put_cached_job(classification, observable, playbook_name, job_result, ttl)
+            hot_observables.set_expiry(classification, observable, playbook_name, time() + ttl)
+        except Exception:
+            self.log.error(traceback.format_exc())
+
+    def _enrich_observable(self, ioc, classification, report_name, template_key, gen_report):
+        """
+        Submits an observable to the configured playbook, waits for the job and attaches the report to the IOC.
+        Submission errors and timed-out jobs are handed to the retry queue when it is enabled.
+
+        :param ioc: IOC instance
+        :param classification: IntelOwl observable classification
+        :param report_name: Human name of the report, used in logs
+        :param template_key: Configuration key of the HTML template to render
+        :param gen_report: Method rendering the template
+        :return: IIStatus
+        """
+        observable = normalize_observable(classification, ioc.ioc_value)
+        playbook_name = self.mod_config.get("intelowl_playbook_name")
+
+        skip_reason = self.get_skip_reason(classification, observable)
+        if skip_reason:
+            return self._annotate_skipped(ioc, skip_reason)
+
+        job_result, status = self._get_job(ioc, classification, observable, playbook_name)
+        if status is not None:
+            return status
+
+        return self._report_job(ioc, classification, playbook_name, job_result, report_name, template_key,
+                                gen_report)
+
+    def _get_job(self, ioc, classification, observable, playbook_name, job_id=None):
+        """
+        Gets the finished IntelOwl job of an observable: from the batch, from the job cache, from the analyzer cache,
+        by collecting a known job, or by submitting the observable to the playbook and waiting for it
+
+        :param ioc: IOC instance
+        :param classification: IntelOwl observable classification
+        :param observable: Normalized observable value
+        :param playbook_name: Name of the playbook requested
+        :param job_id: IntelOwl job to collect instead of submitting the observable
+        :return: Tuple (job, None), or (None, IIStatus) when the enrichment ends here
+        """
+        # Different spellings of one indicator in the same batch share a single IntelOwl job
+        job_key = (classification, observable, playbook_name)
+        self._enriched_observables.add((classification, observable))
+        job_result = self._jobs.get(job_key)
+        if job_result is not None:
+            self.log.info(f'Reusing IntelOwl job {job_result.get("id")} of {observable}')
+
+        else:
+            cached_reports = []
+            missing_analyzers = []
+            job_id = job_id or self.resume_job_ids.get(ioc.ioc_id)
+            # A job enriched ahead wins over the one a batch submitted meanwhile, which is left to finish unread
+            job_result = None if job_id is not None else self._get_cached_job(classification, observable,
+                                                                              playbook_name)
+            from_job_cache = job_result is not None
+            if job_id is None:
+                submitted_job_id = self._submitted.pop(job_key, None)
+                job_id = None if from_job_cache else submitted_job_id
+
+            if from_job_cache:
+                self.log.info(f'Using the IntelOwl job {job_result.get("id")} of {observable} enriched ahead')
+
+            elif job_id is not None:
+                self.log.info(f'Collecting IntelOwl job {job_id} of {observable}')
+
+            elif self.deadline.expired():
+                return None, self._defer(ioc, classification, playbook_name)
+
+            else:
+                negative = self._get_negative(classification, observable, playbook_name)
+                if negative is not None:
+                    return None, self._handle_negative(ioc, negative)
+
+                cached_reports, missing_analyzers = self._get_cached_analyzers(classification, observable,
+                                                                               playbook_name)
+                if cached_reports and not missing_analyzers:
+                    self.log.info(f'All analyzers of {playbook_name} are cached for {observable}')
+                    job_result = self._make_cached_job(classification, observable, playbook_name)
+
+                else:
+                    try:
+                        if cached_reports:
+                            self.log.info(f'Requesting only the uncached analyzers {missing_analyzers}')
+                            query_result = self.intelowl.send_observable_analysis_request(
+                                observable_name=observable,
+                                analyzers_requested=missing_analyzers,
+                                tags_labels=self.get_tags(ioc),
+                                observable_classification=classification)
+                        else:
+                            query_result = self.intelowl.send_observable_analysis_playbook_request(
+                                observable_name=observable,
+                                playbook_requested=playbook_name,
+                                tags_labels=self.get_tags(ioc),
+                                observable_classification=classification)
+                    except IntelOwlClientException as e:
+                        self.log.error(e)
+                        if not self.is_rejection(e):
+                            self._schedule_retry(ioc, classification, playbook_name, e)
+                            return None, InterfaceStatus.I2Error(e)
+
+                        if not cached_reports:
+                            self._put_negative(classification, observable, playbook_name, "rejected", str(e))
+                            return None, InterfaceStatus.I2Error(e)
+
+                        # IntelOwl can run none of the uncached analyzers on the observable, which says nothing
+                        # about the playbook: the cached reports make the job
+                        self._put_not_run_analyzers(classification, observable, missing_analyzers)
+                        job_result = self._make_cached_job(classification, observable, playbook_name)
+
+                    else:
+                        job_id = query_result.get("job_id")
+                        self._track_job(job_id)
+
+            if job_result is None:
+                try:
+                    job_result = self.get_job_result(job_id)
+                except IntelOwlClientException as e:
+                    self.log.error(e)
+                    self._schedule_retry(ioc, classification, playbook_name, e)
+                    return None, InterfaceStatus.I2Error(e)
+
+            if isinstance(job_result, dict):
+                self._put_cached_analyzers(classification, observable, job_result)
+                cached_reports = [report for report in cached_reports if not report.get("not_run")]
+                if cached_reports:
+                    job_result["analyzer_reports"] = (job_result.get("analyzer_reports") or []) + cached_reports
+                    job_result["cached_analyzers"] = [report.get("name") for report in cached_reports]
+
+                self._jobs[job_key] = job_result
+                self._collect_derived(classification, observable, job_result)
+                if not from_job_cache:
+                    self._share_job(classification, observable, playbook_name, job_result)
+                self._record_hit(classification, observable, playbook_name, job_result, from_job_cache)
+
+                if self.is_empty_result(job_result) and not self.has_failed_analyzers(job_result):
+                    self._put_negative(classification, observable, playbook_name, "empty",
+                                       f'No analyzer of {playbook_name} returned data for {observable}')
+
+        if isinstance(job_result, dict) and job_result.get("deferred"):
+            return None, self._defer(ioc, classification, playbook_name, job_result.get("id"))
+
+        return job_result, None
+
+    def _report_job(self, ioc, classification, playbook_name, job_result, report_name, template_key, gen_report):
+        """
+        Attaches the summary and the rendered report of a job to the IOC
+
+        :param ioc: IOC instance
+        :param classification: IntelOwl observable classification
+        :param playbook_name: Name of the playbook requested
+        :param job_result: Job as returned by the IntelOwl API
+        :param report_name: Human name of the report, used in logs
+        :param template_key: Configuration key of the HTML template to render
+        :param gen_report: Method rendering the template
+        :return: IIStatus
+        """
+        if isinstance(job_result, dict) and job_result.get("status") in ("pending", "running"):
+            self.log.warning(f'IntelOwl job {job_result.get("id")} for {ioc.ioc_value} did not finish in time')
+            self._schedule_retry(ioc, classification, playbook_name, f'Job {job_result.get("id")} timed out')
+
+        elif self.retry_queue is not None:
+            self.retry_queue.discard(ioc.ioc_id, classification, playbook_name)
 
         if self.mod_config.get('intelowl_report_as_attribute') is True:
-            self.log.info('Adding new attribute IntelOwl URL Report to IOC')
+            if self.mod_config.get('intelowl_summary_enabled') and isinstance(job_result, dict):
+                status = self._attach_summary(ioc, job_result)
+                if not status.is_success():
+                    return status
 
-            report = job_result
+                if self.mod_config.get('intelowl_raw_report_enabled') is False:
+                    return InterfaceStatus.I2Success()
 
-            status = self.gen_url_report_from_template(self.mod_config.get('intelowl_url_report_template'), report, playbook_name)
+            self.log.info(f'Adding new attribute IntelOwl {report_name} Report to IOC')
 
-            if not status.is_success():
-                return status
+            report = job_result
 
-            rendered_report = status.get_data()
+            if self.mod_config.get('intelowl_render_processes') and \
+                    self._submit_render(ioc, self.mod_config.get(template_key), report, playbook_name, classification):
+                return InterfaceStatus.I2Success()
 
-            try:
-                add_tab_attribute_field(ioc, tab_name='IntelOwl Report', field_name="HTML report", field_type="html",
-                                        field_value=rendered_report)
+            status = gen_report(self.mod_config.get(template_key), report, playbook_name)
 
-            except Exception:
+            if not status.is_success():
+                return status
 
-                self.log.error(traceback.format_exc())
-                return InterfaceStatus.I2Error(traceback.format_exc())
+            return self._attach_report(ioc, status.get_data(), playbook_name, report.get("enriched_at"))
         else:
             self.log.info('Skipped adding attribute report. Option disabled')
 
         return InterfaceStatus.I2Success()
 
-    def handle_hash(self, ioc):
+    def _attach_report(self, ioc, rendered_report, playbook_name=None, enriched_at=None) -> InterfaceStatus:
         """
-        Handles an IOC of type hash and adds IntelOwl insights
+        Stores the rendered report as an attribute of the IOC, along with the playbook and time it comes from
 
         :param ioc: IOC instance
+        :param rendered_report: Rendered HTML report
+        :param playbook_name: Name of the playbook used
+        :param enriched_at: ISO time of the enrichment, defaults to now
         :return: IIStatus
         """
+        try:
+            add_tab_attribute_field(ioc, tab_name=REPORT_TAB, field_name=REPORT_FIELD, field_type="html",
+                                    field_value=rendered_report)
+            add_tab_attribute_field(ioc, tab_name=REPORT_TAB, field_name=ENRICHED_AT_FIELD, field_type="input_string",
+                                    field_value=enriched_at or datetime.now(timezone.utc).isoformat())
+            if playbook_name:
+                add_tab_attribute_field(ioc, tab_name=REPORT_TAB, field_name=PLAYBOOK_FIELD,
+                                        field_type="input_string", field_value=playbook_name)
 
-        self.log.info(f'Getting hash report for {ioc.ioc_value}')
+        except Exception:
 
-        hash = ioc.ioc_value
-        playbook_name = self.mod_config.get("intelowl_playbook_name")
-        try:
-            query_result = self.intelowl.send_observable_analysis_playbook_request(observable_name=hash,
-                                                                                   playbook_requested=playbook_name,
-                                                                                   tags_labels=["iris"],
-                                                                                   observable_classification="hash")
-        except IntelOwlClientException as e:
-            self.log.error(e)
-            return InterfaceStatus.I2Error(e)
+            self.log.error(traceback.format_exc())
+            return InterfaceStatus.I2Error(traceback.format_exc())
 
-        job_id = query_result.get("job_id")
+        return InterfaceStatus.I2Success()
+
+    @staticmethod
+    def get_summary(job_result) -> dict:
+        """
+        Returns the verdict fields of a job, computed once per job
+
+        :param job_result: Job as returned by the IntelOwl API
+        :return: dict, see summary.extract_summary
+        """
+        if "summary" not in job_result:
+            job_result["summary"] = extract_summary(job_result)
+
+        return job_result["summary"]
+
+    def _attach_summary(self, ioc, job_result) -> InterfaceStatus:
+        """
+        Stores the verdict fields of the job as small attributes of the IOC
+
+        :param ioc: IOC instance
+        :param job_result: Job as returned by the IntelOwl API
+        :return: IIStatus
+        """
+        summary = self.get_summary(job_result)
+        fields = {
+            "Verdict": summary["verdict"],
+            "Flagged by": ", ".join(summary["malicious_analyzers"]) or "-",
+            "Detections": str(summary["detections"]),
+            "Analyzers": f'{summary["analyzers"] - summary["failed_analyzers"]}/{summary["analyzers"]} succeeded',
+            "Top tags": ", ".join(summary["top_tags"]) or "-",
+            "Scores": ", ".join(f'{name}: {score}' for name, score in summary["scores"].items()) or "-",
+        }
 
         try:
-            job_result = self.get_job_result(job_id)
-        except IntelOwlClientException as e:
-            self.log.error(e)
-            return InterfaceStatus.I2Error(e)
+            for field_name, field_value in fields.items():
+                add_tab_attribute_field(ioc, tab_name=SUMMARY_TAB, field_name=field_name, field_type="input_string",
+                                        field_value=field_value)
 
-        if self.mod_config.get('intelowl_report_as_attribute') is True:
-            self.log.info('Adding new attribute IntelOwl hash Report to IOC')
+        except Exception:
 
-            report = job_result
+            self.log.error(traceback.format_exc())
+            return InterfaceStatus.I2Error(traceback.format_exc())
 
-            status = self.gen_hash_report_from_template(self.mod_config.get('intelowl_hash_report_template'), report, playbook_name)
+        return InterfaceStatus.I2Success()
 
-            if not status.is_success():
-                return status
+    def _submit_render(self, ioc, html_template, intelowl_report, playbook_name, classification) -> bool:
+        """
+        Hands the rendering of a report to the rendering process pool. The report is attached by finalize().
+
+        :param ioc: IOC instance
+        :param html_template: A string representing the HTML template, empty for the packaged default
+        :param intelowl_report: The JSON report fetched with intelowl API
+        :param playbook_name: Name of the playbook used
+        :param classification: IntelOwl observable classification
+        :return: True if the rendering was scheduled, False if it has to be done inline
+        """
+        try:
+            future = submit_render(self.mod_config, html_template, classification,
+                                   self.prerender_report(intelowl_report, playbook_name))
+        except Exception:
+            self.log.error(traceback.format_exc())
+            self.log.warning('Rendering pool unavailable, rendering inline')
+            return False
+
+        self._pending_renders.append((ioc, future, intelowl_report, playbook_name))
+        return True
 
-            rendered_report = status.get_data()
+    def finalize(self) -> InterfaceStatus:
+        """
+        Waits for the reports rendered in the process pool and attaches them to their IOC.
+        Ends a chunk of IOCs: the job results kept for the in-batch dedup are released.
 
+        :return: IIStatus
+        """
+        in_status = InterfaceStatus.IIStatus(code=InterfaceStatus.I2CodeNoError)
+        self._jobs = {}
+        self._submitted = {}
+        self._collected = {}
+        self._job_started_at = {}
+
+        pending_renders, self._pending_renders = self._pending_renders, []
+        for ioc, future, intelowl_report, playbook_name in pending_renders:
             try:
-                add_tab_attribute_field(ioc, tab_name='IntelOwl Report', field_name="HTML report", field_type="html",
-                                        field_value=rendered_report)
+                rendered = future.result()
+                if playbook_name:
+                    rendered = self._add_playbook_banner(rendered, playbook_name)
+                rendered = self._add_timeout_banner(rendered, intelowl_report)
 
             except Exception:
 
                 self.log.error(traceback.format_exc())
-                return InterfaceStatus.I2Error(traceback.format_exc())
-        else:
-            self.log.info('Skipped adding attribute report. Option disabled')
+                in_status = InterfaceStatus.merge_status(in_status, InterfaceStatus.I2Error(traceback.format_exc()))
+                continue
 
-        return InterfaceStatus.I2Success()
+            in_status = InterfaceStatus.merge_status(in_status, self._attach_report(ioc, rendered, playbook_name,
+                                                                                    intelowl_report.get("enriched_at")))
 
-    def handle_generic(self, ioc):
+        return in_status
+
+    def handle_ioc(self, ioc):
         """
-        Handles an IOC of type generic and adds IntelOwl insights
+        Checks that the IOC is of a type the module can handle and dispatches it
 
         :param ioc: IOC instance
         :return: IIStatus
         """
+        classification = self.get_classification(ioc)
+        if classification == 'ip':
+            return self.handle_ip(ioc=ioc)
+        elif classification == 'domain':
+            return self.handle_domain(ioc=ioc)
+        elif classification == 'url':
+            return self.handle_url(ioc=ioc)
+        elif classification == 'hash':
+            return self.handle_hash(ioc=ioc)
+        elif classification == 'file':
+            return self.handle_file(ioc=ioc)
+
+        return self.handle_generic(ioc=ioc)
+
+    def get_classification(self, ioc) -> str:
+        """
+        Maps the IRIS type of an IOC to the IntelOwl observable classification it is handled as
 
-        self.log.info(f'Getting generic report for {ioc.ioc_value}')
+        :param ioc: IOC instance
+        :return: ip, domain, url, hash, generic, or file for the hash-first file lookup
+        """
+        if 'ip-' in ioc.ioc_type.type_name:
+            return 'ip'
+        elif 'domain' in ioc.ioc_type.type_name:
+            return 'domain'
+        elif 'url' in ioc.ioc_type.type_name:
+            return 'url'
+        elif ioc.ioc_type.type_name in ['md5', 'sha1', 'sha224', 'sha256', 'sha512']:
+            return 'hash'
+        elif self.mod_config.get('intelowl_file_lookup_enabled') and is_file_hash_type(ioc.ioc_type.type_name) and \
+                (ioc.ioc_type.type_name.partition('|')[0] == 'filename' or ioc.ioc_type.type_name in FILE_IOC_TYPES):
+            return 'file'
+
+        return 'generic'
 
-        generic = ioc.ioc_value
-        playbook_name = self.mod_config.get("intelowl_playbook_name")
-        try:
-            query_result = self.intelowl.send_observable_analysis_playbook_request(observable_name=generic,
-                                                                                   playbook_requested=playbook_name,
-                                                                                   tags_labels=["iris"],
-                                                                                   observable_classification="generic")
-        except IntelOwlClientException as e:
-            self.log.error(e)
-            return InterfaceStatus.I2Error(e)
+    def handle_domain(self, ioc):
+        """
+        Handles an IOC of type domain and adds IntelOwl insights
 
-        job_id = query_result.get("job_id")
+        :param ioc: IOC instance
+        :return: IIStatus
+        """
 
-        try:
-            job_result = self.get_job_result(job_id)
-        except IntelOwlClientException as e:
-            self.log.error(e)
-            return InterfaceStatus.I2Error(e)
+        self.log.info(f'Getting domain report for {ioc.ioc_value}')
 
-        if self.mod_config.get('intelowl_report_as_attribute') is True:
-            self.log.info('Adding new attribute IntelOwl generic Report to IOC')
+        return self._enrich_observable(ioc, "domain", "Domain", 'intelowl_domain_report_template',
+                                       self.gen_domain_report_from_template)
 
-            report = job_result
+    def handle_ip(self, ioc):
+        """
+        Handles an IOC of type ip and adds IntelOwl insights
 
-            status = self.gen_generic_report_from_template(self.mod_config.get('intelowl_generic_report_template'),
-                                                           report, playbook_name)
+        :param ioc: IOC instance
+        :return: IIStatus
+        """
 
-            if not status.is_success():
-                return status
+        self.log.info(f'Getting IP report for {ioc.ioc_value}')
 
-            rendered_report = status.get_data()
+        return self._enrich_observable(ioc, "ip", "IP", 'intelowl_ip_report_template',
+                                       self.gen_ip_report_from_template)
 
+    def handle_url(self, ioc):
+        """
+        Handles an IOC of type URL and adds IntelOwl insights
+
+        :param ioc: IOC instance
+        :return: IIStatus
+        """
+
+        self.log.info(f'Getting URL report for {ioc.ioc_value}')
+
+        return self._enrich_observable(ioc, "url", "URL", 'intelowl_url_report_template',
+                                       self.gen_url_report_from_template)
+
+    def handle_hash(self, ioc):
+        """
+        Handles an IOC of type hash and adds IntelOwl insights
+
+        :param ioc: IOC instance
+        :return: IIStatus
+        """
+
+        self.log.info(f'Getting hash report for {ioc.ioc_value}')
+
+        return self._enrich_observable(ioc, "hash", "hash", 'intelowl_hash_report_template',
+                                       self.gen_hash_report_from_template)
+
+    def handle_file(self, ioc):
+        """
+        Handles an IOC of a file type. The hash of the file is looked up first: in the previous IntelOwl analyses
+        of the sample, then with the hash analyzers of the playbook. Only when both miss is the sample uploaded,
+        if it is available in the sample directory and uploads are enabled.
+
+        :param ioc: IOC instance
+        :return: IIStatus
+        """
+        self.log.info(f'Getting file report for {ioc.ioc_value}')
+
+        algorithm = get_hash_algorithm(ioc.ioc_type.type_name)
+        filename, file_hash = split_file_ioc(ioc.ioc_value, algorithm)
+        sample_path = find_sample(self.mod_config.get('intelowl_sample_dir'), filename, file_hash)
+        md5 = file_hash if algorithm == 'md5' else None
+
+        if sample_path:
             try:
-                add_tab_attribute_field(ioc, tab_name='IntelOwl Report', field_name="HTML report", field_type="html",
-                                        field_value=rendered_report)
+                sample_hashes = hash_file(sample_path)
+            except OSError:
+                self.log.error(traceback.format_exc())
+                sample_hashes = {}
+
+            if file_hash and file_hash not in sample_hashes.values():
+                self.log.warning(f'Sample {sample_path} does not match {file_hash}, ignoring it')
+                sample_path = None
+            else:
+                file_hash = file_hash or sample_hashes.get('sha256')
+                md5 = sample_hashes.get('md5')
+
+        if not file_hash:
+            self.log.info(f'No hash nor sample available for {ioc.ioc_value}')
+            return self.handle_generic(ioc=ioc)
+
+        skip_reason = self.get_skip_reason("hash", file_hash)
+        if skip_reason:
+            return self._annotate_skipped(ioc, skip_reason)
 
+        playbook_name = self.mod_config.get("intelowl_playbook_name")
+        file_playbook_name = self.mod_config.get("intelowl_file_playbook_name") or playbook_name
+        for reuse_playbook_name in dict.fromkeys((file_playbook_name, playbook_name)):
+            job_result = self._get_cached_job("hash", file_hash, reuse_playbook_name)
+            if job_result is not None:
+                self.log.info(f'Using the IntelOwl job {job_result.get("id")} of {file_hash} enriched before')
+                return self._report_job(ioc, "hash", reuse_playbook_name, job_result, "file",
+                                        'intelowl_hash_report_template', self.gen_hash_report_from_template)
+
+        can_upload = sample_path is not None and self.mod_config.get('intelowl_sample_upload_enabled')
+        report_playbook_name = file_playbook_name
+        job_result = None
+        job_id = None
+
+        if md5 and ioc.ioc_id not in self.resume_job_ids:
+            try:
+                job_id = find_file_job(self.intelowl, md5, file_playbook_name)
             except Exception:
+                self.log.error(traceback.format_exc())
+
+        if job_id is not None or ioc.ioc_id in self.resume_job_ids:
+            job_result, status = self._get_job(ioc, "hash", file_hash, file_playbook_name, job_id)
+            if status is not None:
+                return status
+
+        elif not (can_upload and self._get_negative("hash", file_hash, playbook_name)):
+            job_result, status = self._get_job(ioc, "hash", file_hash, playbook_name)
+            if status is not None:
+                return status
 
+            report_playbook_name = playbook_name
+            if can_upload and self.is_empty_result(job_result):
+                self.log.info(f'Hash lookup of {file_hash} missed, uploading the sample')
+                job_result = None
+                report_playbook_name = file_playbook_name
+
+        if job_result is None:
+            if self.deadline.expired():
+                return self._defer(ioc, "hash", file_playbook_name)
+
+            try:
+                job_id = upload_sample(self.intelowl, sample_path, filename, file_playbook_name,
+                                       tags_labels=self.get_tags(ioc))
+                self._track_job(job_id)
+            except Exception as e:
                 self.log.error(traceback.format_exc())
-                return InterfaceStatus.I2Error(traceback.format_exc())
-        else:
-            self.log.info('Skipped adding attribute report. Option disabled')
+                self._schedule_retry(ioc, "hash", file_playbook_name, e)
+                return InterfaceStatus.I2Error(e)
 
-        return InterfaceStatus.I2Success()
+            job_result, status = self._get_job(ioc, "hash", file_hash, file_playbook_name, job_id)
+            if status is not None:
+                return status
+
+        return self._report_job(ioc, "hash", report_playbook_name, job_result, "file",
+                                'intelowl_hash_report_template', self.gen_hash_report_from_template)
+
+    def handle_generic(self, ioc):
+        """
+        Handles an IOC of type generic and adds IntelOwl insights
+
+        :param ioc: IOC instance
+        :return: IIStatus
+        """
+
+        self.log.info(f'Getting generic report for {ioc.ioc_value}')
+
+        return self._enrich_observable(ioc, "generic", "generic", 'intelowl_generic_report_template',
+                                       self.gen_generic_report_from_template)
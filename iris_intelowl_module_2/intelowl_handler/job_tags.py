@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+#
+#
+#  IRIS intelowl Source Code
+#  Copyright (C) 2022 - dfir-iris
+#  contact@dfir-iris.org
+#  Created by dfir-iris - 2022-10-29
+#
+#  License Apache Software License 3.0
+
+"""
+Case and batch tags of IntelOwl jobs, and the list queries they allow.
+
+Jobs are labelled iris, iris-case-<case id> and iris-batch-<batch id>. One list query by batch tag and unfinished
+status tells which jobs of a hook invocation still run, and one by case tag finds the jobs a restarted worker
+left behind.
+"""
+
+from datetime import datetime, timezone
+
+import requests
+from pyintelowl import IntelOwlClientException
+
+
+BASE_TAG = 'iris'
+UNFINISHED_STATUSES = ("pending", "running")
+
+
+def case_tag(case_id) -> str:
+    return f'{BASE_TAG}-case-{case_id}'
+
+
+def batch_tag(batch_id) -> str:
+    return f'{BASE_TAG}-batch-{batch_id}'
+
+
+def list_jobs(client, tag, page_size=100, max_pages=20, statuses=None) -> list:
+    """
+    Lists the jobs carrying a tag, newest first
+
+    :param client: IntelOwl client, or a client routing over several instances
+    :param tag: Tag label
+    :param page_size: Jobs per list query
+    :param max_pages: Maximum number of list queries
+    :param statuses: Only the jobs in one of these statuses, None for all
+    :return: List of jobs, without their reports
+    """
+    list_tagged = getattr(client, 'list_jobs', None)
+    if list_tagged is not None:
+        return list_tagged(tag, page_size, max_pages, statuses)
+
+    params = {"tags__label": tag, "page_size": page_size, "ordering": "-received_request_time"}
+    if statuses:
+        params["status"] = list(statuses)
+
+    jobs = []
+    for page in range(1, max_pages + 1):
+        try:
+            response = client.session.get(f'{client.instance}/api/jobs', params=dict(params, page=page))
+            response.raise_for_status()
+        except requests.RequestException as e:
+            raise IntelOwlClientException(e) from e
+
+        answer = response.json()
+        results = answer.get("results") or []
+        # The filters are matched again here, in case the instance ignores them
+        jobs.extend(job for job in results if tag in [job_tag.get("label") for job_tag in job.get("tags") or []]
+                    and (not statuses or job.get("status") in statuses))
+        if not results or page >= (answer.get("total_pages") or 1):
+            break
+
+    return jobs
+
+
+def get_received_time(job):
+    """
+    :return: Time IntelOwl received the job, as an aware datetime, or None
+    """
+    received = job.get("received_request_time")
+    if not received:
+        return None
+
+    try:
+        received = datetime.fromisoformat(received.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+
+    return received if received.tzinfo else received.replace(tzinfo=timezone.utc)
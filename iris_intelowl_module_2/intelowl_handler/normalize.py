@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+#
+#
+#  IRIS intelowl Source Code
+#  Copyright (C) 2022 - dfir-iris
+#  contact@dfir-iris.org
+#  Created by dfir-iris - 2022-10-29
+#
+#  License Apache Software License 3.0
+
+import ipaddress
+import re
+from urllib.parse import urlsplit, urlunsplit
+
+
+_DEFANGED_DOTS = re.compile(r'\s*[\[\(\{]\s*(?:\.|dot)\s*[\]\)\}]\s*', re.IGNORECASE)
+_DEFANGED_COLONS = re.compile(r'[\[\(\{]\s*:\s*[\]\)\}]')
+_DEFANGED_SCHEMES = re.compile(r'^(?:hxxp|hxtp|fxp)(?=s?:)', re.IGNORECASE)
+_SCHEME_REFANG = {'hxxp': 'http', 'hxtp': 'http', 'fxp': 'ftp'}
+_DEFAULT_PORTS = {'http': 80, 'https': 443, 'ftp': 21}
+
+
+def refang(value: str) -> str:
+    """
+    Reverts the usual defanging notations: hxxp://, [.], (.), [dot], [:]
+
+    :param value: Observable value
+    :return: Refanged value
+    """
+    value = _DEFANGED_DOTS.sub('.', value.strip())
+    value = _DEFANGED_COLONS.sub(':', value)
+    return _DEFANGED_SCHEMES.sub(lambda match: _SCHEME_REFANG[match.group(0).lower()], value)
+
+
+def normalize_ip(value: str) -> str:
+    value = refang(value).strip('[]')
+    try:
+        return str(ipaddress.ip_address(value))
+    except ValueError:
+        return value
+
+
+def normalize_domain(value: str) -> str:
+    value = refang(value).lower().rstrip('.')
+    try:
+        return value.encode('idna').decode('ascii')
+    except UnicodeError:
+        return value
+
+
+def normalize_hash(value: str) -> str:
+    return value.strip().lower()
+
+
+def normalize_url(value: str) -> str:
+    value = refang(value)
+    try:
+        parts = urlsplit(value)
+        host = parts.hostname
+        port = parts.port
+    except ValueError:
+        return value
+
+    if not parts.scheme or not host:
+        return value
+
+    scheme = parts.scheme.lower()
+    try:
+        host = f'[{ipaddress.IPv6Address(host)}]'
+    except ValueError:
+        host = normalize_domain(host)
+
+    netloc = host
+    if port is not None and _DEFAULT_PORTS.get(scheme) != port:
+        netloc = f'{host}:{port}'
+
+    if parts.username:
+        userinfo = parts.username if parts.password is None else f'{parts.username}:{parts.password}'
+        netloc = f'{userinfo}@{netloc}'
+
+    return urlunsplit((scheme, netloc, parts.path or '/', parts.query, parts.fragment))
+
+
+_NORMALIZERS = {
+    'ip': normalize_ip,
+    'domain': normalize_domain,
+    'url': normalize_url,
+    'hash': normalize_hash,
+}
+
+
+def normalize_observable(classification: str, value: str) -> str:
+    """
+    Returns the canonical spelling of an observable, so that the different spellings of one
+    indicator are submitted and cached once
+
+    :param classification: IntelOwl observable classification
+    :param value: Observable value
+    :return: Canonical value
+    """
+    normalizer = _NORMALIZERS.get(classification)
+    if normalizer is None:
+        return value.strip()
+
+    return normalizer(value)
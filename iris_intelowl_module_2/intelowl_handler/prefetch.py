@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+#
+#
+#  IRIS intelowl Source Code
+#  Copyright (C) 2022 - dfir-iris
+#  contact@dfir-iris.org
+#  Created by dfir-iris - 2022-10-29
+#
+#  License Apache Software License 3.0
+
+"""
+Speculative enrichment of the observables analysts usually add next: the host of a URL and the IPs a domain or
+URL resolves to. They are enriched in the background into the result cache, so the follow-up IOCs get their
+report without waiting for a playbook run.
+"""
+
+import ipaddress
+import queue
+import threading
+import traceback
+from urllib.parse import urlsplit
+
+from iris_intelowl_module_2.intelowl_handler.normalize import normalize_domain, normalize_ip
+
+
+def _parse_ip(value):
+    try:
+        return str(ipaddress.ip_address(str(value).strip('[]')))
+    except ValueError:
+        return None
+
+
+def _get_resolutions(job_result):
+    for analyzer_report in job_result.get("analyzer_reports") or []:
+        report = analyzer_report.get("report")
+        if not isinstance(report, dict) or not isinstance(report.get("resolutions"), list):
+            continue
+
+        for resolution in report["resolutions"]:
+            yield resolution.get("data") if isinstance(resolution, dict) else resolution
+
+
+def derive_observables(classification, observable, job_result=None) -> list:
+    """
+    Lists the observables derived from an enriched one: the host of a URL, and the IPs reported by the
+    DNS analyzers of a URL or domain
+
+    :param classification: IntelOwl observable classification
+    :param observable: Normalized observable value
+    :param job_result: Job of the observable
+    :return: List of (classification, normalized value)
+    """
+    derived = []
+    if classification == 'url':
+        try:
+            host = urlsplit(observable).hostname
+        except ValueError:
+            host = None
+
+        if host:
+            ip = _parse_ip(host)
+            derived.append(('ip', normalize_ip(ip)) if ip else ('domain', normalize_domain(host)))
+
+    if classification in ('url', 'domain') and isinstance(job_result, dict):
+        for value in _get_resolutions(job_result):
+            ip = _parse_ip(value) if value else None
+            if ip and ('ip', ip) not in derived:
+                derived.append(('ip', ip))
+
+    return derived
+
+
+class Prefetcher(threading.Thread):
+    """
+    Background thread enriching derived observables one at a time, so speculative work never competes with
+    the hooks for more than one IntelOwl job. Observables are dropped when the queue is full.
+    """
+    def __init__(self, make_handler, logger, max_pending=200):
+        super().__init__(name="intelowl-prefetcher", daemon=True)
+        self.make_handler = make_handler
+        self.log = logger
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def submit(self, observables) -> int:
+        """
+        Queues observables for enrichment
+
+        :param observables: Iterable of (classification, observable)
+        :return: Number of observables queued
+        """
+        queued = 0
+        for item in observables:
+            with self._lock:
+                if item in self._pending:
+                    continue
+
+                try:
+                    self._queue.put_nowait(item)
+                except queue.Full:
+                    break
+
+                self._pending.add(item)
+                queued += 1
+
+        return queued
+
+    def run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                self.make_handler().prefetch(*item)
+            except Exception:
+                self.log.error(traceback.format_exc())
+            finally:
+                with self._lock:
+                    self._pending.discard(item)
+
+
+_prefetcher = None
+_lock = threading.Lock()
+
+
+def get_prefetcher(make_handler, logger) -> Prefetcher:
+    """
+    Returns the process-wide prefetcher, started on first use
+
+    :param make_handler: Callable returning an IntelowlHandler built with the current configuration
+    :param logger: Logger
+    :return: Prefetcher
+    """
+    global _prefetcher
+
+    with _lock:
+        if _prefetcher is None or not _prefetcher.is_alive():
+            _prefetcher = Prefetcher(make_handler, logger)
+            _prefetcher.start()
+        else:
+            _prefetcher.make_handler = make_handler
+
+    return _prefetcher
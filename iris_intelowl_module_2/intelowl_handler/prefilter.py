@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+#
+#
+#  IRIS intelowl Source Code
+#  Copyright (C) 2022 - dfir-iris
+#  contact@dfir-iris.org
+#  Created by dfir-iris - 2022-10-29
+#
+#  License Apache Software License 3.0
+
+import ipaddress
+import os
+import threading
+from bisect import bisect_right
+from urllib.parse import urlsplit
+
+
+class CidrIndex(object):
+    """
+    Sorted, merged interval index of IP networks. Lookups are a binary search, O(log n).
+    """
+    def __init__(self, networks=()):
+        self._starts = {4: [], 6: []}
+        self._ends = {4: [], 6: []}
+
+        ranges = {4: [], 6: []}
+        for network in networks:
+            ranges[network.version].append((int(network.network_address), int(network.broadcast_address)))
+
+        for version, version_ranges in ranges.items():
+            version_ranges.sort()
+            for start, end in version_ranges:
+                if self._ends[version] and start <= self._ends[version][-1] + 1:
+                    self._ends[version][-1] = max(self._ends[version][-1], end)
+                else:
+                    self._starts[version].append(start)
+                    self._ends[version].append(end)
+
+    def __len__(self):
+        return len(self._starts[4]) + len(self._starts[6])
+
+    def contains(self, address) -> bool:
+        starts = self._starts[address.version]
+        position = bisect_right(starts, int(address)) - 1
+        return position >= 0 and int(address) <= self._ends[address.version][position]
+
+
+class DomainSuffixTrie(object):
+    """
+    Trie of domain labels stored right to left. A domain matches when it, or one of its parents, was added.
+    Lookups are O(number of labels).
+    """
+    _END = object()
+
+    def __init__(self, domains=()):
+        self._root = {}
+        self._size = 0
+        for domain in domains:
+            self.add(domain)
+
+    def __len__(self):
+        return self._size
+
+    @staticmethod
+    def _labels(domain):
+        return reversed(domain.strip().strip('.').lower().split('.'))
+
+    def add(self, domain):
+        node = self._root
+        for label in self._labels(domain):
+            node = node.setdefault(label, {})
+
+        if self._END not in node:
+            node[self._END] = True
+            self._size += 1
+
+    def match(self, domain) -> bool:
+        node = self._root
+        for label in self._labels(domain):
+            node = node.get(label)
+            if node is None:
+                return False
+
+            if self._END in node:
+                return True
+
+        return False
+
+
+def _read_entries(path, logger=None):
+    if not path:
+        return []
+
+    try:
+        with open(path, 'r', encoding='utf-8') as fd:
+            return [line.split('#', 1)[0].strip() for line in fd if line.split('#', 1)[0].strip()]
+    except OSError as e:
+        # A missing list must not disable the other lists nor the non-routable check
+        if logger is not None:
+            logger.warning(f'Ignoring unreadable allow-list {path}: {e}')
+        return []
+
+
+class ObservablePrefilter(object):
+    """
+    Local filter deciding which observables are not worth an IntelOwl playbook run: non-routable IPs
+    and entries of the allow-list files.
+    """
+    def __init__(self, skip_non_routable=True, cidr_file=None, domain_file=None, hash_file=None, logger=None):
+        self.skip_non_routable = skip_non_routable
+
+        networks = []
+        for entry in _read_entries(cidr_file, logger):
+            try:
+                networks.append(ipaddress.ip_network(entry, strict=False))
+            except ValueError:
+                continue
+
+        self.cidrs = CidrIndex(networks)
+        self.domains = DomainSuffixTrie(_read_entries(domain_file, logger))
+        self.hashes = frozenset(entry.lower() for entry in _read_entries(hash_file, logger))
+
+    def _match_ip(self, value):
+        try:
+            address = ipaddress.ip_address(value.strip().strip('[]'))
+        except ValueError:
+            return None
+
+        if self.skip_non_routable and not address.is_global:
+            return f'{address} is not a globally routable address'
+
+        if self.cidrs.contains(address):
+            return f'{address} is in the CIDR allow-list'
+
+        return None
+
+    def _match_domain(self, value):
+        if self.domains.match(value):
+            return f'{value} is in the domain allow-list'
+
+        return None
+
+    def match(self, classification, value):
+        """
+        Checks an observable against the filter
+
+        :param classification: IntelOwl observable classification
+        :param value: Observable value
+        :return: The reason why the observable should be skipped, or None
+        """
+        if classification == "ip":
+            return self._match_ip(value)
+
+        if classification == "domain":
+            return self._match_ip(value) or self._match_domain(value)
+
+        if classification == "url":
+            try:
+                host = urlsplit(value if '//' in value else f'//{value}').hostname
+            except ValueError:
+                return None
+
+            if not host:
+                return None
+
+            return self._match_ip(host) or self._match_domain(host)
+
+        if classification == "hash" and value.strip().lower() in self.hashes:
+            return f'{value} is in the hash allow-list'
+
+        return None
+
+
+_prefilters = {}
+_lock = threading.Lock()
+
+
+def _file_signature(path):
+    if not path:
+        return None
+
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return path, None
+
+    return path, stat.st_mtime, stat.st_size
+
+
+def get_prefilter(mod_config, logger=None) -> ObservablePrefilter:
+    """
+    Returns the process-wide prefilter matching the module configuration.
+    It is rebuilt only when the configuration or one of the allow-list files changes.
+    Unreadable allow-lists are left out, with a warning when the prefilter is built.
+
+    :param mod_config: Module configuration
+    :param logger: Logger warned about unreadable allow-lists
+    :return: ObservablePrefilter
+    """
+    files = (mod_config.get('intelowl_allowlist_cidr_file'),
+             mod_config.get('intelowl_allowlist_domain_file'),
+             mod_config.get('intelowl_allowlist_hash_file'))
+    skip_non_routable = mod_config.get('intelowl_skip_non_routable') is not False
+    key = (skip_non_routable,) + tuple(_file_signature(path) for path in files)
+
+    with _lock:
+        prefilter = _prefilters.get(files)
+        if prefilter is None or prefilter[0] != key:
+            prefilter = (key, ObservablePrefilter(skip_non_routable, *files, logger=logger))
+            _prefilters[files] = prefilter
+
+    return prefilter[1]
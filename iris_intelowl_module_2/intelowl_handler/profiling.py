@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+#
+#
+#  IRIS intelowl Source Code
+#  Copyright (C) 2022 - dfir-iris
+#  contact@dfir-iris.org
+#  Created by dfir-iris - 2022-10-29
+#
+#  License Apache Software License 3.0
+
+"""
+On-demand profiling of hook invocations, to diagnose slow batches on production payloads.
+
+Each profiled invocation writes, in the profiles directory, files named intelowl_<time>-<hook>-<pid>:
+    - <stem>.pstats with cProfile, to open with pstats or snakeviz
+    - <stem>.collapsed with the sampling profiler, one "frame;frame;... count" line per stack, for flamegraph.pl
+      or speedscope
+    - <stem>.alloc.txt with tracemalloc, the top allocations made during the invocation
+Only the newest max_files of these files are kept. Other files of the directory are never touched.
+"""
+
+import cProfile
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+
+from iris_intelowl_module_2.intelowl_handler.retry_queue import get_state_dir
+
+
+PROFILING_MODES = ('off', 'cprofile', 'sampling')
+PROFILE_PREFIX = 'intelowl_'
+PROFILE_SUFFIXES = ('.pstats', '.collapsed', '.alloc.txt')
+
+
+class StackSampler(threading.Thread):
+    """
+    Samples the stack of one thread at a fixed interval, a much lower overhead than cProfile on long batches
+    """
+    def __init__(self, thread_id, interval=0.005):
+        super().__init__(name="intelowl-stack-sampler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})')
+                frame = frame.f_back
+
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+
+class HookProfiler(object):
+    """
+    Context manager profiling the code it wraps, and writing the profiles when it exits
+    """
+    def __init__(self, profiles_dir, name, mode='cprofile', trace_allocations=False, max_files=50,
+                 max_file_size=10 * 1024 * 1024, logger=None):
+        self.profiles_dir = profiles_dir
+        self.mode = mode
+        self.trace_allocations = trace_allocations
+        self.max_files = max_files
+        self.max_file_size = max_file_size
+        self.log = logger
+        self.stem = f'{PROFILE_PREFIX}{datetime.now().strftime("%Y%m%d-%H%M%S-%f")}-{name}-{os.getpid()}'
+
+        self._profile = None
+        self._sampler = None
+        self._allocations_start = None
+        self._started_tracemalloc = False
+
+    def __enter__(self):
+        if self.trace_allocations:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracemalloc = True
+            self._allocations_start = tracemalloc.take_snapshot()
+
+        if self.mode == 'sampling':
+            self._sampler = StackSampler(threading.get_ident())
+            self._sampler.start()
+        elif self.mode == 'cprofile':
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+
+        self._started_at = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self._started_at
+        if self._profile is not None:
+            self._profile.disable()
+        if self._sampler is not None:
+            self._sampler.stop()
+
+        try:
+            os.makedirs(self.profiles_dir, exist_ok=True)
+            self._write(elapsed)
+            self._rotate()
+        except OSError as e:
+            if self.log is not None:
+                self.log.warning(f'Could not write the hook profile: {e}')
+        finally:
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+
+        return False
+
+    def _path(self, suffix):
+        return os.path.join(self.profiles_dir, self.stem + suffix)
+
+    def _write_text(self, suffix, lines):
+        size = 0
+        with open(self._path(suffix), 'w', encoding='utf-8') as fd:
+            for line in lines:
+                size += len(line) + 1
+                if size > self.max_file_size:
+                    fd.write('# truncated\n')
+                    break
+                fd.write(line + '\n')
+
+    def _write(self, elapsed):
+        if self._profile is not None:
+            path = self._path('.pstats')
+            self._profile.dump_stats(path)
+            if os.path.getsize(path) > self.max_file_size:
+                os.remove(path)
+                if self.log is not None:
+                    self.log.warning(f'Hook profile {path} exceeds the size cap, dropped')
+
+        if self._sampler is not None:
+            self._write_text('.collapsed', (f'{stack} {count}' for stack, count in self._sampler.stacks.most_common()))
+
+        if self._allocations_start is not None:
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            header = [f'# {elapsed:.3f}s, traced memory {current / 1024:.1f} KiB, peak {peak / 1024:.1f} KiB',
+                      '# top allocations made during the invocation']
+            stats = snapshot.compare_to(self._allocations_start, 'lineno')[:50]
+            self._write_text('.alloc.txt', header + [str(stat) for stat in stats])
+
+        if self.log is not None:
+            self.log.info(f'Hook profiled in {self.profiles_dir} as {self.stem} ({elapsed:.3f}s)')
+
+    def _rotate(self):
+        # The directory may be shared, e.g /tmp: only the profiles written here are rotated
+        profiles = sorted((os.path.join(self.profiles_dir, name) for name in os.listdir(self.profiles_dir)
+                           if name.startswith(PROFILE_PREFIX) and name.endswith(PROFILE_SUFFIXES)),
+                          key=os.path.getmtime)
+        for path in profiles[:max(0, len(profiles) - self.max_files)]:
+            os.remove(path)
+
+
+def get_hook_profiler(mod_config, hook_name, logger):
+    """
+    Returns the profiler of a hook invocation, or None when profiling is off
+
+    :param mod_config: Module configuration
+    :param hook_name: Name of the hook, part of the profile file names
+    :param logger: Logger
+    :return: HookProfiler or None
+    """
+    mode = mod_config.get('intelowl_profiling_mode') or 'off'
+    if mode == 'off':
+        return None
+
+    if mode not in PROFILING_MODES:
+        logger.error(f'Unknown profiling mode {mode}, profiling disabled')
+        return None
+
+    profiles_dir = mod_config.get('intelowl_profiling_dir') or os.path.join(get_state_dir(mod_config), 'profiles')
+    return HookProfiler(profiles_dir, hook_name, mode,
+                        trace_allocations=bool(mod_config.get('intelowl_profiling_tracemalloc')),
+                        max_files=mod_config.get('intelowl_profiling_max_files') or 50,
+                        max_file_size=(mod_config.get('intelowl_profiling_max_file_size') or 10) * 1024 * 1024,
+                        logger=logger)
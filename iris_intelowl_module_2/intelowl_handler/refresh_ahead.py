@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+#
+#
+#  IRIS intelowl Source Code
+#  Copyright (C) 2022 - dfir-iris
+#  contact@dfir-iris.org
+#  Created by dfir-iris - 2022-10-29
+#
+#  License Apache Software License 3.0
+
+"""
+Refresh-ahead of hot observables.
+
+Every enrichment counts as a hit of its observable, with a score decaying by half every half_life seconds.
+The cached job of an observable whose score reaches the threshold is re-enriched in the background shortly
+before it expires, so the next hook finds a fresh job instead of waiting for the playbook. Refreshes are
+capped per hour, which bounds the IntelOwl capacity spent ahead of demand.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+import traceback
+
+from iris_intelowl_module_2.intelowl_handler.retry_queue import get_state_dir
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS hot_observables (
+    classification TEXT NOT NULL,
+    observable TEXT NOT NULL,
+    playbook TEXT NOT NULL,
+    score REAL NOT NULL,
+    last_hit REAL NOT NULL,
+    expires_at REAL,
+    claimed_until REAL NOT NULL DEFAULT 0,
+    last_refresh REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (classification, observable, playbook)
+);
+CREATE INDEX IF NOT EXISTS hot_observables_expiry ON hot_observables (expires_at);
+CREATE INDEX IF NOT EXISTS hot_observables_refresh ON hot_observables (last_refresh);
+"""
+
+
+class HotObservables(object):
+    """
+    SQLite backed hit scores of the enriched observables, shared by the worker processes
+    """
+    def __init__(self, db_path, half_life=86400):
+        self.db_path = db_path
+        self.half_life = half_life
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _decayed(self, score, since, now) -> float:
+        return score * 0.5 ** (max(0.0, now - since) / self.half_life)
+
+    def hit(self, classification, observable, playbook) -> float:
+        """
+        Counts an enrichment of the observable
+
+        :return: The new score of the observable
+        """
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute("SELECT score, last_hit FROM hot_observables WHERE classification = ? "
+                               "AND observable = ? AND playbook = ?", (classification, observable, playbook)).fetchone()
+            score = 1.0 + (self._decayed(row["score"], row["last_hit"], now) if row else 0.0)
+            conn.execute("INSERT INTO hot_observables (classification, observable, playbook, score, last_hit) "
+                         "VALUES (?, ?, ?, ?, ?) ON CONFLICT (classification, observable, playbook) "
+                         "DO UPDATE SET score = excluded.score, last_hit = excluded.last_hit",
+                         (classification, observable, playbook, score, now))
+
+        return score
+
+    def set_expiry(self, classification, observable, playbook, expires_at):
+        """
+        Records when the cached job of the observable expires, and releases its refresh claim
+        """
+        with self._connect() as conn:
+            conn.execute("UPDATE hot_observables SET expires_at = ?, claimed_until = 0 WHERE classification = ? "
+                         "AND observable = ? AND playbook = ?", (expires_at, classification, observable, playbook))
+
+    def refreshes_last_hour(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM hot_observables WHERE last_refresh > ?",
+                                (time.time() - 3600,)).fetchone()[0]
+
+    def claim_due(self, lead, min_score, claim_for, budget) -> list:
+        """
+        Claims the hot observables whose cached job expires within lead seconds, hottest first, without exceeding
+        budget refreshes over the last hour. A claimed observable is not handed to another process for claim_for
+        seconds. Counting the refreshes and claiming happen in one write transaction, so that processes claiming
+        at the same time share the budget.
+
+        :return: List of dict
+        """
+        now = time.time()
+        claimed = []
+        conn = self._connect()
+        conn.isolation_level = None
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            remaining = budget - conn.execute("SELECT COUNT(*) FROM hot_observables WHERE last_refresh > ?",
+                                              (now - 3600,)).fetchone()[0]
+            if remaining > 0:
+                rows = conn.execute("SELECT * FROM hot_observables WHERE expires_at IS NOT NULL AND expires_at > ? "
+                                    "AND expires_at <= ? AND claimed_until < ?", (now, now + lead, now)).fetchall()
+                scored = [(self._decayed(row["score"], row["last_hit"], now), row) for row in rows]
+                scored = sorted((item for item in scored if item[0] >= min_score), key=lambda item: item[0],
+                                reverse=True)
+
+                for _, row in scored[:remaining]:
+                    conn.execute("UPDATE hot_observables SET claimed_until = ?, last_refresh = ? "
+                                 "WHERE classification = ? AND observable = ? AND playbook = ?",
+                                 (now + claim_for, now, row["classification"], row["observable"], row["playbook"]))
+                    claimed.append(dict(row))
+
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+        return claimed
+
+    def prune(self, min_score=0.01):
+        """
+        Forgets the observables whose score decayed to nothing
+        """
+        now = time.time()
+        with self._connect() as conn:
+            rows = conn.execute("SELECT classification, observable, playbook, score, last_hit "
+                                "FROM hot_observables").fetchall()
+            stale = [(row["classification"], row["observable"], row["playbook"]) for row in rows
+                     if self._decayed(row["score"], row["last_hit"], now) < min_score]
+            conn.executemany("DELETE FROM hot_observables WHERE classification = ? AND observable = ? "
+                             "AND playbook = ?", stale)
+
+
+class RefreshAheadScheduler(threading.Thread):
+    """
+    Background thread re-enriching the due hot observables one at a time, within the hourly budget
+    """
+    def __init__(self, hot_observables, make_handler, logger, interval=60):
+        super().__init__(name="intelowl-refresh-ahead", daemon=True)
+        self.hot_observables = hot_observables
+        self.make_handler = make_handler
+        self.log = logger
+        self.interval = interval
+        self.lead = 600
+        self.min_score = 3
+        self.budget = 60
+        self.claim_for = 3600
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.refresh_due()
+                self.hot_observables.prune()
+            except Exception:
+                self.log.error(traceback.format_exc())
+
+    def refresh_due(self):
+        for entry in self.hot_observables.claim_due(self.lead, self.min_score, self.claim_for, self.budget):
+            if self._stop_event.is_set():
+                return
+
+            try:
+                self.make_handler().refresh(entry["classification"], entry["observable"], entry["playbook"])
+            except Exception:
+                self.log.error(traceback.format_exc())
+
+
+_hot_observables = {}
+_schedulers = {}
+_lock = threading.Lock()
+
+
+def get_hot_observables(mod_config) -> HotObservables:
+    """
+    Returns the process-wide hit scores of the module configuration
+
+    :param mod_config: Module configuration
+    :return: HotObservables
+    """
+    db_path = os.path.join(get_state_dir(mod_config), 'hot_observables.sqlite')
+    with _lock:
+        hot_observables = _hot_observables.get(db_path)
+        if hot_observables is None:
+            hot_observables = HotObservables(db_path)
+            _hot_observables[db_path] = hot_observables
+
+    return hot_observables
+
+
+def ensure_scheduler(mod_config, make_handler, logger) -> RefreshAheadScheduler:
+    """
+    Starts the refresh-ahead scheduler if it is not already running in this process, and applies the
+    configured lead time, threshold and budget
+
+    :param mod_config: Module configuration
+    :param make_handler: Callable returning an IntelowlHandler built with the current configuration
+    :param logger: Logger
+    :return: RefreshAheadScheduler
+    """
+    hot_observables = get_hot_observables(mod_config)
+    with _lock:
+        scheduler = _schedulers.get(hot_observables.db_path)
+        if scheduler is None or not scheduler.is_alive():
+            scheduler = RefreshAheadScheduler(hot_observables, make_handler, logger)
+            scheduler.start()
+            _schedulers[hot_observables.db_path] = scheduler
+        else:
+            scheduler.make_handler = make_handler
+
+        scheduler.lead = (mod_config.get('intelowl_refresh_lead') or 10) * 60
+        scheduler.min_score = mod_config.get('intelowl_refresh_min_hits') or 3
+        scheduler.budget = mod_config.get('intelowl_refresh_max_jobs_per_hour') or 60
+        scheduler.claim_for = (mod_config.get('intelowl_maxtime') or 60) * 60
+
+    return scheduler
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+#
+#
+#  IRIS intelowl Source Code
+#  Copyright (C) 2022 - dfir-iris
+#  contact@dfir-iris.org
+#  Created by dfir-iris - 2022-10-29
+#
+#  License Apache Software License 3.0
+
+import json
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+
+def _render_in_worker(worker_config, source, classification, pre_render_json) -> str:
+    """
+    Renders a report in a pool process. The job is shipped as compact JSON, which is far cheaper to pickle
+    than the nested report structure, and templates stay compiled in each worker between calls.
+
+    :param worker_config: Subset of the module configuration used by the template environment
+    :param source: Template source, empty for the packaged default
+    :param classification: IntelOwl observable classification
+    :param pre_render_json: Template context, serialized as JSON
+    :return: Rendered HTML
+    """
+    from iris_intelowl_module_2.intelowl_handler.templates import get_template
+
+    template = get_template(worker_config, source, classification)
+    return template.render(json.loads(pre_render_json), _tojson_memo={})
+
+
+_pool = None
+_pool_size = 0
+_lock = threading.Lock()
+
+
+def get_render_pool(processes) -> ProcessPoolExecutor:
+    """
+    Returns the process-wide rendering pool, recreated if the configured size changed
+
+    :param processes: Number of rendering processes
+    :return: ProcessPoolExecutor
+    """
+    global _pool, _pool_size
+
+    with _lock:
+        if _pool is None or _pool_size != processes:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+
+            # Forking a threaded worker (database sessions, background threads) can copy a held lock into
+            # the child: the rendering processes start from a fresh interpreter instead
+            _pool = ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context('spawn'))
+            _pool_size = processes
+
+    return _pool
+
+
+def submit_render(mod_config, source, classification, pre_render):
+    """
+    Schedules the rendering of a report in the rendering pool
+
+    :param mod_config: Module configuration
+    :param source: Template source, empty for the packaged default
+    :param classification: IntelOwl observable classification
+    :param pre_render: Template context, as built by IntelowlHandler.prerender_report
+    :return: Future of the rendered HTML
+    """
+    from iris_intelowl_module_2.intelowl_handler.retry_queue import get_state_dir
+    from iris_intelowl_module_2.intelowl_handler.serializer import get_dumps
+
+    pool = get_render_pool(mod_config.get('intelowl_render_processes'))
+    worker_config = {'intelowl_state_dir': get_state_dir(mod_config),
+                     'intelowl_json_backend': mod_config.get('intelowl_json_backend')}
+    pre_render_json = get_dumps(mod_config.get('intelowl_json_backend') or 'auto')(pre_render)
+    return pool.submit(_render_in_worker, worker_config, source, classification, pre_render_json)
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+#
+#
+#  IRIS intelowl Source Code
+#  Copyright (C) 2022 - dfir-iris
+#  contact@dfir-iris.org
+#  Created by dfir-iris - 2022-10-29
+#
+#  License Apache Software License 3.0
+
+"""
+Record / replay of IntelOwl responses, to profile the module offline at production volumes.
+
+Recordings are gzipped JSON lines, one per API call:
+    {"e": "submit", "j": <job id>, "c": <classification>, "o": <observable>, "p": <playbook>, "r": <response>}
+    {"e": "submit", "j": <job id>, "c": <classification>, "o": <observable>, "a": <analyzers>, "r": <response>}
+    {"e": "job", "j": <job id>, "t": <seconds since the submit>, "r": <job>}
+
+Playbook, analyzer and batch submissions are recorded, as well as the jobs fetched one by one. File lookups
+and uploads, and the other raw API requests, are not: in replay they fail with IntelOwlClientException, so the
+handler falls back as it does when IntelOwl rejects them.
+"""
+
+import gzip
+import itertools
+import json
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from pyintelowl import IntelOwlClientException
+
+from iris_intelowl_module_2.intelowl_handler.batch import submit_playbook_batch
+
+
+class RecordingClient(object):
+    """
+    Wraps an IntelOwl client and appends the submit and job responses to a recording.
+    Every other attribute is served by the wrapped client.
+    """
+    def __init__(self, client, path):
+        self._client = client
+        self._path = path
+        self._submitted_at = {}
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+    def _record(self, event):
+        line = json.dumps(event, separators=(',', ':'), default=str) + '\n'
+        with self._lock, gzip.open(self._path, 'at', encoding='utf-8') as fd:
+            fd.write(line)
+
+    def send_observable_analysis_playbook_request(self, observable_name, playbook_requested, tags_labels=None,
+                                                  observable_classification=None, **kwargs):
+        response = self._client.send_observable_analysis_playbook_request(
+            observable_name=observable_name, playbook_requested=playbook_requested, tags_labels=tags_labels,
+            observable_classification=observable_classification, **kwargs)
+
+        job_id = response.get("job_id")
+        self._submitted_at[job_id] = time.monotonic()
+        self._record({"e": "submit", "j": job_id, "c": observable_classification, "o": observable_name,
+                      "p": playbook_requested, "r": response})
+        return response
+
+    def send_observable_analysis_request(self, observable_name, analyzers_requested=None, tags_labels=None,
+                                         observable_classification=None, **kwargs):
+        response = self._client.send_observable_analysis_request(
+            observable_name=observable_name, analyzers_requested=analyzers_requested, tags_labels=tags_labels,
+            observable_classification=observable_classification, **kwargs)
+
+        job_id = response.get("job_id")
+        self._submitted_at[job_id] = time.monotonic()
+        self._record({"e": "submit", "j": job_id, "c": observable_classification, "o": observable_name,
+                      "a": analyzers_requested, "r": response})
+        return response
+
+    def submit_playbook_batch(self, classification, observables, playbook_name, tags_labels=None):
+        job_ids = submit_playbook_batch(self._client, classification, observables, playbook_name, tags_labels)
+
+        now = time.monotonic()
+        for observable, job_id in zip(observables, job_ids):
+            if job_id is None:
+                continue
+
+            self._submitted_at[job_id] = now
+            self._record({"e": "submit", "j": job_id, "c": classification, "o": observable, "p": playbook_name,
+                          "r": {"job_id": job_id, "status": "accepted"}})
+        return job_ids
+
+    def get_job_by_id(self, job_id):
+        job = self._client.get_job_by_id(job_id)
+        elapsed = time.monotonic() - self._submitted_at.get(job_id, time.monotonic())
+        self._record({"e": "job", "j": job_id, "t": round(elapsed, 3), "r": job})
+        return job
+
+
+class ReplayClient(object):
+    """
+    Serves a recording in place of IntelOwl. A replayed job goes through its recorded states with the
+    recorded timing multiplied by time_scale (0 returns the final state at once). Observables that were not
+    recorded are served the recordings of the same classification in turn, so a small recording can
+    drive a large load test. Requests outside of the recording raise IntelOwlClientException.
+    """
+    def __init__(self, path, time_scale=1.0):
+        self.time_scale = time_scale
+        self._submits = {}
+        self._by_classification = defaultdict(list)
+        self._timelines = defaultdict(list)
+        self._replayed = {}
+        self._job_ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+        with gzip.open(path, 'rt', encoding='utf-8') as fd:
+            for line in fd:
+                event = json.loads(line)
+                if event["e"] == "submit":
+                    self._submits[(event["c"], event["o"], event.get("p"))] = event
+                    self._by_classification[event["c"]].append(event)
+                elif event["e"] == "job":
+                    self._timelines[event["j"]].append((event["t"], event["r"]))
+
+        self._cycles = {classification: itertools.cycle(events)
+                        for classification, events in self._by_classification.items()}
+
+    @property
+    def session(self):
+        raise IntelOwlClientException('Raw IntelOwl API requests are not recorded, they cannot be replayed')
+
+    def _replay_submit(self, classification, observable_name, playbook_name, tags_labels, analyzers=None):
+        with self._lock:
+            event = self._submits.get((classification, observable_name, playbook_name))
+            if event is None:
+                if classification not in self._cycles:
+                    raise IntelOwlClientException(f'No recorded {classification} job to replay')
+                event = next(self._cycles[classification])
+
+            job_id = next(self._job_ids)
+            self._replayed[job_id] = {"started_at": time.monotonic(), "received": datetime.now(timezone.utc),
+                                      "recorded_job_id": event["j"], "classification": classification,
+                                      "observable_name": observable_name, "playbook": playbook_name,
+                                      "analyzers": analyzers, "tags": list(tags_labels or [])}
+
+        response = dict(event["r"])
+        response["job_id"] = job_id
+        return response
+
+    def send_observable_analysis_playbook_request(self, observable_name, playbook_requested, tags_labels=None,
+                                                  observable_classification=None, **kwargs):
+        return self._replay_submit(observable_classification, observable_name, playbook_requested, tags_labels)
+
+    def send_observable_analysis_request(self, observable_name, analyzers_requested=None, tags_labels=None,
+                                         observable_classification=None, **kwargs):
+        return self._replay_submit(observable_classification, observable_name, None, tags_labels,
+                                   analyzers_requested)
+
+    def submit_playbook_batch(self, classification, observables, playbook_name, tags_labels=None):
+        return [self._replay_submit(classification, observable, playbook_name, tags_labels)["job_id"]
+                for observable in observables]
+
+    def get_job_by_id(self, job_id):
+        replayed = self._replayed.get(int(job_id))
+        if replayed is None:
+            raise IntelOwlClientException(f'Job {job_id} was not submitted during this replay')
+
+        timeline = self._timelines.get(replayed["recorded_job_id"])
+        if not timeline:
+            job = {"status": "reported_without_fails", "analyzer_reports": [], "connector_reports": []}
+        else:
+            elapsed = time.monotonic() - replayed["started_at"]
+            job = timeline[0][1]
+            for offset, recorded_job in timeline:
+                if offset * self.time_scale > elapsed:
+                    break
+                job = recorded_job
+
+        job = dict(job)
+        job["id"] = int(job_id)
+        job["observable_name"] = replayed["observable_name"]
+        job["observable_classification"] = replayed["classification"]
+        job["playbook_requested"] = replayed["playbook"]
+        job["received_request_time"] = replayed["received"].isoformat()
+        job["tags"] = [{"label": label} for label in replayed["tags"]]
+        if replayed["analyzers"] is not None:
+            job["analyzer_reports"] = [report for report in job.get("analyzer_reports") or []
+                                       if report.get("name") in replayed["analyzers"]]
+        return job
+
+    def list_jobs(self, tag, page_size=100, max_pages=20, statuses=None):
+        job_ids = sorted((job_id for job_id, replayed in self._replayed.items() if tag in replayed["tags"]),
+                         reverse=True)
+        jobs = []
+        for job_id in job_ids:
+            job = self.get_job_by_id(job_id)
+            if statuses and job.get("status") not in statuses:
+                continue
+
+            if len(jobs) >= page_size * max_pages:
+                break
+
+            job.pop("analyzer_reports", None)
+            job.pop("connector_reports", None)
+            jobs.append(job)
+
+        return jobs
+
+    def kill_running_job(self, job_id):
+        return True
+
+    def kill_running_analyzer(self, job_id, analyzer_name):
+        return True
+
+
+_replay_clients = {}
+_lock = threading.Lock()
+
+
+def get_replay_client(path, time_scale) -> ReplayClient:
+    """
+    Returns the process-wide replay client of a recording, loading it once
+
+    :param path: Path of the recording
+    :param time_scale: Multiplier applied to the recorded timing
+    :return: ReplayClient
+    """
+    with _lock:
+        client = _replay_clients.get(path)
+        if client is None:
+            client = ReplayClient(path, time_scale)
+            _replay_clients[path] = client
+
+        client.time_scale = time_scale
+
+    return client
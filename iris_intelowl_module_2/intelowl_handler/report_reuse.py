@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+#
+#
+#  IRIS intelowl Source Code
+#  Copyright (C) 2022 - dfir-iris
+#  contact@dfir-iris.org
+#  Created by dfir-iris - 2022-10-29
+#
+#  License Apache Software License 3.0
+
+from datetime import datetime, timedelta, timezone
+
+
+REPORT_TAB = 'IntelOwl Report'
+REPORT_FIELD = 'HTML report'
+ENRICHED_AT_FIELD = 'Enriched at'
+PLAYBOOK_FIELD = 'Playbook'
+
+
+def _field_value(ioc, field_name):
+    tab = (getattr(ioc, 'custom_attributes', None) or {}).get(REPORT_TAB) or {}
+    field = tab.get(field_name) or {}
+    return field.get('value')
+
+
+def get_enrichment_time(ioc, playbook_name=None):
+    """
+    Returns when the IntelOwl report of an IOC was produced
+
+    :param ioc: IOC instance
+    :param playbook_name: If set, only a report of this playbook is considered
+    :return: Aware datetime, or None if the IOC has no such report
+    """
+    if not _field_value(ioc, REPORT_FIELD):
+        return None
+
+    if playbook_name and _field_value(ioc, PLAYBOOK_FIELD) != playbook_name:
+        return None
+
+    try:
+        return datetime.fromisoformat(_field_value(ioc, ENRICHED_AT_FIELD))
+    except (TypeError, ValueError):
+        return None
+
+
+def is_fresh(ioc, playbook_name, max_age_hours) -> bool:
+    """
+    Tells whether the IOC holds a report of the playbook younger than max_age_hours
+
+    :return: bool
+    """
+    enriched_at = get_enrichment_time(ioc, playbook_name)
+    if enriched_at is None:
+        return False
+
+    return datetime.now(timezone.utc) - enriched_at <= timedelta(hours=max_age_hours)
+
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+#
+#
+#  IRIS intelowl Source Code
+#  Copyright (C) 2022 - dfir-iris
+#  contact@dfir-iris.org
+#  Created by dfir-iris - 2022-10-29
+#
+#  License Apache Software License 3.0
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from iris_intelowl_module_2.intelowl_handler.retry_queue import get_state_dir
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS result_cache (
+    namespace TEXT NOT NULL,
+    cache_key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (namespace, cache_key)
+);
+CREATE INDEX IF NOT EXISTS result_cache_expiry ON result_cache (expires_at);
+"""
+
+
+class ResultCache(object):
+    """
+    SQLite backed key/value cache with a TTL per entry, shared by the worker processes.
+    Entries live in namespaces, e.g the negative cache of failed observables.
+    """
+    def __init__(self, db_path):
+        self.db_path = db_path
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def get(self, namespace, key):
+        """
+        :return: The cached value, or None if missing or expired
+        """
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM result_cache WHERE namespace = ? AND cache_key = ? "
+                               "AND expires_at > ?", (namespace, key, time.time())).fetchone()
+
+        return json.loads(row[0]) if row else None
+
+    def put(self, namespace, key, value, ttl):
+        """
+        Stores a JSON serializable value for ttl seconds
+        """
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO result_cache (namespace, cache_key, value, expires_at) "
+                         "VALUES (?, ?, ?, ?)",
+                         (namespace, key, json.dumps(value, separators=(',', ':'), default=str), time.time() + ttl))
+
+    def delete(self, namespace, key):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM result_cache WHERE namespace = ? AND cache_key = ?", (namespace, key))
+
+    def purge(self):
+        """
+        Removes the expired entries
+        """
+        with self._connect() as conn:
+            conn.execute("DELETE FROM result_cache WHERE expires_at <= ?", (time.time(),))
+
+
+def make_key(*parts) -> str:
+    return '\x1f'.join(str(part) for part in parts)
+
+
+_caches = {}
+_lock = threading.Lock()
+
+
+def get_result_cache(mod_config) -> ResultCache:
+    """
+    Returns the process-wide result cache of the module configuration
+
+    :param mod_config: Module configuration
+    :return: ResultCache
+    """
+    db_path = os.path.join(get_state_dir(mod_config), 'result_cache.sqlite')
+    with _lock:
+        cache = _caches.get(db_path)
+        if cache is None:
+            cache = ResultCache(db_path)
+            cache.purge()
+            _caches[db_path] = cache
+
+    return cache
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+#
+#
+#  IRIS intelowl Source Code
+#  Copyright (C) 2022 - dfir-iris
+#  contact@dfir-iris.org
+#  Created by dfir-iris - 2022-10-29
+#
+#  License Apache Software License 3.0
+
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+import traceback
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS retry_queue (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ioc_id INTEGER NOT NULL,
+    ioc_value TEXT NOT NULL,
+    classification TEXT NOT NULL,
+    playbook TEXT NOT NULL,
+    reason TEXT,
+    job_id INTEGER,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt REAL NOT NULL,
+    abandoned INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    UNIQUE (ioc_id, classification, playbook)
+);
+CREATE INDEX IF NOT EXISTS retry_queue_due ON retry_queue (abandoned, next_attempt);
+"""
+
+
+def get_state_dir(mod_config) -> str:
+    """
+    Returns the directory holding the module local state (queues, caches), creating it if needed
+
+    :param mod_config: Module configuration
+    :return: Path of the state directory
+    """
+    state_dir = mod_config.get('intelowl_state_dir') or os.path.join(tempfile.gettempdir(), 'iris_intelowl_module_2')
+    os.makedirs(state_dir, exist_ok=True)
+    return state_dir
+
+
+class RetryQueue(object):
+    """
+    SQLite backed queue of failed or timed-out enrichments.
+    Entries are unique per (IOC, classification, playbook) so repeated failures of the same IOC
+    never stack up, and are retried with an exponential backoff until max_attempts is reached.
+    A retry first claims its entry for lease seconds, so only one process retries it at a time.
+    """
+    def __init__(self, db_path, max_attempts=5, base_delay=60, max_delay=3600, lease=1200):
+        self.db_path = db_path
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.lease = lease
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            columns = [row["name"] for row in conn.execute("PRAGMA table_info(retry_queue)")]
+            if "job_id" not in columns:
+                conn.execute("ALTER TABLE retry_queue ADD COLUMN job_id INTEGER")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _backoff(self, attempts) -> float:
+        delay = min(self.max_delay, self.base_delay * (2 ** attempts))
+        # Jitter spreads re-submits of a failed batch instead of replaying it in one burst
+        return delay * random.uniform(0.5, 1.0)
+
+    def enqueue(self, ioc_id, ioc_value, classification, playbook, reason=None, job_id=None):
+        """
+        Adds a failed enrichment to the queue. An already queued entry only gets its reason and job refreshed,
+        its attempts count and schedule are kept. An abandoned entry is queued again from scratch.
+
+        :param ioc_id: ID of the IOC in IRIS
+        :param ioc_value: Value of the IOC
+        :param classification: IntelOwl observable classification
+        :param playbook: Name of the playbook requested
+        :param reason: Why the enrichment failed
+        :param job_id: IntelOwl job still running for this IOC, to collect instead of submitting again
+        :return: Nothing
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("INSERT INTO retry_queue (ioc_id, ioc_value, classification, playbook, reason, job_id, "
+                         "next_attempt, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                         "ON CONFLICT (ioc_id, classification, playbook) DO UPDATE SET reason = excluded.reason, "
+                         "job_id = excluded.job_id, "
+                         "attempts = CASE WHEN abandoned THEN 0 ELSE attempts END, "
+                         "next_attempt = CASE WHEN abandoned THEN excluded.next_attempt ELSE next_attempt END, "
+                         "abandoned = 0",
+                         (ioc_id, ioc_value, classification, playbook, reason, job_id, now + self._backoff(0), now))
+
+    def discard(self, ioc_id, classification, playbook):
+        """
+        Removes an entry, typically because the IOC got enriched by another trigger
+
+        :return: Nothing
+        """
+        with self._connect() as conn:
+            conn.execute("DELETE FROM retry_queue WHERE ioc_id = ? AND classification = ? AND playbook = ?",
+                         (ioc_id, classification, playbook))
+
+    def due(self, limit=20) -> list:
+        """
+        Returns the entries whose retry time is reached
+
+        :param limit: Maximum number of entries returned
+        :return: List of dict
+        """
+        with self._connect() as conn:
+            rows = conn.execute("SELECT * FROM retry_queue WHERE abandoned = 0 AND next_attempt <= ? "
+                                "ORDER BY next_attempt LIMIT ?", (time.time(), limit)).fetchall()
+        return [dict(row) for row in rows]
+
+    def claim(self, entry_id) -> bool:
+        """
+        Claims a due entry by pushing its retry time past the lease. An entry whose retry is not confirmed
+        with mark_done or mark_failed before the lease ends, e.g. because its process died, is due again.
+
+        :param entry_id: ID of the entry
+        :return: True if the entry was due and is now claimed by the caller, False if another process claimed it
+        """
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute("UPDATE retry_queue SET next_attempt = ? "
+                                  "WHERE id = ? AND abandoned = 0 AND next_attempt <= ?",
+                                  (now + self.lease, entry_id, now))
+            return cursor.rowcount == 1
+
+    def mark_done(self, entry_id):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM retry_queue WHERE id = ?", (entry_id,))
+
+    def mark_failed(self, entry_id, reason=None):
+        """
+        Records a failed retry. The entry is rescheduled, or abandoned once max_attempts is reached
+
+        :return: Nothing
+        """
+        with self._connect() as conn:
+            row = conn.execute("SELECT attempts FROM retry_queue WHERE id = ?", (entry_id,)).fetchone()
+            if row is None:
+                return
+
+            attempts = row["attempts"] + 1
+            conn.execute("UPDATE retry_queue SET attempts = ?, reason = COALESCE(?, reason), next_attempt = ?, "
+                         "abandoned = ? WHERE id = ?",
+                         (attempts, reason, time.time() + self._backoff(attempts),
+                          int(attempts >= self.max_attempts), entry_id))
+
+    def purge_abandoned(self, max_age=7 * 86400):
+        """
+        Forgets the entries abandoned more than max_age seconds ago
+
+        :return: Nothing
+        """
+        with self._connect() as conn:
+            conn.execute("DELETE FROM retry_queue WHERE abandoned = 1 AND next_attempt < ?",
+                         (time.time() - max_age,))
+
+    def size(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM retry_queue WHERE abandoned = 0").fetchone()[0]
+
+
+class RetryDrainer(threading.Thread):
+    """
+    Background thread periodically retrying the due entries of a RetryQueue.
+    The callback receives an entry and returns True when the enrichment succeeded.
+    """
+    def __init__(self, queue, callback, logger, interval=30):
+        super().__init__(name="intelowl-retry-drainer", daemon=True)
+        self.queue = queue
+        self.callback = callback
+        self.log = logger
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.drain()
+                self.queue.purge_abandoned()
+            except Exception:
+                self.log.error(traceback.format_exc())
+
+    def drain(self):
+        for entry in self.queue.due():
+            if self._stop_event.is_set():
+                return
+
+            if not self.queue.claim(entry["id"]):
+                continue
+
+            try:
+                succeeded = self.callback(entry)
+            except Exception:
+                self.log.error(traceback.format_exc())
+                succeeded = False
+
+            if succeeded:
+                self.queue.mark_done(entry["id"])
+            else:
+                self.queue.mark_failed(entry["id"])
+
+
+_queues = {}
+_drainers = {}
+_lock = threading.Lock()
+
+
+def get_retry_queue(mod_config) -> RetryQueue:
+    """
+    Returns the process-wide retry queue matching the module configuration
+
+    :param mod_config: Module configuration
+    :return: RetryQueue
+    """
+    db_path = os.path.join(get_state_dir(mod_config), 'retry_queue.sqlite')
+    with _lock:
+        queue = _queues.get(db_path)
+        if queue is None:
+            queue = RetryQueue(db_path)
+            _queues[db_path] = queue
+
+        queue.max_attempts = mod_config.get('intelowl_retry_max_attempts') or 5
+        queue.base_delay = mod_config.get('intelowl_retry_base_delay') or 60
+        # A retry may wait for its job up to intelowl_maxtime, the lease has to outlast it
+        queue.lease = (mod_config.get('intelowl_maxtime') or 15) * 60 + 300
+
+    return queue
+
+
+def ensure_drainer(queue, callback, logger) -> RetryDrainer:
+    """
+    Starts the drainer of a queue if it is not already running in this process
+
+    :return: RetryDrainer
+    """
+    with _lock:
+        drainer = _drainers.get(queue.db_path)
+        if drainer is None or not drainer.is_alive():
+            drainer = RetryDrainer(queue, callback, logger)
+            drainer.start()
+            _drainers[queue.db_path] = drainer
+        else:
+            drainer.callback = callback
+
+    return drainer
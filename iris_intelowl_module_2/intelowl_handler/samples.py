@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+#
+#
+#  IRIS intelowl Source Code
+#  Copyright (C) 2022 - dfir-iris
+#  contact@dfir-iris.org
+#  Created by dfir-iris - 2022-10-29
+#
+#  License Apache Software License 3.0
+
+"""
+Hash-first handling of file IOCs: the hash of a sample is looked up in IntelOwl before the sample itself,
+found in a local sample directory, is uploaded.
+"""
+
+import hashlib
+import io
+import os
+import re
+import uuid
+
+
+# Hashes IntelOwl looks files up by, with their hex length
+FILE_HASH_LENGTHS = {'md5': 32, 'sha1': 40, 'sha256': 64}
+_HEX = re.compile(r'^[0-9a-fA-F]+$')
+
+
+def get_hash_algorithm(type_name):
+    """
+    Returns the hash algorithm of an IRIS file IOC type, e.g sha256 for filename|sha256 and md5 for malware-sample.
+    The hex length alone cannot tell, e.g an imphash looks like an md5 and a pehash like a sha1.
+
+    :param type_name: IRIS IOC type name
+    :return: Algorithm name, or None if the type carries no hash
+    """
+    if type_name == 'malware-sample':
+        return 'md5'
+
+    prefix, _, algorithm = (type_name or '').partition('|')
+    return (algorithm or None) if prefix == 'filename' else None
+
+
+def is_file_hash_type(type_name) -> bool:
+    """
+    Tells whether an IRIS IOC type carries no hash, or a hash IntelOwl can look a file up by
+    """
+    algorithm = get_hash_algorithm(type_name)
+    return algorithm is None or algorithm in FILE_HASH_LENGTHS
+
+
+def parse_hash(value, algorithm):
+    """
+    :return: The lowercase hash, or None if the value is not a hash of the algorithm
+    """
+    value = (value or '').strip()
+    if FILE_HASH_LENGTHS.get(algorithm) != len(value) or not _HEX.match(value):
+        return None
+
+    return value.lower()
+
+
+def split_file_ioc(value, algorithm=None):
+    """
+    Splits the value of a file IOC, e.g filename|sha256 or malware-sample, into its filename and hash
+
+    :param value: IOC value
+    :param algorithm: Hash algorithm of the IOC type, see get_hash_algorithm
+    :return: Tuple (filename or None, hash or None)
+    """
+    filename, _, file_hash = value.strip().rpartition('|')
+    file_hash = parse_hash(file_hash, algorithm)
+    if file_hash is not None:
+        return filename.strip() or None, file_hash
+
+    return value.strip() or None, None
+
+
+def hash_file(path, chunk_size=1 << 20) -> dict:
+    """
+    Computes the MD5, SHA1 and SHA256 of a file in one streamed pass
+
+    :param path: Path of the file
+    :param chunk_size: Size of the chunks read
+    :return: Dict algorithm -> hex digest
+    """
+    digests = {algorithm: hashlib.new(algorithm) for algorithm in ('md5', 'sha1', 'sha256')}
+    with open(path, 'rb') as fd:
+        for chunk in iter(lambda: fd.read(chunk_size), b''):
+            for digest in digests.values():
+                digest.update(chunk)
+
+    return {algorithm: digest.hexdigest() for algorithm, digest in digests.items()}
+
+
+def find_sample(sample_dir, filename=None, file_hash=None):
+    """
+    Looks for a sample in the sample directory, stored under its hash or its filename
+
+    :param sample_dir: Directory holding the samples
+    :param filename: Filename of the IOC
+    :param file_hash: Hash of the IOC
+    :return: Path of the sample, or None
+    """
+    if not sample_dir:
+        return None
+
+    # Only basenames, an IOC value must not point outside the sample directory
+    for name in (file_hash, filename):
+        if not name:
+            continue
+
+        path = os.path.join(sample_dir, os.path.basename(name))
+        if os.path.isfile(path):
+            return path
+
+    return None
+
+
+class MultipartFileStream(object):
+    """
+    multipart/form-data body streaming a file from disk, so a sample is never held in memory whatever its size.
+    The length is known upfront: requests sends it as Content-Length and reads the body by blocks, instead of
+    a chunked transfer encoding that the WSGI servers in front of IntelOwl may reject.
+    It deliberately has no tell(): requests would take the length from it instead of __len__.
+    """
+    def __init__(self, fields, file_field, path, filename):
+        self.boundary = uuid.uuid4().hex
+        self.content_type = f'multipart/form-data; boundary={self.boundary}'
+
+        safe_filename = os.path.basename(filename).replace('"', '%22').replace('\r', '').replace('\n', '')
+        head = b''.join(self._part_header(name) + str(value).encode('utf-8') + b'\r\n' for name, value in fields)
+        head += self._part_header(file_field, safe_filename)
+        tail = f'\r\n--{self.boundary}--\r\n'.encode('ascii')
+
+        self._length = len(head) + os.path.getsize(path) + len(tail)
+        self._parts = [io.BytesIO(head), open(path, 'rb'), io.BytesIO(tail)]
+
+    def _part_header(self, name, filename=None) -> bytes:
+        disposition = f'form-data; name="{name}"' + (f'; filename="{filename}"' if filename else '')
+        header = f'--{self.boundary}\r\nContent-Disposition: {disposition}\r\n'
+        if filename:
+            header += 'Content-Type: application/octet-stream\r\n'
+        return (header + '\r\n').encode('utf-8')
+
+    def __len__(self):
+        return self._length
+
+    def read(self, size=-1):
+        chunks = []
+        while self._parts and (size < 0 or size > 0):
+            chunk = self._parts[0].read(size)
+            if not chunk:
+                self._parts.pop(0).close()
+                continue
+
+            chunks.append(chunk)
+            if size > 0:
+                size -= len(chunk)
+
+        return b''.join(chunks)
+
+    def close(self):
+        for part in self._parts:
+            part.close()
+        self._parts = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def find_file_job(client, md5, playbook_name, minutes_ago=None):
+    """
+    Asks IntelOwl whether the sample was already analyzed by the playbook
+
+    :param client: IntelOwl client, or a client routing over several instances
+    :param md5: MD5 of the sample
+    :param playbook_name: Name of the playbook
+    :param minutes_ago: Only consider the jobs younger than this, None for any age
+    :return: ID of the reported or running job, or None
+    """
+    lookup = getattr(client, 'find_file_job', None)
+    if lookup is not None:
+        return lookup(md5, playbook_name, minutes_ago)
+
+    payload = {"md5": md5, "playbooks": [playbook_name], "running_only": False}
+    if minutes_ago:
+        payload["minutes_ago"] = minutes_ago
+
+    response = client.session.post(f'{client.instance}/api/ask_analysis_availability', json=payload)
+    response.raise_for_status()
+    answer = response.json()
+    if answer.get("status") in (None, "not_available") or not answer.get("job_id"):
+        return None
+
+    return int(answer["job_id"])
+
+
+def upload_sample(client, path, filename, playbook_name, tags_labels=None, tlp="CLEAR", timeout=600):
+    """
+    Submits a sample to a playbook with a streamed upload
+
+    :param client: IntelOwl client, or a client routing over several instances
+    :param path: Path of the sample
+    :param filename: Filename given to IntelOwl
+    :param playbook_name: Name of the playbook
+    :param tags_labels: Labels of the job
+    :param tlp: TLP of the analysis
+    :param timeout: Upload timeout in seconds
+    :return: ID of the created job
+    """
+    upload = getattr(client, 'upload_sample', None)
+    if upload is not None:
+        return upload(path, filename, playbook_name, tags_labels, tlp, timeout)
+
+    fields = [("playbook_requested", playbook_name), ("tlp", tlp)]
+    fields.extend(("tags_labels", label) for label in tags_labels or [])
+
+    with MultipartFileStream(fields, "files", path, filename or os.path.basename(path)) as body:
+        response = client.session.post(f'{client.instance}/api/playbook/analyze_multiple_files', data=body,
+                                       headers={'Content-Type': body.content_type}, timeout=timeout)
+    response.raise_for_status()
+    answer = response.json()
+    results = answer.get("results") or [answer]
+    return int(results[0]["job_id"])
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+#
+#
+#  IRIS intelowl Source Code
+#  Copyright (C) 2022 - dfir-iris
+#  contact@dfir-iris.org
+#  Created by dfir-iris - 2022-10-29
+#
+#  License Apache Software License 3.0
+
+import json
+
+from markupsafe import Markup
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from jinja2 import pass_context
+except ImportError:
+    from jinja2 import contextfilter as pass_context
+
+
+def _stdlib_dumps(obj, indent=None) -> str:
+    # Sorted keys, as the Jinja tojson filter
+    return json.dumps(obj, indent=indent, sort_keys=True, default=str)
+
+
+def _orjson_dumps(obj, indent=None) -> str:
+    # orjson only knows a 2 spaces indentation: the raw reports are indented by 2 spaces instead of the 4 asked
+    # by the templates, which is as readable in the report viewers
+    option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SORT_KEYS
+    if indent:
+        option |= orjson.OPT_INDENT_2
+
+    try:
+        return orjson.dumps(obj, default=str, option=option).decode('utf-8')
+    except orjson.JSONEncodeError:
+        # e.g integers wider than 64 bits, or nesting deeper than orjson allows
+        return _stdlib_dumps(obj, indent)
+
+
+def get_dumps(backend="auto"):
+    """
+    Returns the JSON serialization function of a backend
+
+    :param backend: 'orjson', 'json', or 'auto' to use orjson when it is installed
+    :return: Function taking an object and an optional indent, and returning a str
+    """
+    if backend in ("auto", "orjson") and orjson is not None:
+        return _orjson_dumps
+
+    return _stdlib_dumps
+
+
+def _htmlsafe(dumped) -> Markup:
+    # Same escaping as jinja2.utils.htmlsafe_json_dumps, so the output can be embedded in HTML and scripts
+    return Markup(dumped.replace("<", "\\u003c").replace(">", "\\u003e")
+                  .replace("&", "\\u0026").replace("'", "\\u0027"))
+
+
+def make_tojson_filter(backend="auto"):
+    """
+    Builds a replacement of the Jinja tojson filter using the chosen backend.
+    When the render context holds a _tojson_memo dict, an object serialized several times during the
+    render (e.g the results blob) is only serialized once.
+
+    :param backend: JSON backend, see get_dumps
+    :return: Jinja filter
+    """
+    dumps = get_dumps(backend)
+
+    @pass_context
+    def tojson(context, value, indent=None):
+        memo = context.get("_tojson_memo")
+        if memo is None:
+            return _htmlsafe(dumps(value, indent))
+
+        # The memo holds the value next to its JSON: a temporary freed during the render cannot have its id
+        # reused by another object, and the identity check rules out any stale entry
+        key = (id(value), indent)
+        entry = memo.get(key)
+        if entry is None or entry[0] is not value:
+            entry = (value, _htmlsafe(dumps(value, indent)))
+            memo[key] = entry
+
+        return entry[1]
+
+    return tojson
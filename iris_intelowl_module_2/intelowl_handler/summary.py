@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+#
+#
+#  IRIS intelowl Source Code
+#  Copyright (C) 2022 - dfir-iris
+#  contact@dfir-iris.org
+#  Created by dfir-iris - 2022-10-29
+#
+#  License Apache Software License 3.0
+
+"""
+Verdict extraction from IntelOwl jobs.
+
+Each extractor reads the report of one analyzer and returns a dict with any of these keys:
+    - malicious: bool, the analyzer flags the observable
+    - detections: int, number of engines or sources flagging it
+    - score: number, the analyzer's own reputation or confidence score
+    - tags: list of str
+
+Extractors of other analyzers can be added with the register_extractor decorator.
+"""
+
+from collections import Counter
+
+
+_EXTRACTORS = {}
+
+
+def register_extractor(*analyzer_names):
+    """
+    Registers a function as the verdict extractor of one or more analyzers
+
+    :param analyzer_names: IntelOwl analyzer names
+    :return: Decorator
+    """
+    def decorator(extractor):
+        for analyzer_name in analyzer_names:
+            _EXTRACTORS[analyzer_name] = extractor
+        return extractor
+
+    return decorator
+
+
+def _get(report, *path, default=None):
+    for key in path:
+        if not isinstance(report, dict):
+            return default
+        report = report.get(key)
+
+    return default if report is None else report
+
+
+@register_extractor("VirusTotal_v3_Get_Observable", "VirusTotal_v3_Get_File")
+def _virustotal(report):
+    attributes = _get(report, "data", "attributes", default={})
+    detections = _get(attributes, "last_analysis_stats", "malicious", default=0)
+    return {"malicious": detections > 0, "detections": detections,
+            "score": attributes.get("reputation"), "tags": attributes.get("tags") or []}
+
+
+@register_extractor("AbuseIPDB")
+def _abuseipdb(report):
+    score = _get(report, "data", "abuseConfidenceScore")
+    return {"malicious": bool(score and score >= 50), "score": score,
+            "detections": _get(report, "data", "totalReports", default=0)}
+
+
+@register_extractor("OTXQuery")
+def _otx(report):
+    pulses = _get(report, "pulses", default=[])
+    tags = [tag for pulse in pulses for tag in pulse.get("tags") or []]
+    return {"malicious": bool(pulses), "detections": len(pulses), "tags": tags}
+
+
+@register_extractor("GreyNoiseCommunity", "GreyNoise")
+def _greynoise(report):
+    classification = report.get("classification")
+    return {"malicious": classification == "malicious", "tags": [classification] if classification else []}
+
+
+@register_extractor("URLhaus")
+def _urlhaus(report):
+    listed = report.get("query_status") == "ok"
+    return {"malicious": listed, "detections": len(report.get("urls") or []) if listed else 0,
+            "tags": report.get("tags") or []}
+
+
+@register_extractor("ThreatFox")
+def _threatfox(report):
+    data = report.get("data") if isinstance(report.get("data"), list) else []
+    return {"malicious": bool(data), "detections": len(data),
+            "tags": [entry.get("malware_printable") for entry in data if entry.get("malware_printable")]}
+
+
+@register_extractor("MalwareBazaar_Get_Observable")
+def _malwarebazaar(report):
+    data = report.get("data") if isinstance(report.get("data"), list) else []
+    return {"malicious": bool(data), "tags": [tag for entry in data for tag in entry.get("tags") or []]}
+
+
+def extract_summary(job_result, top_tags=10) -> dict:
+    """
+    Computes the compact verdict fields of a job
+
+    :param job_result: Job as returned by the IntelOwl API
+    :param top_tags: Number of most frequent tags kept
+    :return: Dict with verdict, malicious_analyzers, detections, analyzers, failed_analyzers, top_tags, scores.
+             The verdict is unknown when no analyzer with an extractor succeeded.
+    """
+    malicious_analyzers = []
+    detections = 0
+    failed = 0
+    assessed = 0
+    scores = {}
+    tags = Counter()
+
+    analyzer_reports = job_result.get("analyzer_reports") or []
+    for analyzer_report in analyzer_reports:
+        if str(analyzer_report.get("status", "")).upper() != "SUCCESS":
+            failed += 1
+            continue
+
+        extractor = _EXTRACTORS.get(analyzer_report.get("name"))
+        report = analyzer_report.get("report")
+        if extractor is None or not isinstance(report, dict):
+            continue
+
+        try:
+            verdict = extractor(report)
+        except (AttributeError, KeyError, TypeError, ValueError):
+            continue
+
+        assessed += 1
+        if verdict.get("malicious"):
+            malicious_analyzers.append(analyzer_report.get("name"))
+        detections += verdict.get("detections") or 0
+        if verdict.get("score") is not None:
+            scores[analyzer_report.get("name")] = verdict["score"]
+        tags.update(tag for tag in verdict.get("tags") or [] if isinstance(tag, str))
+
+    if malicious_analyzers:
+        verdict = "malicious" if len(malicious_analyzers) > 1 or detections > 2 else "suspicious"
+    elif assessed:
+        verdict = "clean"
+    else:
+        verdict = "unknown"
+
+    return {
+        "verdict": verdict,
+        "malicious_analyzers": malicious_analyzers,
+        "detections": detections,
+        "analyzers": len(analyzer_reports),
+        "failed_analyzers": failed,
+        "top_tags": [tag for tag, _ in tags.most_common(top_tags)],
+        "scores": scores,
+    }
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+#
+#
+#  IRIS intelowl Source Code
+#  Copyright (C) 2022 - dfir-iris
+#  contact@dfir-iris.org
+#  Created by dfir-iris - 2022-10-29
+#
+#  License Apache Software License 3.0
+
+import hashlib
+import os
+import threading
+
+from jinja2 import (BaseLoader, ChoiceLoader, Environment, FileSystemBytecodeCache, PackageLoader, TemplateNotFound,
+                    TemplateSyntaxError)
+
+from iris_intelowl_module_2.intelowl_handler.retry_queue import get_state_dir
+from iris_intelowl_module_2.intelowl_handler.serializer import make_tojson_filter
+
+
+TEMPLATE_KEYS = {
+    "domain": "intelowl_domain_report_template",
+    "ip": "intelowl_ip_report_template",
+    "url": "intelowl_url_report_template",
+    "hash": "intelowl_hash_report_template",
+    "generic": "intelowl_generic_report_template",
+}
+
+
+class _SourceLoader(BaseLoader):
+    """
+    Serves template sources registered by content hash. Going through a loader, rather than
+    Environment.from_string, is what lets Jinja use the bytecode cache. Names it does not know
+    fall through to the templates packaged with the module.
+    """
+    def __init__(self):
+        self._sources = {}
+
+    def register(self, source) -> str:
+        name = hashlib.sha256(source.encode('utf-8')).hexdigest()
+        self._sources[name] = source
+        return name
+
+    def get_source(self, environment, template):
+        if template not in self._sources:
+            raise TemplateNotFound(template)
+
+        # Names are content hashes, so a registered source never goes stale
+        return self._sources[template], None, lambda: True
+
+
+_environment = None
+_loader = None
+_json_backend = None
+_failures = {}
+_lock = threading.Lock()
+
+
+def get_environment(mod_config) -> Environment:
+    """
+    Returns the process-wide Jinja environment, with its bytecode cache in the module state directory
+    and its tojson filter backed by the configured JSON serializer
+
+    :param mod_config: Module configuration
+    :return: Environment
+    """
+    global _environment, _loader, _json_backend
+
+    with _lock:
+        if _environment is None:
+            cache_dir = os.path.join(get_state_dir(mod_config), 'jinja_cache')
+            os.makedirs(cache_dir, exist_ok=True)
+            _loader = _SourceLoader()
+            _environment = Environment(loader=ChoiceLoader([_loader,
+                                                            PackageLoader('iris_intelowl_module_2', 'templates')]),
+                                       bytecode_cache=FileSystemBytecodeCache(cache_dir))
+
+        json_backend = mod_config.get('intelowl_json_backend') or 'auto'
+        if json_backend != _json_backend:
+            _environment.filters['tojson'] = make_tojson_filter(json_backend)
+            _json_backend = json_backend
+
+    return _environment
+
+
+def get_template(mod_config, source, classification="generic"):
+    """
+    Returns the compiled template of a source, or the packaged default template of the classification
+    when the source is empty. Templates are compiled once per process, and their bytecode is shared through
+    the disk cache. Syntax errors are raised as jinja2.TemplateSyntaxError, and remembered so a broken
+    template is not parsed again for every IOC.
+
+    :param mod_config: Module configuration
+    :param source: Template source, as set in the module configuration
+    :param classification: IntelOwl observable classification
+    :return: jinja2.Template
+    """
+    environment = get_environment(mod_config)
+    if not source or not source.strip():
+        return environment.get_template(f'report_{classification}.html')
+
+    with _lock:
+        name = _loader.register(source)
+        failure = _failures.get(name)
+
+    if failure is not None:
+        # A new error each time: raising the remembered one again would keep chaining tracebacks onto it
+        error = TemplateSyntaxError(*failure)
+        # Same message as the first error, which Jinja raised with its location moved to the traceback
+        error.translated = True
+        raise error
+
+    try:
+        return environment.get_template(name)
+    except TemplateSyntaxError as e:
+        with _lock:
+            _failures[name] = (e.message, e.lineno, e.name, e.filename)
+        raise
+
+
+def compile_templates(mod_config) -> dict:
+    """
+    Compiles every configured report template, so broken templates are reported at configuration time
+
+    :param mod_config: Module configuration
+    :return: Dict of configuration key to error message, for templates that failed to compile
+    """
+    errors = {}
+    for classification, template_key in TEMPLATE_KEYS.items():
+        try:
+            get_template(mod_config, mod_config.get(template_key), classification)
+        except Exception as e:
+            errors[template_key] = str(e)
+
+    return errors
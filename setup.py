@@ -5,10 +5,14 @@ setup(
     python_requires='>=3.8',
     version='0.1.2',
     packages=['iris_intelowl_module_2', 'iris_intelowl_module_2.intelowl_handler'],
+    package_data={'iris_intelowl_module_2': ['templates/*.html']},
     url='https://github.com/dfir-iris/iris-intelowl-module',
     license='Apache Software License 3.0',
     author='dfir-iris',
     author_email='contact@dfir-iris.org',
     description='`iris-intelowl-module` is a IRIS processor module providing open-source threat intelligence leveraging IntelOlw analyzers, to enrich indicators of compromise',
-    install_requires=['pyintelowl>=4.4.0']
+    install_requires=['pyintelowl>=4.4.0'],
+    entry_points={
+        'console_scripts': ['iris-intelowl-bulk-enrich=iris_intelowl_module_2.bulk_enrich:main']
+    }
 )
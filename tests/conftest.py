@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+#
+#
+#  IRIS intelowl Source Code
+#  Copyright (C) 2022 - dfir-iris
+#  contact@dfir-iris.org
+#  Created by dfir-iris - 2022-10-29
+#
+#  License Apache Software License 3.0
+
+import itertools
+import logging
+
+import pytest
+
+
+class FakeIntelOwl(object):
+    """
+    In-memory stand-in of the IntelOwl client. A job finishes once fetched or listed more than polls times, with a
+    successful report of every analyzer it ran unless reports gives the analyzer reports of every job. errors maps an
+    observable to the exception its submission raises. Every request is appended to calls.
+    """
+    def __init__(self, playbook_analyzers=('A', 'B'), polls=0, reports=None, errors=None):
+        self.playbook_analyzers = list(playbook_analyzers)
+        self.polls = polls
+        self.reports = reports
+        self.errors = errors or {}
+        self.jobs = {}
+        self.calls = []
+        self._job_ids = itertools.count(100)
+
+    def _new_job(self, classification, observable, analyzers, playbook_name, tags_labels):
+        if observable in self.errors:
+            raise self.errors[observable]
+
+        job_id = next(self._job_ids)
+        self.jobs[job_id] = {"id": job_id, "status": "running", "observable_name": observable,
+                             "observable_classification": classification, "playbook_requested": playbook_name,
+                             "analyzers_requested": list(analyzers), "fetches": 0,
+                             "tags": [{"label": label} for label in tags_labels or []]}
+        return job_id
+
+    def send_observable_analysis_playbook_request(self, observable_name, playbook_requested, tags_labels=None,
+                                                  observable_classification=None):
+        self.calls.append(("playbook", observable_classification, observable_name))
+        job_id = self._new_job(observable_classification, observable_name, self.playbook_analyzers,
+                               playbook_requested, tags_labels)
+        return {"job_id": job_id, "status": "accepted"}
+
+    def send_observable_analysis_request(self, observable_name, analyzers_requested=None, tags_labels=None,
+                                         observable_classification=None):
+        self.calls.append(("analyzers", observable_classification, observable_name, tuple(analyzers_requested)))
+        job_id = self._new_job(observable_classification, observable_name, analyzers_requested, None, tags_labels)
+        return {"job_id": job_id, "status": "accepted"}
+
+    def submit_playbook_batch(self, classification, observables, playbook_name, tags_labels=None):
+        self.calls.append(("batch", classification, tuple(observables), tuple(tags_labels or ())))
+        return [self._new_job(classification, observable, self.playbook_analyzers, playbook_name, tags_labels)
+                for observable in observables]
+
+    def get_playbook_analyzers(self, playbook_name):
+        return list(self.playbook_analyzers)
+
+    def _observe(self, job):
+        job["fetches"] += 1
+        if job["status"] == "running" and job["fetches"] > self.polls:
+            job["status"] = "reported_without_fails"
+            job["analyzer_reports"] = self.reports if self.reports is not None else \
+                [{"name": name, "status": "SUCCESS", "report": {"observable": job["observable_name"]}}
+                 for name in job["analyzers_requested"]]
+            job["connector_reports"] = []
+
+        return {key: value for key, value in job.items() if key != "fetches"}
+
+    def list_jobs(self, tag, page_size=100, max_pages=20, statuses=None):
+        self.calls.append(("list", tag))
+        jobs = [self._observe(job) for job in self.jobs.values()
+                if tag in [job_tag["label"] for job_tag in job["tags"]]]
+        return [{"id": job["id"], "status": job["status"]} for job in jobs
+                if not statuses or job["status"] in statuses]
+
+    def get_job_by_id(self, job_id):
+        self.calls.append(("get", int(job_id)))
+        return self._observe(self.jobs[int(job_id)])
+
+    def kill_running_job(self, job_id):
+        self.calls.append(("kill", int(job_id)))
+
+    def kill_running_analyzer(self, job_id, analyzer_name):
+        self.calls.append(("kill_analyzer", int(job_id), analyzer_name))
+
+
+class FakeIoc(object):
+    _ioc_ids = itertools.count(1)
+
+    def __init__(self, value, type_name, case_id=1):
+        self.ioc_id = next(self._ioc_ids)
+        self.ioc_value = value
+        self.ioc_type = type('IocType', (), {'type_name': type_name})()
+        self.case_id = case_id
+        self.custom_attributes = {}
+
+
+@pytest.fixture
+def logger():
+    return logging.getLogger('iris_intelowl_module_2.tests')
+
+
+@pytest.fixture
+def fake_intelowl():
+    return FakeIntelOwl()
+
+
+@pytest.fixture
+def mod_config(tmp_path):
+    return {
+        'intelowl_url': 'http://intelowl.test',
+        'intelowl_key': 'key',
+        'intelowl_maxtime': 1,
+        'intelowl_playbook_name': 'FREE_TO_USE_ANALYZERS',
+        'intelowl_report_as_attribute': False,
+        'intelowl_state_dir': str(tmp_path / 'state'),
+    }
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+#
+#
+#  IRIS intelowl Source Code
+#  Copyright (C) 2022 - dfir-iris
+#  contact@dfir-iris.org
+#  Created by dfir-iris - 2022-10-29
+#
+#  License Apache Software License 3.0
+
+import logging
+import threading
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+import pytest
+
+from iris_intelowl_module_2.intelowl_handler.completion_listener import (COMPLETION_PATH, CompletionListener,
+                                                                          CompletionRegistry, post_completion)
+
+
+@pytest.fixture
+def registry(tmp_path):
+    return CompletionRegistry(str(tmp_path / 'completions'))
+
+
+@pytest.fixture
+def listener_url(registry):
+    listener = CompletionListener(registry, '127.0.0.1', 0, 's3cret', logging.getLogger(__name__))
+    listener.start()
+    yield f'http://127.0.0.1:{listener.server.server_address[1]}'
+    listener.stop()
+
+
+def test_posted_completion_wakes_the_waiting_handler(registry, listener_url):
+    waited = []
+    waiter = threading.Thread(target=lambda: waited.append(registry.wait(42, timeout=10)))
+    waiter.start()
+
+    assert post_completion(listener_url, 42, token='s3cret') == 204
+    waiter.join(10)
+    assert waited == [True]
+
+
+def test_completion_is_kept_for_a_later_wait(registry, listener_url):
+    post_completion(listener_url, 7, token='s3cret')
+
+    assert registry.wait(7, timeout=0)
+    assert not registry.wait(7, timeout=0)
+
+
+@pytest.mark.parametrize('token', [None, 'wrong', 's3cret-but-longer', 'sécret'])
+def test_wrong_token_is_refused(registry, listener_url, token):
+    with pytest.raises(HTTPError) as error:
+        post_completion(listener_url, 42, token=token)
+
+    assert error.value.code == 403
+    assert not registry.wait(42, timeout=0)
+
+
+def test_unknown_path_is_refused(listener_url):
+    with pytest.raises(HTTPError) as error:
+        post_completion(listener_url + '/elsewhere', 42, token='s3cret')
+
+    assert error.value.code == 404
+
+
+def test_missing_job_id_is_refused(listener_url):
+    request = Request(f'{listener_url}{COMPLETION_PATH}?token=s3cret', data=b'{"status": "reported"}',
+                      headers={'Content-Type': 'application/json'}, method='POST')
+    with pytest.raises(HTTPError) as error:
+        urlopen(request, timeout=5)
+
+    assert error.value.code == 400
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+#
+#
+#  IRIS intelowl Source Code
+#  Copyright (C) 2022 - dfir-iris
+#  contact@dfir-iris.org
+#  Created by dfir-iris - 2022-10-29
+#
+#  License Apache Software License 3.0
+
+
+import pytest
+
+pytest.importorskip('pyintelowl')
+pytest.importorskip('iris_interface')
+pytest.importorskip('app.datamgmt.manage.manage_attribute_db')
+
+import requests
+from pyintelowl import IntelOwlClientException
+
+from iris_intelowl_module_2.intelowl_handler import intelowl_handler, result_cache
+from iris_intelowl_module_2.intelowl_handler.intelowl_handler import FAILED_ANALYZER_TTL, IntelowlHandler
+
+from .conftest import FakeIntelOwl, FakeIoc
+
+
+@pytest.fixture
+def make_handler(monkeypatch, mod_config, fake_intelowl, logger):
+    monkeypatch.setattr(intelowl_handler, 'IntelOwl', lambda *args, **kwargs: fake_intelowl)
+
+    def make_handler(**config):
+        return IntelowlHandler(dict(mod_config, **config), {}, logger)
+
+    return make_handler
+
+
+def rejection(status_code):
+    return IntelOwlClientException(requests.HTTPError(response=type('Response', (), {'status_code': status_code})()))
+
+
+def submissions(fake_intelowl):
+    return [call for call in fake_intelowl.calls if call[0] in ('playbook', 'analyzers', 'batch')]
+
+
+class TestNegativeCache(object):
+
+    def test_rejection_is_remembered(self, make_handler, fake_intelowl):
+        fake_intelowl.errors['bad.example'] = rejection(400)
+
+        for _ in range(2):
+            status = make_handler(intelowl_negative_cache_ttl=10).handle_ioc(FakeIoc('bad.example', 'domain'))
+            assert status.is_failure()
+
+        assert len(submissions(fake_intelowl)) == 1
+
+    def test_negative_cache_is_disabled_by_default(self, make_handler, fake_intelowl):
+        fake_intelowl.errors['bad.example'] = rejection(400)
+
+        for _ in range(2):
+            make_handler().handle_ioc(FakeIoc('bad.example', 'domain'))
+
+        assert len(submissions(fake_intelowl)) == 2
+
+    @pytest.mark.parametrize('error', [rejection(502), IntelOwlClientException('unexpected answer'),
+                                       IntelOwlClientException(requests.ConnectionError('refused'))])
+    def test_transient_failures_are_retried_instead(self, make_handler, fake_intelowl, error):
+        fake_intelowl.errors['flaky.example'] = error
+
+        handler = make_handler(intelowl_negative_cache_ttl=10)
+        ioc = FakeIoc('flaky.example', 'domain')
+        assert handler.handle_ioc(ioc).is_failure()
+        assert handler.pending_retries == [ioc.ioc_id]
+
+        make_handler(intelowl_negative_cache_ttl=10).handle_ioc(FakeIoc('flaky.example', 'domain'))
+        assert len(submissions(fake_intelowl)) == 2
+
+    def test_empty_result_is_remembered(self, make_handler, fake_intelowl):
+        fake_intelowl.reports = [{"name": "A", "status": "SUCCESS", "report": {}}]
+
+        for _ in range(2):
+            assert make_handler(intelowl_negative_cache_ttl=10).handle_ioc(FakeIoc('8.8.8.8', 'ip-dst')).is_success()
+
+        assert len(submissions(fake_intelowl)) == 1
+
+    def test_failed_analyzers_are_not_taken_for_an_empty_result(self, make_handler, fake_intelowl):
+        fake_intelowl.reports = [{"name": "A", "status": "FAILED", "report": {}, "errors": ["rate limited"]}]
+
+        for _ in range(2):
+            make_handler(intelowl_negative_cache_ttl=10).handle_ioc(FakeIoc('8.8.8.8', 'ip-dst'))
+
+        assert len(submissions(fake_intelowl)) == 2
+
+
+class TestAnalyzerCache(object):
+
+    def test_cached_analyzers_make_the_job(self, make_handler, fake_intelowl):
+        for value in ('8.8.8.8', '8[.]8[.]8[.]8'):
+            assert make_handler(intelowl_analyzer_cache_ttl=60).handle_ioc(FakeIoc(value, 'ip-dst')).is_success()
+
+        assert submissions(fake_intelowl) == [("playbook", "ip", "8.8.8.8")]
+
+    def test_failed_analyzer_is_requested_again_once_its_short_ttl_ends(self, make_handler, fake_intelowl,
+                                                                        monkeypatch):
+        fake_intelowl.reports = [{"name": "A", "status": "SUCCESS", "report": {"verdict": "clean"}},
+                                 {"name": "B", "status": "FAILED", "report": {}}]
+        make_handler(intelowl_analyzer_cache_ttl=60).handle_ioc(FakeIoc('8.8.8.8', 'ip-dst'))
+
+        make_handler(intelowl_analyzer_cache_ttl=60).handle_ioc(FakeIoc('8.8.8.8', 'ip-dst'))
+        assert len(submissions(fake_intelowl)) == 1
+
+        now = result_cache.time.time()
+        monkeypatch.setattr(result_cache.time, 'time', lambda: now + FAILED_ANALYZER_TTL + 1)
+        fake_intelowl.reports = None
+        make_handler(intelowl_analyzer_cache_ttl=60).handle_ioc(FakeIoc('8.8.8.8', 'ip-dst'))
+
+        assert submissions(fake_intelowl)[1:] == [("analyzers", "ip", "8.8.8.8", ("B",))]
+
+    def test_analyzers_not_run_are_not_requested_alone(self, make_handler, fake_intelowl):
+        fake_intelowl.playbook_analyzers = ['A', 'B', 'C']
+        fake_intelowl.reports = [{"name": "A", "status": "SUCCESS", "report": {"verdict": "clean"}}]
+        make_handler(intelowl_analyzer_cache_ttl=60).handle_ioc(FakeIoc('8.8.8.8', 'ip-dst'))
+
+        handler = make_handler(intelowl_analyzer_cache_ttl=60)
+        cached_reports, missing_analyzers = handler._get_cached_analyzers('ip', '8.8.8.8', 'FREE_TO_USE_ANALYZERS')
+        assert missing_analyzers == []
+        assert sorted(report["name"] for report in cached_reports) == ['A', 'B', 'C']
+
+
+class TestBatchSubmission(object):
+
+    def test_observable_shared_by_cases_is_submitted_once(self, make_handler, fake_intelowl):
+        handler = make_handler(intelowl_submit_batch_size=10, intelowl_job_tagging_enabled=True)
+        iocs = [FakeIoc('8.8.8.8', 'ip-dst', case_id=1), FakeIoc('8[.]8[.]8[.]8', 'ip-dst', case_id=2),
+                FakeIoc('1.1.1.1', 'ip-dst', case_id=2), FakeIoc('10.0.0.1', 'ip-dst', case_id=1)]
+
+        handler.presubmit(iocs)
+        handler.collect_submitted()
+        statuses = [handler.handle_ioc(ioc) for ioc in iocs]
+
+        assert all(status.is_success() for status in statuses)
+        batches = [call for call in fake_intelowl.calls if call[0] == 'batch']
+        submitted = [observable for call in batches for observable in call[2]]
+        assert sorted(submitted) == ['1.1.1.1', '10.0.0.1', '8.8.8.8']
+        assert submissions(fake_intelowl) == batches
+        assert len(fake_intelowl.jobs) == 3
+
+    def test_batch_jobs_are_tagged_with_their_case(self, make_handler, fake_intelowl):
+        handler = make_handler(intelowl_submit_batch_size=10, intelowl_job_tagging_enabled=True)
+        handler.presubmit([FakeIoc('8.8.8.8', 'ip-dst', case_id=1), FakeIoc('1.1.1.1', 'ip-dst', case_id=2)])
+
+        tags = {call[2]: call[3] for call in fake_intelowl.calls if call[0] == 'batch'}
+        assert 'iris-case-1' in tags[('8.8.8.8',)]
+        assert 'iris-case-2' in tags[('1.1.1.1',)]
+
+    def test_batches_respect_the_batch_size(self, make_handler, fake_intelowl):
+        handler = make_handler(intelowl_submit_batch_size=2, intelowl_skip_non_routable=False)
+        handler.presubmit([FakeIoc(f'8.8.8.{last}', 'ip-dst') for last in range(5)])
+
+        assert [len(call[2]) for call in submissions(fake_intelowl)] == [2, 2, 1]
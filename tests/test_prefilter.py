@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+#
+#
+#  IRIS intelowl Source Code
+#  Copyright (C) 2022 - dfir-iris
+#  contact@dfir-iris.org
+#  Created by dfir-iris - 2022-10-29
+#
+#  License Apache Software License 3.0
+
+
+import os
+
+import pytest
+
+from iris_intelowl_module_2.intelowl_handler.prefilter import (CidrIndex, DomainSuffixTrie, ObservablePrefilter,
+                                                               get_prefilter)
+
+
+@pytest.fixture
+def allowlists(tmp_path):
+    cidr_file = tmp_path / 'cidrs.txt'
+    cidr_file.write_text('# corporate ranges\n8.8.8.0/24\n8.8.9.0/24  # merged with the previous one\n'
+                         'not a network\n2001:4860::/32\n')
+    domain_file = tmp_path / 'domains.txt'
+    domain_file.write_text('example.com\nCorp.Example.org.\n')
+    hash_file = tmp_path / 'hashes.txt'
+    hash_file.write_text('D41D8CD98F00B204E9800998ECF8427E\n')
+    return str(cidr_file), str(domain_file), str(hash_file)
+
+
+@pytest.fixture
+def prefilter(allowlists):
+    return ObservablePrefilter(True, *allowlists)
+
+
+@pytest.mark.parametrize('classification, value', [
+    ('ip', '10.1.2.3'),
+    ('ip', '127.0.0.1'),
+    ('ip', 'fe80::1'),
+    ('ip', '8.8.9.200'),
+    ('ip', '2001:4860::8888'),
+    ('domain', 'example.com'),
+    ('domain', 'www.EXAMPLE.com'),
+    ('domain', 'mail.corp.example.org'),
+    ('domain', '192.168.1.1'),
+    ('url', 'https://www.example.com/path'),
+    ('url', 'http://10.0.0.1:8080/'),
+    ('url', 'example.com/no/scheme'),
+    ('hash', 'd41d8cd98f00b204e9800998ecf8427e'),
+])
+def test_allowlisted_and_private_observables_are_skipped(prefilter, classification, value):
+    assert prefilter.match(classification, value)
+
+
+@pytest.mark.parametrize('classification, value', [
+    ('ip', '1.1.1.1'),
+    ('ip', '8.8.10.1'),
+    ('domain', 'notexample.com'),
+    ('domain', 'example.org'),
+    ('url', 'https://evil.test/example.com'),
+    ('url', 'http://[invalid/'),
+    ('hash', '0123456789abcdef0123456789abcdef'),
+    ('generic', 'example.com'),
+])
+def test_other_observables_are_kept(prefilter, classification, value):
+    assert prefilter.match(classification, value) is None
+
+
+def test_non_routable_check_can_be_disabled(allowlists):
+    prefilter = ObservablePrefilter(False, *allowlists)
+
+    assert prefilter.match('ip', '10.1.2.3') is None
+    assert prefilter.match('ip', '8.8.8.8')
+
+
+def test_missing_allowlist_leaves_the_others_active(allowlists, tmp_path, logger):
+    prefilter = ObservablePrefilter(True, str(tmp_path / 'missing.txt'), allowlists[1], None, logger=logger)
+
+    assert prefilter.match('ip', '8.8.8.8') is None
+    assert prefilter.match('ip', '10.0.0.1')
+    assert prefilter.match('domain', 'example.com')
+
+
+def test_cidr_index_merges_overlapping_networks():
+    import ipaddress
+
+    index = CidrIndex(ipaddress.ip_network(network) for network in ('10.0.0.0/8', '10.1.0.0/16', '11.0.0.0/8',
+                                                                    '192.168.0.0/24'))
+    assert len(index) == 2
+    assert index.contains(ipaddress.ip_address('11.255.255.255'))
+    assert not index.contains(ipaddress.ip_address('12.0.0.0'))
+    assert not index.contains(ipaddress.ip_address('::1'))
+
+
+def test_domain_trie_matches_parents_only():
+    trie = DomainSuffixTrie(['example.com', 'example.com.'])
+
+    assert len(trie) == 1
+    assert trie.match('a.b.example.com')
+    assert not trie.match('com')
+
+
+def test_prefilter_is_rebuilt_when_an_allowlist_changes(allowlists, mod_config):
+    cidr_file, domain_file, hash_file = allowlists
+    mod_config.update(intelowl_allowlist_cidr_file=cidr_file, intelowl_allowlist_domain_file=domain_file,
+                      intelowl_allowlist_hash_file=hash_file)
+
+    prefilter = get_prefilter(mod_config)
+    assert get_prefilter(mod_config) is prefilter
+    assert prefilter.match('domain', 'example.net') is None
+
+    with open(domain_file, 'a') as fd:
+        fd.write('example.net\n')
+    stat = os.stat(domain_file)
+    os.utime(domain_file, (stat.st_atime, stat.st_mtime + 10))
+
+    assert get_prefilter(mod_config).match('domain', 'example.net')
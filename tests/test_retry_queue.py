@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+#
+#
+#  IRIS intelowl Source Code
+#  Copyright (C) 2022 - dfir-iris
+#  contact@dfir-iris.org
+#  Created by dfir-iris - 2022-10-29
+#
+#  License Apache Software License 3.0
+
+import threading
+
+import pytest
+
+from iris_intelowl_module_2.intelowl_handler import retry_queue
+from iris_intelowl_module_2.intelowl_handler.retry_queue import RetryDrainer, RetryQueue
+
+
+class Clock(object):
+
+    def __init__(self, now=1000000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(retry_queue.time, 'time', clock.time)
+    monkeypatch.setattr(retry_queue.random, 'uniform', lambda low, high: high)
+    return clock
+
+
+@pytest.fixture
+def queue(tmp_path, clock):
+    return RetryQueue(str(tmp_path / 'retry_queue.sqlite'), max_attempts=3, base_delay=60, max_delay=3600, lease=600)
+
+
+def test_entry_is_due_after_its_backoff(queue, clock):
+    queue.enqueue(1, '1.1.1.1', 'ip', 'PB', reason='timeout')
+    assert queue.due() == []
+
+    clock.now += 60
+    assert [entry["ioc_value"] for entry in queue.due()] == ['1.1.1.1']
+
+
+def test_requeue_keeps_the_schedule_and_refreshes_the_job(queue, clock):
+    queue.enqueue(1, '1.1.1.1', 'ip', 'PB', reason='timeout')
+    clock.now += 30
+    queue.enqueue(1, '1.1.1.1', 'ip', 'PB', reason='still running', job_id=7)
+
+    clock.now += 30
+    entries = queue.due()
+    assert len(entries) == 1
+    assert (entries[0]["reason"], entries[0]["job_id"], entries[0]["attempts"]) == ('still running', 7, 0)
+
+
+def test_backoff_doubles_until_abandoned(queue, clock):
+    queue.enqueue(1, '1.1.1.1', 'ip', 'PB')
+    clock.now += 60
+    entry_id = queue.due()[0]["id"]
+
+    for delay in (120, 240):
+        assert queue.claim(entry_id)
+        queue.mark_failed(entry_id)
+        clock.now += delay - 1
+        assert queue.due() == []
+        clock.now += 1
+        assert len(queue.due()) == 1
+
+    assert queue.claim(entry_id)
+    queue.mark_failed(entry_id)
+    clock.now += 3600
+    assert queue.due() == []
+    assert queue.size() == 0
+
+
+def test_claim_is_exclusive_across_queues(queue, clock):
+    other_process_queue = RetryQueue(queue.db_path, lease=600)
+    queue.enqueue(1, '1.1.1.1', 'ip', 'PB')
+    clock.now += 60
+    entry_id = queue.due()[0]["id"]
+
+    assert queue.claim(entry_id)
+    assert not other_process_queue.claim(entry_id)
+    assert other_process_queue.due() == []
+
+
+def test_claim_expires_with_its_lease(queue, clock):
+    queue.enqueue(1, '1.1.1.1', 'ip', 'PB')
+    clock.now += 60
+    entry_id = queue.due()[0]["id"]
+    assert queue.claim(entry_id)
+
+    clock.now += 599
+    assert queue.due() == []
+    clock.now += 1
+    assert queue.claim(entry_id)
+
+
+def test_done_entry_is_removed(queue, clock):
+    queue.enqueue(1, '1.1.1.1', 'ip', 'PB')
+    clock.now += 60
+    entry_id = queue.due()[0]["id"]
+    queue.claim(entry_id)
+    queue.mark_done(entry_id)
+
+    clock.now += 3600
+    assert queue.size() == 0
+
+
+def test_drainers_retry_each_entry_once(queue, clock, logger):
+    for ioc_id in range(20):
+        queue.enqueue(ioc_id, f'10.0.0.{ioc_id}', 'ip', 'PB')
+    clock.now += 60
+
+    retried = []
+    lock = threading.Lock()
+
+    def callback(entry):
+        with lock:
+            retried.append(entry["ioc_id"])
+        return True
+
+    drainers = [RetryDrainer(RetryQueue(queue.db_path, lease=600), callback, logger) for _ in range(4)]
+    threads = [threading.Thread(target=drainer.drain) for drainer in drainers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(retried) == list(range(20))
+    assert queue.size() == 0
+
+
+def test_drainer_reschedules_failed_retries(queue, clock, logger):
+    queue.enqueue(1, '1.1.1.1', 'ip', 'PB')
+    clock.now += 60
+
+    def callback(entry):
+        raise RuntimeError('IntelOwl is down')
+
+    RetryDrainer(queue, callback, logger).drain()
+
+    clock.now += 120
+    entries = queue.due()
+    assert [entry["attempts"] for entry in entries] == [1]